@@ -5,8 +5,9 @@ import threading
 import webbrowser
 
 from modules.config import config
+from modules import launcher
 from modules.scheduler_engine import iniciar_scheduler
-from modules.executor import graceful_shutdown
+from modules.executor import graceful_shutdown, restaurar_fila
 from modules.api import app
 
 
@@ -29,7 +30,12 @@ if __name__ == "__main__":
     print(f"  Concurrent limit: {config.MAX_PROCESSOS_SIMULTANEOS}")
     print("=" * 60)
 
-    # 1. Start APScheduler (reads xlsx, registers jobs, runs catch-up)
+    # 0. Warm the forkserver (LAUNCH_MODE=forkserver) while the schedules load
+    threading.Thread(target=launcher.preaquecer, daemon=True, name="forkserver-warmup").start()
+
+    # 1. Restore runs left in the persistent queue (QUEUE_PERSISTENT), then start
+    #    APScheduler (reads xlsx, registers jobs, runs catch-up)
+    restaurar_fila()
     iniciar_scheduler()
 
     # 2. Start Flask in daemon thread
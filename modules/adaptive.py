@@ -0,0 +1,109 @@
+import threading
+import time
+from collections import deque
+from typing import Callable
+import psutil
+from modules.config import config
+from modules.slots import SlotLedger
+
+
+class AdaptiveController:
+    """
+    Moves the slot ledger's capacity between ADAPTIVE_MIN_SLOTS and
+    ADAPTIVE_MAX_SLOTS from host load sampled every ADAPTIVE_INTERVAL_SECONDS.
+
+    Hysteresis: a sample is "overloaded" when any metric crosses its HIGH
+    threshold (CPU %, load average per core, available memory % below LOW)
+    and "calm" when all are on the safe side of the other threshold; anything
+    in between holds. One overloaded sample removes a slot; growing needs
+    ADAPTIVE_STABLE_SAMPLES calm samples in a row while work is actually
+    waiting for capacity. Every change resets both streaks.
+    """
+
+    def __init__(self, ledger: SlotLedger, demand: Callable[[], bool], on_change: Callable[[], None]):
+        self.ledger = ledger
+        self.min_slots = max(1, config.ADAPTIVE_MIN_SLOTS)
+        self.max_slots = max(self.min_slots, config.ADAPTIVE_MAX_SLOTS)
+        self._demand = demand
+        self._on_change = on_change
+        self._calm = 0
+        self._last_sample: dict = {}
+        self._decisions: deque = deque(maxlen=50)
+        self._lock = threading.Lock()
+        self._cpus = psutil.cpu_count() or 1
+        psutil.cpu_percent(interval=None)  # primes the counter; the first reading is meaningless
+        ledger.definir_capacidade(min(max(config.MAX_PROCESSOS_SIMULTANEOS, self.min_slots), self.max_slots))
+
+    def amostrar(self) -> dict:
+        try:
+            load = psutil.getloadavg()[0] / self._cpus
+        except (AttributeError, OSError):
+            load = None
+        return {
+            "cpu_percent": psutil.cpu_percent(interval=None),
+            "memory_available_percent": round(100.0 - psutil.virtual_memory().percent, 1),
+            "load_per_cpu": round(load, 2) if load is not None else None,
+        }
+
+    def _classify(self, sample: dict) -> tuple[str, str]:
+        load = sample["load_per_cpu"]
+        if sample["memory_available_percent"] < config.ADAPTIVE_MEMORY_LOW_PERCENT:
+            return "overloaded", f"available memory {sample['memory_available_percent']}%"
+        if sample["cpu_percent"] > config.ADAPTIVE_CPU_HIGH:
+            return "overloaded", f"cpu {sample['cpu_percent']}%"
+        if load is not None and load > config.ADAPTIVE_LOAD_HIGH:
+            return "overloaded", f"load {load}/cpu"
+        calm = (
+            sample["memory_available_percent"] >= config.ADAPTIVE_MEMORY_OK_PERCENT
+            and sample["cpu_percent"] < config.ADAPTIVE_CPU_LOW
+            and (load is None or load < config.ADAPTIVE_LOAD_LOW)
+        )
+        return ("calm", "host calm, work waiting") if calm else ("hold", "")
+
+    def avaliar(self, sample: dict) -> None:
+        """Applies one sample: may change the ledger capacity by one slot."""
+        state, reason = self._classify(sample)
+        current = self.ledger.capacity
+        target = current
+        with self._lock:
+            self._last_sample = {**sample, "state": state, "at": time.time()}
+            if state == "overloaded":
+                self._calm = 0
+                target = max(self.min_slots, current - 1)
+            elif state == "calm" and self._demand() and self.ledger.livres() <= 0:
+                self._calm += 1
+                if self._calm >= config.ADAPTIVE_STABLE_SAMPLES:
+                    target = min(self.max_slots, current + 1)
+            else:
+                self._calm = 0
+            if target == current:
+                return
+            self._calm = 0
+            self._decisions.append({"at": time.time(), "from": current, "to": target, "reason": reason, **sample})
+        self.ledger.definir_capacidade(target)
+        print(f"[ADAPTIVE] Slots {current} → {target} ({reason}).")
+        self._on_change()
+
+    def _run(self) -> None:
+        while True:
+            time.sleep(max(1, config.ADAPTIVE_INTERVAL_SECONDS))
+            try:
+                self.avaliar(self.amostrar())
+            except Exception as exc:
+                print(f"[WARN] Adaptive controller sample failed: {exc}")
+
+    def iniciar(self) -> None:
+        threading.Thread(target=self._run, daemon=True, name="adaptive-controller").start()
+        print(f"[BOOT] Adaptive concurrency on: {self.ledger.capacity} slots (bounds {self.min_slots}-{self.max_slots}).")
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "enabled": True,
+                "slots": self.ledger.capacity,
+                "min_slots": self.min_slots,
+                "max_slots": self.max_slots,
+                "calm_streak": self._calm,
+                "last_sample": dict(self._last_sample),
+                "decisions": list(self._decisions),
+            }
@@ -5,8 +5,10 @@ from flask import Flask, jsonify, request, send_from_directory
 from flask_cors import CORS
 from modules.config import config
 from modules.scheduler_engine import _tz
-from modules import executor, scheduler_engine, workflow_manager
-from modules.registry import obter_todos_scripts_planilha, obter_workflows, obter_scripts_agendaveis
+from modules import (
+    deadlines, dispatch, executor, history, launcher, retries, run_logs, scheduler_engine, telemetry, workflow_manager,
+)
+from modules.registry import obter_todos_scripts_planilha, obter_workflows, obter_scripts_agendaveis, estatisticas_cache
 from modules.scanner import buscar_arquivos_locais
 
 app = Flask(
@@ -48,29 +50,47 @@ def api_status():
         running = [
             {
                 "pid": info["pid"],
+                "run_id": info.get("run_id"),
                 "script_name": info["script_name"],
                 "area_name": info["area_name"],
                 "running_time_seconds": int(now - info["start_time"]),
                 "is_workflow": info["is_workflow_item"],
                 "trigger_reason": info.get("trigger_reason", "scheduled"),
+                "telemetry": telemetry.obter(info["pid"]),
             }
             for info in executor.running_processes.values()
         ]
     running.sort(key=lambda x: x["running_time_seconds"], reverse=True)
 
+    tasks = [task for _, task in executor.task_queue.snapshot()]
+    slots = executor.slot_ledger.stats()
+    busy = [(dispatch.prever(h["script_name"]) - (now - h["since"]), h["weight"]) for h in slots["holders"].values()]
+    starts = dispatch.estimar_inicios(tasks, busy, slots["capacity"], now)
+    lanes = {lane: {**info, **slots["lanes"].get(lane, {}), "next_estimated_start": None}
+             for lane, info in executor.task_queue.lanes().items()}
+    positions: dict[str, int] = {}
     queued = []
-    for i, (priority, _, task) in enumerate(list(executor.task_queue.queue)):
+    for i, (task, start) in enumerate(zip(tasks, starts)):
         try:
-            dt = datetime.fromtimestamp(priority, tz=_tz)
+            dt = datetime.fromtimestamp(task["scheduled_timestamp"], tz=_tz)
             priority_iso = dt.isoformat()
         except Exception:
-            priority_iso = str(priority)
+            priority_iso = str(task["scheduled_timestamp"])
+        positions[task["lane"]] = positions.get(task["lane"], 0) + 1
+        estimated = datetime.fromtimestamp(start, tz=_tz).isoformat()
+        if lanes[task["lane"]]["next_estimated_start"] is None:
+            lanes[task["lane"]]["next_estimated_start"] = estimated
         queued.append({
             "script_name": task["script_name"],
             "area_name": task["area_name"],
             "priority_timestamp": priority_iso,
             "status": "waiting",
             "position": i + 1,
+            "predicted_seconds": round(task.get("predicted_duration") or 0, 1),
+            "lane": task["lane"],
+            "lane_position": positions[task["lane"]],
+            "estimated_start": estimated,
+            "estimated_wait_seconds": int(start - now),
         })
 
     wf = workflow_manager.get_state()
@@ -82,9 +102,11 @@ def api_status():
         "workflow_current_script": wf.get("current_script"),
         "workflow_progress": wf.get("progress"),
         "workflow_log": wf.get("log", []),
-        "max_concurrent": config.MAX_PROCESSOS_SIMULTANEOS,
+        "max_concurrent": executor.slot_ledger.capacity,
         "running_count": len(running),
         "queued_count": len(queued),
+        "lanes": lanes,
+        "recent_peaks": telemetry.picos_recentes(),
     })
 
 
@@ -95,6 +117,10 @@ def api_health():
         "uptime_seconds": executor.get_uptime_seconds(),
         "running": len(executor.running_processes),
         "queued": executor.task_queue.qsize(),
+        "slots": executor.slot_ledger.stats(),
+        "adaptive": executor.controlador.stats() if executor.controlador else {"enabled": False},
+        "launcher": launcher.estatisticas(),
+        "deadlines": deadlines.estatisticas(),
     })
 
 
@@ -126,6 +152,11 @@ def api_areas():
     return jsonify(areas)
 
 
+@app.route("/api/registry")
+def api_registry():
+    return jsonify(estatisticas_cache())
+
+
 # ── Process control ───────────────────────────────────────────────────────────
 
 @app.route("/api/run/<script_name>", methods=["POST"])
@@ -153,6 +184,61 @@ def api_kill(pid: int):
     return jsonify({"status": "error", "message": "PID not found or already dead."}), 404
 
 
+@app.route("/api/runs/<run_id>/log")
+def api_run_log(run_id: str):
+    """Captured output of one run: ?tail=N (last N lines) or ?offset=B&limit=B (byte window)."""
+    tail = request.args.get("tail", type=int)
+    offset = request.args.get("offset", default=0, type=int)
+    limit = min(max(1, request.args.get("limit", default=65536, type=int)), 1024 * 1024)
+    log = run_logs.ler_log(run_id, offset=offset, tail=tail, limit=limit)
+    if log is None:
+        return jsonify({"status": "error", "message": f"No log for run '{run_id}'."}), 404
+    return jsonify(log)
+
+
+@app.route("/api/retries")
+def api_retries():
+    """Failed runs waiting out their backoff before re-entering the retry lane."""
+    return jsonify(retries.listar())
+
+
+@app.route("/api/dispatch")
+def api_dispatch():
+    """Active dispatch policy, observed queue waits and a fifo-vs-sjf simulation (queue now + recent runs)."""
+    queued = [task for _, task in executor.task_queue.snapshot()]
+    return jsonify(dispatch.relatorio(queued, executor.slot_ledger.capacity))
+
+
+# ── History ───────────────────────────────────────────────────────────────────
+
+@app.route("/api/history")
+def api_history():
+    """Finished runs, newest first: ?script=&since=<epoch>&limit=; page with ?before=<next_cursor>."""
+    limit = min(max(1, request.args.get("limit", default=50, type=int)), 500)
+    return jsonify(history.listar(
+        script=request.args.get("script") or None,
+        before=request.args.get("before", type=int),
+        since=request.args.get("since", type=float),
+        limit=limit,
+    ))
+
+
+@app.route("/api/history/stats")
+def api_history_stats():
+    """Per-script runs, failure rate and duration mean/p50/p95/max over ?days= (default 14)."""
+    days = min(max(1, request.args.get("days", default=14, type=int)), 366)
+    return jsonify(history.estatisticas(dias=days))
+
+
+@app.route("/api/history/stats/<script_name>")
+def api_history_script_stats(script_name: str):
+    days = min(max(1, request.args.get("days", default=14, type=int)), 366)
+    stats = history.estatisticas(script_name, dias=days)
+    if not stats:
+        return jsonify({"status": "error", "message": f"No history for '{script_name}' in {days} days."}), 404
+    return jsonify(stats[0])
+
+
 # ── Reload ────────────────────────────────────────────────────────────────────
 
 @app.route("/api/reload", methods=["POST"])
@@ -166,13 +252,21 @@ def api_reload():
             return jsonify({"status": "cooldown", "wait_seconds": remaining}), 429
         _last_reload_time = now
 
-    scripts, workflows = scheduler_engine.recarregar_agendamentos()
+    reload_id, coalesced = scheduler_engine.solicitar_recarga("api")
     return jsonify({
-        "status": "success",
-        "message": "Configuration reloaded.",
-        "script_count": len(scripts),
-        "workflow_count": len(workflows),
-    })
+        "status": "accepted",
+        "message": "Reload already in progress." if coalesced else "Reload started.",
+        "reload_id": reload_id,
+        "coalesced": coalesced,
+    }), 202
+
+
+@app.route("/api/reload/<reload_id>")
+def api_reload_status(reload_id: str):
+    record = scheduler_engine.obter_recarga(reload_id)
+    if record is None:
+        return jsonify({"status": "error", "message": f"Reload '{reload_id}' not found."}), 404
+    return jsonify(record)
 
 
 # ── Jobs & Workflows ──────────────────────────────────────────────────────────
@@ -182,6 +276,11 @@ def api_jobs():
     return jsonify(scheduler_engine.obter_jobs())
 
 
+@app.route("/api/schedule/skew")
+def api_schedule_skew():
+    return jsonify(scheduler_engine.obter_skew())
+
+
 @app.route("/api/workflows")
 def api_workflows():
     return jsonify({
@@ -200,7 +299,7 @@ def api_run_workflow(workflow_name: str):
         return jsonify({"status": "error", "message": f"Workflow '{workflow_name}' not found."}), 404
     t = threading.Thread(
         target=workflow_manager.iniciar_workflow,
-        args=[wf["workflow_name"], wf["scripts"]],
+        args=[wf["workflow_name"], wf["scripts"], wf["depends_on"], wf["max_parallel"]],
         daemon=True,
         name=f"workflow-{workflow_name}",
     )
@@ -8,11 +8,87 @@ class ConfigServidor(BaseSettings):
     PLANILHA_REGISTRO: Path
     PLANILHA_WORKFLOWS: Path
     DIRETORIO_FRONTEND_BUILD: Path
+    DIRETORIO_DADOS: Path = Path("data")
 
     # Business rules
     MAX_PROCESSOS_SIMULTANEOS: int = 3
     RELOAD_INTERVAL_MINUTES: int = 30
     RELOAD_COOLDOWN_SECONDS: int = 60
+    AREA_LIMITS: dict[str, int] = {}
+    RESOURCE_CLASS_LIMITS: dict[str, int] = {}
+    LANE_WEIGHTS: dict[str, float] = {"manual": 8, "retry": 4, "scheduled": 4, "catchup": 1}
+    LANE_RESERVED_SLOTS: dict[str, int] = {}
+
+    # Run limits
+    DEFAULT_TIMEOUT_SECONDS: int = 0
+    TIMEOUT_KILL_GRACE_SECONDS: int = 10
+    SHUTDOWN_TIMEOUT_SECONDS: int = 10
+
+    # Retries
+    DEFAULT_MAX_RETRIES: int = 0
+    RETRY_BACKOFF_SECONDS: float = 60.0
+    RETRY_BACKOFF_MAX_SECONDS: float = 1800.0
+
+    # Workflows
+    WORKFLOW_MAX_PARALLEL: int = 3
+
+    # Adaptive concurrency
+    ADAPTIVE_CONCURRENCY: bool = False
+    ADAPTIVE_MIN_SLOTS: int = 1
+    ADAPTIVE_MAX_SLOTS: int = 6
+    ADAPTIVE_INTERVAL_SECONDS: int = 15
+    ADAPTIVE_STABLE_SAMPLES: int = 4
+    ADAPTIVE_CPU_HIGH: float = 85.0
+    ADAPTIVE_CPU_LOW: float = 60.0
+    ADAPTIVE_LOAD_HIGH: float = 1.5
+    ADAPTIVE_LOAD_LOW: float = 0.8
+    ADAPTIVE_MEMORY_LOW_PERCENT: float = 10.0
+    ADAPTIVE_MEMORY_OK_PERCENT: float = 25.0
+
+    # Script launches
+    LAUNCH_MODE: str = "subprocess"
+    FORKSERVER_PRELOAD: list[str] = ["pandas", "openpyxl", "requests"]
+
+    # Run output capture
+    RUN_LOG_CAPTURE: bool = True
+    RUN_LOG_BUFFER_KB: int = 256
+    RUN_LOG_FILE_MAX_MB: int = 10
+    RUN_LOG_FILE_BACKUPS: int = 2
+    RUN_LOG_KEEP_PER_SCRIPT: int = 20
+
+    # Process telemetry
+    TELEMETRY_INTERVAL_SECONDS: int = 5
+    TELEMETRY_SAMPLES: int = 120
+
+    # Script index
+    SCAN_RECHECK_SECONDS: int = 60
+    SCAN_WATCHER: bool = True
+    SCAN_SNAPSHOT: bool = True
+
+    # Catch-up
+    RUN_JOURNAL: bool = True
+    RUN_JOURNAL_RETENTION_DAYS: int = 14
+    CATCHUP_RATE_PER_MINUTE: int = 10
+
+    # Top-of-hour smoothing
+    SPREAD_MODE: str = "off"
+    SPREAD_WINDOW_MINUTES: int = 10
+
+    # Job store
+    JOBSTORE_PERSISTENT: bool = False
+    MISFIRE_GRACE_SECONDS: int = 3600
+
+    # Persistent queue
+    QUEUE_PERSISTENT: bool = False
+    QUEUE_SYNC_MS: int = 200
+
+    # Execution history
+    HISTORY: bool = True
+
+    # Dispatch order
+    DISPATCH_POLICY: str = "fifo"
+    DISPATCH_AGING: float = 1.0
+    DISPATCH_DEFAULT_SECONDS: float = 60.0
 
     # Server
     FRONTEND: bool = True
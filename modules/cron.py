@@ -0,0 +1,82 @@
+from apscheduler.triggers.base import BaseTrigger
+from apscheduler.triggers.combining import OrTrigger
+from apscheduler.triggers.cron import CronTrigger
+
+# Schedule expressions accepted in cron_schedule / horario:
+#   "7,19"               → legacy list of whole hours (fires at HH:00)
+#   "*/15 8-18 * * 1-5"  → standard 5-field crontab: minute hour day month weekday
+# Weekday numbers follow crontab (0 or 7 = Sunday); names (mon-fri) are accepted too.
+
+_DOW_NAMES = ["sun", "mon", "tue", "wed", "thu", "fri", "sat", "sun"]
+
+
+def expandir_campo(spec: str, lo: int, hi: int) -> list[int]:
+    """Expands a numeric cron field ("*", "a-b", "*/n", "a-b/n", "a,b") into its values."""
+    values: set[int] = set()
+    for part in spec.split(","):
+        rng, _, step_raw = part.partition("/")
+        step = int(step_raw) if step_raw else 1
+        if step < 1:
+            raise ValueError(f"invalid step in '{part}'")
+        if rng == "*":
+            start, end = lo, hi
+        elif "-" in rng:
+            start, end = (int(x) for x in rng.split("-", 1))
+        else:
+            start = int(rng)
+            end = hi if step_raw else start
+        if not (lo <= start <= end <= hi):
+            raise ValueError(f"'{part}' out of range {lo}-{hi}")
+        values.update(range(start, end + 1, step))
+    return sorted(values)
+
+
+def _day_of_week(spec: str) -> str:
+    """Crontab weekday field → APScheduler's (which numbers Monday as 0)."""
+    if spec == "*" or any(c.isalpha() for c in spec):
+        return spec
+    days = {_DOW_NAMES[d] for d in expandir_campo(spec, 0, 7)}
+    return ",".join(name for name in _DOW_NAMES[:7] if name in days)
+
+
+def de_horas(hours: list[int]) -> str:
+    """Legacy hour list → equivalent crontab string ("" if no hours)."""
+    return f"0 {','.join(map(str, hours))} * * *" if hours else ""
+
+
+def normalizar(raw: str) -> str:
+    """Validates a 5-field crontab expression and returns it whitespace-normalized. Raises ValueError."""
+    fields = str(raw).split()
+    if len(fields) != 5:
+        raise ValueError("expected 5 fields: minute hour day month weekday")
+    expr = " ".join(fields)
+    criar_trigger(expr, "UTC")
+    return expr
+
+
+def horas(expr: str) -> list[int]:
+    """Hours of the day an expression can fire in."""
+    return expandir_campo(expr.split()[1], 0, 23)
+
+
+def criar_trigger(expr: str, timezone, offsets: dict[int, int] | None = None) -> BaseTrigger:
+    """
+    One trigger for a whole expression. `offsets` ({hour: seconds}) shifts
+    top-of-hour fires (minute field "0") by a per-hour offset; hours sharing
+    an offset share a CronTrigger and the groups are OR-ed together.
+    """
+    minute, hour, day, month, dow = expr.split()
+    dow = _day_of_week(dow)
+    if not offsets or minute != "0":
+        return CronTrigger(minute=minute, hour=hour, day=day, month=month, day_of_week=dow, timezone=timezone)
+    groups: dict[int, list[int]] = {}
+    for h in horas(expr):
+        groups.setdefault(offsets.get(h, 0), []).append(h)
+    triggers = [
+        CronTrigger(
+            minute=offset // 60, second=offset % 60, hour=",".join(map(str, hs)),
+            day=day, month=month, day_of_week=dow, timezone=timezone,
+        )
+        for offset, hs in sorted(groups.items())
+    ]
+    return triggers[0] if len(triggers) == 1 else OrTrigger(triggers)
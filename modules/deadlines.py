@@ -0,0 +1,98 @@
+import heapq
+import itertools
+import threading
+import time
+from modules import launcher
+from modules.config import config
+
+# Wall-clock timeouts of running scripts, enforced by ONE thread sleeping on a
+# heap of deadlines (no watcher thread per process). At a run's deadline its
+# process tree gets SIGTERM; TIMEOUT_KILL_GRACE_SECONDS later whatever is still
+# alive gets SIGKILL. Heap entries of runs that already ended are skipped —
+# except a SIGKILL still owed to a timed-out run whose script exited but whose
+# process group (children that ignored SIGTERM) lives on.
+
+_heap: list[tuple[float, int, str]] = []   # (due, seq, run_id)
+_armed: dict[str, dict] = {}               # run_id → {pid, label, due, stage, ended}
+_seq = itertools.count()
+_cond = threading.Condition(threading.Lock())
+_thread: threading.Thread | None = None
+_timeouts = 0
+_escalations = 0
+
+
+def _push(run_id: str, due: float) -> None:
+    heapq.heappush(_heap, (due, next(_seq), run_id))
+    _cond.notify()
+
+
+def agendar(run_id: str, pid: int, timeout_seconds: float, label: str) -> None:
+    """Arms a wall-clock deadline `timeout_seconds` from now for the run's process tree."""
+    global _thread
+    with _cond:
+        if _thread is None:
+            _thread = threading.Thread(target=_loop, daemon=True, name="deadline-watchdog")
+            _thread.start()
+        due = time.monotonic() + timeout_seconds
+        _armed[run_id] = {"pid": pid, "label": label, "due": due, "stage": "armed", "timeout": timeout_seconds,
+                          "ended": False}
+        _push(run_id, due)
+
+
+def concluir(run_id: str) -> bool:
+    """Disarms a finished run. Returns True if its deadline had fired (the run timed out)."""
+    with _cond:
+        entry = _armed.get(run_id)
+        if entry is None:
+            return False
+        if entry["stage"] == "terminating":
+            entry["ended"] = True  # keeps the pending SIGKILL for what is left of the group
+        else:
+            del _armed[run_id]
+    return entry["stage"] != "armed"
+
+
+def _loop() -> None:
+    global _timeouts, _escalations
+    while True:
+        with _cond:
+            while not _heap or _heap[0][0] > time.monotonic():
+                _cond.wait(None if not _heap else _heap[0][0] - time.monotonic())
+            due, _, run_id = heapq.heappop(_heap)
+            entry = _armed.get(run_id)
+            if entry is None or entry["due"] != due:
+                continue
+            if entry["stage"] == "armed":
+                entry["stage"] = "terminating"
+                _timeouts += 1
+                entry["due"] = time.monotonic() + max(0, config.TIMEOUT_KILL_GRACE_SECONDS)
+                _push(run_id, entry["due"])
+                kill = False
+            else:
+                entry["stage"] = "killed"
+                if entry["ended"]:
+                    del _armed[run_id]
+                    if not launcher.grupo_vivo(entry["pid"]):
+                        continue
+                _escalations += 1
+                kill = True
+            pid, label, timeout = entry["pid"], entry["label"], entry["timeout"]
+        if kill:
+            print(f"[TIMEOUT] {label} (PID {pid}) ignored SIGTERM — sending SIGKILL.")
+        else:
+            print(f"[TIMEOUT] {label} (PID {pid}) exceeded {timeout:g}s — sending SIGTERM.")
+        try:
+            launcher.sinalizar(pid, kill)
+        except Exception as exc:
+            print(f"[WARN] Timeout signal to PID {pid} failed: {exc}")
+
+
+def estatisticas() -> dict:
+    with _cond:
+        now = time.monotonic()
+        return {
+            "armed": sum(not e["ended"] for e in _armed.values()),
+            "next_due_in_seconds": round(min(e["due"] for e in _armed.values()) - now, 1) if _armed else None,
+            "timeouts": _timeouts,
+            "sigkill_escalations": _escalations,
+        }
@@ -0,0 +1,181 @@
+import heapq
+import threading
+import time
+from collections import deque
+from modules import history, run_journal
+from modules.config import config
+
+# Dispatch order of the run queue.
+# "fifo" runs by scheduled timestamp (the original behaviour). "sjf" favours
+# scripts expected to finish quickly, with aging against starvation:
+#
+#     key = predicted_duration + DISPATCH_AGING × scheduled_timestamp
+#
+# A job's key is fixed when it is enqueued, so the queue stays a plain heap;
+# relative to later arrivals a waiting job gains DISPATCH_AGING seconds of
+# "shortness" per second waited, i.e. a job predicted at P seconds is passed
+# by newcomers for at most about P / DISPATCH_AGING seconds.
+#
+# Predictions are per-script moving averages (EWMA of completed runs), seeded
+# from the execution history's median, or the run journal's mean.
+
+_EWMA_ALPHA = 0.3
+_MAX_WAITS = 2000
+_REPLAY_RUNS = 500
+
+_predicted: dict[str, float] | None = None
+_waits: deque = deque(maxlen=_MAX_WAITS)
+_lock = threading.Lock()
+
+
+def _seeds() -> dict[str, float]:
+    seeds = {}
+    try:
+        seeds.update(run_journal.duracoes_medias())
+        seeds.update({s["script_name"]: s["p50_duration"] for s in history.estatisticas()
+                      if s["p50_duration"] is not None})
+    except Exception as exc:
+        print(f"[WARN] Dispatch could not seed duration predictions: {exc}")
+    return seeds
+
+
+def _predictions() -> dict[str, float]:
+    global _predicted
+    if _predicted is None:
+        seeds = _seeds()
+        with _lock:
+            if _predicted is None:
+                _predicted = seeds
+    return _predicted
+
+
+def prever(script_name: str) -> float:
+    """Expected duration in seconds (DISPATCH_DEFAULT_SECONDS when never seen)."""
+    return _predictions().get(script_name, config.DISPATCH_DEFAULT_SECONDS)
+
+
+def _key(policy: str, scheduled_timestamp: float, predicted: float) -> float:
+    if policy == "sjf":
+        return predicted + config.DISPATCH_AGING * scheduled_timestamp
+    return scheduled_timestamp
+
+
+def prioridade(script_name: str, scheduled_timestamp: float) -> tuple[float, float]:
+    """(queue priority, predicted seconds) of a run under DISPATCH_POLICY."""
+    predicted = prever(script_name)
+    return _key(config.DISPATCH_POLICY, scheduled_timestamp, predicted), predicted
+
+
+def registrar_execucao(script_name: str, queued_at: float, started_at: float, duration: float | None) -> None:
+    """Feeds one run's queue wait and (when it finished) duration back into the predictor."""
+    predictions = _predictions()
+    with _lock:
+        _waits.append(max(0.0, started_at - queued_at))
+        if duration is not None:
+            previous = predictions.get(script_name)
+            predictions[script_name] = duration if previous is None else (
+                _EWMA_ALPHA * duration + (1 - _EWMA_ALPHA) * previous
+            )
+
+
+def simular(jobs: list[dict], capacity: int, policy: str) -> dict:
+    """
+    Non-preemptive replay of `jobs` ({arrival, duration, predicted, weight,
+    optional scheduled}) on `capacity` initially free weighted slots: at every
+    start/finish the best-keyed arrived job starts if it fits, and nothing
+    passes it otherwise (as in the queue).
+    Returns mean/max queue wait and makespan in seconds.
+    """
+    if not jobs:
+        return {"policy": policy, "jobs": 0, "mean_wait": None, "max_wait": None, "makespan": None}
+    pending = sorted(jobs, key=lambda j: j["arrival"])
+    ready: list[tuple[float, int, dict]] = []
+    finishing: list[tuple[float, int]] = []
+    free, now, i, waits, end = capacity, pending[0]["arrival"], 0, [], pending[0]["arrival"]
+    while i < len(pending) or ready:
+        while i < len(pending) and pending[i]["arrival"] <= now:
+            job = pending[i]
+            heapq.heappush(ready, (_key(policy, job.get("scheduled", job["arrival"]), job["predicted"]), i, job))
+            i += 1
+        while ready and min(ready[0][2]["weight"], capacity) <= free:
+            _, _, job = heapq.heappop(ready)
+            weight = min(job["weight"], capacity)
+            free -= weight
+            waits.append(now - job["arrival"])
+            heapq.heappush(finishing, (now + job["duration"], weight))
+            end = max(end, now + job["duration"])
+        next_arrival = pending[i]["arrival"] if i < len(pending) else None
+        if finishing and (next_arrival is None or finishing[0][0] <= next_arrival):
+            now, weight = heapq.heappop(finishing)
+            free += weight
+        elif next_arrival is not None:
+            now = next_arrival
+        else:
+            break
+    return {
+        "policy": policy,
+        "jobs": len(waits),
+        "mean_wait": round(sum(waits) / len(waits), 1),
+        "max_wait": round(max(waits), 1),
+        "makespan": round(end - pending[0]["arrival"], 1),
+    }
+
+
+def estimar_inicios(tasks: list[dict], running: list[tuple[float, int]], capacity: int,
+                    now: float | None = None) -> list[float]:
+    """
+    Estimated start time of each queued task (given in projected dispatch
+    order) from predicted durations: `running` holds (predicted seconds left,
+    weight) of the runs holding slots. Area/class caps are ignored.
+    """
+    now = time.time() if now is None else now
+    finishing = [(now + max(0.0, left), min(weight, capacity)) for left, weight in running]
+    heapq.heapify(finishing)
+    free = capacity - sum(weight for _, weight in finishing)
+    clock, starts = now, []
+    for task in tasks:
+        weight = min(max(1, task.get("slot_weight", 1)), capacity)
+        while free < weight and finishing:
+            clock, released = heapq.heappop(finishing)
+            free += released
+        clock = max(clock, now)
+        starts.append(clock)
+        free -= weight
+        heapq.heappush(finishing, (clock + prever(task["script_name"]), weight))
+    return starts
+
+
+def relatorio(queued: list[dict], capacity: int) -> dict:
+    """
+    Active policy, observed waits, and both policies simulated on (a) the runs
+    waiting in the queue right now (durations = predictions, slots free) and
+    (b) a replay of the last recorded runs (actual arrivals and durations).
+    """
+    with _lock:
+        waits = list(_waits)
+    now = time.time()
+    current = [
+        {"arrival": now, "scheduled": t["scheduled_timestamp"], "duration": prever(t["script_name"]),
+         "predicted": prever(t["script_name"]), "weight": t.get("slot_weight", 1)}
+        for t in queued
+    ]
+    predictions = _predictions()
+    with _lock:
+        predictions = dict(sorted(predictions.items()))
+    recent = [
+        {"arrival": r["queued_at"], "duration": r["duration"], "predicted": prever(r["script_name"]), "weight": 1}
+        for r in history.listar(limit=_REPLAY_RUNS)["items"]
+        if r["queued_at"] is not None and r["duration"] is not None
+    ]
+    return {
+        "policy": config.DISPATCH_POLICY,
+        "aging": config.DISPATCH_AGING,
+        "observed": {
+            "runs": len(waits),
+            "mean_wait": round(sum(waits) / len(waits), 1) if waits else None,
+            "max_wait": round(max(waits), 1) if waits else None,
+        },
+        "queue": {policy: simular(current, capacity, policy) for policy in ("fifo", "sjf")},
+        "replay": {policy: simular(recent, capacity, policy) for policy in ("fifo", "sjf")},
+        "predictions": predictions,
+    }
@@ -1,25 +1,39 @@
-import subprocess
-import sys
+import os
 import time
 import threading
+import uuid
+from collections import deque
 from pathlib import Path
-from queue import PriorityQueue
-import psutil
 from modules.config import config
+from modules import (
+    deadlines, dispatch, history, launcher, queue_store, registry, retries, run_journal, run_logs, telemetry,
+)
+from modules.adaptive import AdaptiveController
+from modules.slots import SlotLedger
+from modules.task_queue import LANE_ORDER, IndexedTaskQueue
 
 # ── Shared state (all protected by locks or atomic Python GIL semantics) ──────
-execution_semaphore = threading.Semaphore(config.MAX_PROCESSOS_SIMULTANEOS)
-task_queue: PriorityQueue = PriorityQueue()
+slot_ledger = SlotLedger(
+    config.MAX_PROCESSOS_SIMULTANEOS, config.AREA_LIMITS, config.RESOURCE_CLASS_LIMITS, config.LANE_RESERVED_SLOTS,
+)
+task_queue = IndexedTaskQueue(config.LANE_WEIGHTS)
 running_processes: dict[int, dict] = {}   # {pid: process_info}
 is_workflow_active: bool = False
+_shutting_down: bool = False  # set by graceful_shutdown: nothing new is dispatched or launched
+_launching = 0                # runs between the shutdown check and running_processes (under _running_lock)
 _start_time = time.time()
 
 _running_lock = threading.Lock()
+_SHUTDOWN_KILL_WAIT_SECONDS = 3.0
+
+# (expected_start, actual_start) of recent runs that had a planned start time
+start_skew: deque = deque(maxlen=2000)
 
 
 def set_workflow_state(active: bool) -> None:
     global is_workflow_active
     is_workflow_active = active
+    task_queue.notificar()
     print(f"[WORKFLOW] Queue {'FROZEN' if active else 'RESUMED'}.")
 
 
@@ -30,110 +44,272 @@ def enqueue_script(
     scheduled_timestamp: float,
     is_workflow_item: bool = False,
     trigger_reason: str = "scheduled",
+    slots: list[float] | None = None,
+    expected_start: float | None = None,
+    attempt: int = 0,
 ) -> bool:
     """
-    Thread-safe enqueue with deduplication.
+    Thread-safe enqueue with deduplication (atomic check-and-insert on the
+    queue's name index, against both queued and running scripts).
+    `slots` are the scheduled slot timestamps this run covers (see run_journal);
+    a duplicate of an already-queued script hands its slots to the queued run.
+    `expected_start` is the planned fire time, used for start-skew stats.
+    The run's area (for AREA_LIMITS), slot weight and resource class come from
+    the registry row, `area_name` only standing in for unregistered scripts; its
+    queue priority from DISPATCH_POLICY (see dispatch). It waits in the lane
+    named by `trigger_reason` (manual, retry, scheduled, catchup); `attempt`
+    counts retries of a failed run (0 = first run).
     Returns True if enqueued, False if duplicate.
     """
-    # Check running
-    with _running_lock:
-        if any(d["script_name"] == script_name for d in running_processes.values()):
-            print(f"[DUP] Already running: {script_name}")
-            return False
+    profile = registry.obter_script(script_name) or {}
+    priority, predicted = dispatch.prioridade(script_name, scheduled_timestamp)
+    lane = trigger_reason if trigger_reason in LANE_ORDER else "scheduled"
 
-    # Check queue (snapshot iteration — PriorityQueue.queue is a list)
-    for _, _, task in list(task_queue.queue):
-        if task["script_name"] == script_name:
-            print(f"[DUP] Already queued: {script_name}")
-            return False
+    def merge_slots(task: dict) -> None:
+        if slots:
+            task["slots"] = sorted(set(task["slots"]) | set(slots))
+            queue_store.atualizado(script_name, task)
 
-    task_queue.put((scheduled_timestamp, time.time(), {
+    task = {
         "script_name": script_name,
         "path": script_path,
-        "area_name": area_name,
+        "area_name": profile.get("area_name") or area_name,
         "scheduled_timestamp": scheduled_timestamp,
         "is_workflow_item": is_workflow_item,
         "trigger_reason": trigger_reason,
-    }))
-    print(f"[QUEUE] Enqueued: {script_name} | priority={scheduled_timestamp:.0f} | reason={trigger_reason}")
+        "slots": list(slots or []),
+        "expected_start": expected_start,
+        "slot_weight": profile.get("slot_weight", 1),
+        "resource_class": profile.get("resource_class", "default"),
+        "predicted_duration": predicted,
+        "timeout_seconds": profile.get("timeout_seconds") or config.DEFAULT_TIMEOUT_SECONDS or None,
+        "limits": limites(profile),
+        "lane": lane,
+        "attempt": attempt,
+        "queued_at": time.time(),
+    }
+    outcome = task_queue.put_if_absent(
+        script_name, priority, task, on_duplicate=merge_slots, lane=lane,
+        on_enqueue=lambda t: queue_store.enfileirado(script_name, priority, lane, t),
+    )
+    if outcome != "enqueued":
+        print(f"[DUP] Already {outcome}: {script_name}")
+        return False
+    print(f"[QUEUE] Enqueued: {script_name} | priority={priority:.0f} | reason={trigger_reason}")
     return True
 
 
+def limites(profile: dict) -> dict:
+    """rlimits of a registry row for launcher.iniciar_processo."""
+    return {"memory_mb": profile.get("memory_limit_mb"), "cpu_seconds": profile.get("cpu_limit_seconds")}
+
+
+def _agendar_retentativa(task_data: dict, outcome: str, exit_code: int | None) -> None:
+    """
+    Schedules the next attempt of a failed run per the script's registry retry
+    settings (max_retries, retry_backoff_seconds, retry_exit_codes). Timeouts
+    and CPU-limit kills are retryable; other signals (manual kill, shutdown) are not.
+    """
+    name = task_data["script_name"]
+    profile = registry.obter_script(name) or {}
+    max_retries = profile.get("max_retries")
+    max_retries = config.DEFAULT_MAX_RETRIES if max_retries is None else int(max_retries)
+    attempt = task_data["attempt"] + 1
+    codes = profile.get("retry_exit_codes") or []
+    if attempt > max_retries or outcome not in ("error", "timeout", "cpu_limit"):
+        return
+    if outcome == "error" and codes and exit_code not in codes:
+        return
+    delay = retries.atraso(attempt, profile.get("retry_backoff_seconds") or config.RETRY_BACKOFF_SECONDS)
+    retries.agendar(
+        name, attempt, delay,
+        lambda: enqueue_script(
+            name, str(task_data["path"]), task_data["area_name"], scheduled_timestamp=time.time(),
+            trigger_reason="retry", slots=task_data["slots"], attempt=attempt,
+        ),
+        reason=f"{outcome} (exit {exit_code})",
+    )
+    print(f"[RETRY] {name} attempt {attempt}/{max_retries} in {delay:.0f}s ({outcome}, exit={exit_code})")
+
+
 def _run_process(task_data: dict) -> None:
     """Worker thread: starts subprocess, waits for it, cleans up."""
     script_name = task_data["script_name"]
     raw_path = task_data["path"]
     script_path = Path(raw_path) if not hasattr(raw_path, "parent") else raw_path
 
-    print(f"[>] Starting: {script_name}")
+    attempt = f", attempt {task_data['attempt']}" if task_data["attempt"] else ""
+    print(f"[>] Starting: {script_name} (run {task_data['run_id']}{attempt})")
+    global _launching
+    with _running_lock:
+        abandoned = _shutting_down
+        if not abandoned:
+            _launching += 1
+    if abandoned:
+        # admitted just before shutdown: never started, so its queue-store row stays for the next boot
+        print(f"[SHUTDOWN] Not starting {script_name}: server is shutting down.")
+        task_queue.concluir(script_name)
+        slot_ledger.liberar(task_data["run_id"])
+        return
+    launching = True
     proc = None
+    failed: tuple[str, int | None] | None = None
+    run = {
+        "run_id": task_data["run_id"],
+        "script_name": script_name,
+        "area_name": task_data["area_name"],
+        "trigger_reason": task_data["trigger_reason"],
+        "is_workflow": int(task_data["is_workflow_item"]),
+        "queued_at": task_data["queued_at"],
+        "started_at": time.time(),
+    }
     try:
-        proc = subprocess.Popen(
-            [sys.executable, str(script_path)],
-            shell=False,
-            cwd=str(script_path.parent),
-        )
+        pipes = run_logs.abrir_captura(task_data["run_id"], script_name)
+        try:
+            proc = launcher.iniciar_processo(
+                script_path, stdout=pipes and pipes[0], stderr=pipes and pipes[1], limits=task_data["limits"],
+            )
+        finally:
+            for fd in pipes or ():
+                os.close(fd)
+        if task_data["timeout_seconds"]:
+            deadlines.agendar(task_data["run_id"], proc.pid, task_data["timeout_seconds"], script_name)
         with _running_lock:
             running_processes[proc.pid] = {
                 "pid": proc.pid,
+                "run_id": task_data["run_id"],
                 "proc_obj": proc,
                 "script_name": script_name,
                 "area_name": task_data["area_name"],
-                "start_time": time.time(),
+                "start_time": run["started_at"],
                 "is_workflow_item": task_data["is_workflow_item"],
                 "trigger_reason": task_data["trigger_reason"],
             }
+            _launching -= 1
+            launching = False
+        telemetry.registrar(proc.pid, task_data["run_id"], script_name)
+        run_journal.registrar_inicio(script_name, task_data["slots"])
+        if task_data["expected_start"] is not None:
+            start_skew.append((task_data["expected_start"], run["started_at"]))
 
         proc.wait()
-        tag = "[OK]" if proc.returncode == 0 else "[ERR]"
-        elapsed = round(time.time() - running_processes.get(proc.pid, {}).get("start_time", time.time()), 1)
-        print(f"{tag} {script_name} | exit={proc.returncode} | elapsed={elapsed}s")
+        timed_out = deadlines.concluir(task_data["run_id"])
+        peaks = telemetry.finalizar(proc.pid)
+        run_journal.registrar_conclusao(script_name, task_data["slots"], proc.returncode)
+        tag = "[TIMEOUT]" if timed_out else "[OK]" if proc.returncode == 0 else "[ERR]"
+        elapsed = round(time.time() - run["started_at"], 1)
+        peak = f" | peak_cpu={peaks['cpu_percent']}% peak_rss={peaks['rss_mb']}MB" if peaks and peaks["samples"] else ""
+        print(f"{tag} {script_name} | exit={proc.returncode} | elapsed={elapsed}s{peak}")
+        ended = time.time()
+        outcome = history.resultado(proc.returncode, timed_out)
+        dispatch.registrar_execucao(script_name, task_data["queued_at"], run["started_at"], ended - run["started_at"])
+        history.registrar({
+            **run, "ended_at": ended, "duration": ended - run["started_at"],
+            "exit_code": proc.returncode, "outcome": outcome,
+        }, peaks)
+        if outcome == "success":
+            retries.cancelar(script_name)
+        else:
+            failed = (outcome, proc.returncode)
 
     except Exception as exc:
         print(f"[CRIT] Failed to start {script_name}: {exc}")
+        history.registrar({**run, "ended_at": time.time(), "outcome": "launch_error"})
     finally:
-        if proc and proc.pid in running_processes:
-            with _running_lock:
+        deadlines.concluir(task_data["run_id"])
+        with _running_lock:
+            if launching:
+                _launching -= 1
+            if proc:
                 running_processes.pop(proc.pid, None)
-        execution_semaphore.release()
+        queue_store.concluido(script_name, task_data["run_id"])  # before concluir frees the name
+        task_queue.concluir(script_name)
+        slot_ledger.liberar(task_data["run_id"])
+        task_queue.notificar()
         print(f"[-] Slot released. (from: {script_name})")
+        if failed:
+            _agendar_retentativa(task_data, *failed)  # after concluir: the retry must not be a duplicate
 
 
-def _queue_processor() -> None:
-    """Daemon thread: drains the PriorityQueue respecting the semaphore."""
+def _admitir(task_data: dict) -> str:
+    """
+    Runs under the queue lock: reserves weighted slots for a candidate task.
+    A task blocked only by its area/resource-class cap or by another lane's
+    reserved slots is skipped so others can run; when global capacity is
+    short nothing may pass the queue head.
+    """
+    if is_workflow_active or _shutting_down:
+        return "wait"
+    run_id = uuid.uuid4().hex[:12]
+    blocked = slot_ledger.adquirir(
+        run_id, task_data["script_name"], task_data["slot_weight"],
+        task_data["area_name"], task_data["resource_class"], task_data["lane"],
+    )
+    if blocked is not None:
+        return "wait" if blocked == "global" else "skip"
+    task_data["run_id"] = run_id
+    return "admit"
+
+
+def _worker() -> None:
+    """
+    Long-lived pool worker. Sleeps on the queue's condition and wakes only on
+    enqueue, slot release or freeze/unfreeze; the slot is reserved atomically
+    with the dequeue and released exactly once by _run_process.
+    """
     while True:
-        if is_workflow_active:
-            time.sleep(0.5)
+        _, task_data = task_queue.get(admitir=_admitir)
+        queue_store.despachado(task_data["script_name"], task_data["run_id"])
+        _run_process(task_data)
+
+
+def restaurar_fila() -> int:
+    """
+    Puts back the runs the persistent queue store (QUEUE_PERSISTENT) still
+    holds from the previous process — queued ones and those that were in
+    flight — with their original priority, lane and trigger reason.
+    Returns how many were restored.
+    """
+    restored = 0
+    for row in queue_store.restaurar():
+        task = row["task"]
+        task.pop("run_id", None)
+        task.setdefault("attempt", 0)
+        if not Path(task["path"]).exists():
+            print(f"[WARN] Not restoring {row['script_name']}: {task['path']} no longer exists.")
+            queue_store.concluido(row["script_name"])
+            continue
+        outcome = task_queue.put_if_absent(
+            row["script_name"], row["priority"], task, lane=row["lane"],
+            on_enqueue=lambda t: queue_store.enfileirado(row["script_name"], row["priority"], row["lane"], t),
+        )
+        if outcome != "enqueued":
             continue
-        _, _, task_data = task_queue.get()
-        execution_semaphore.acquire()   # blocks until a slot is free
-        t = threading.Thread(target=_run_process, args=(task_data,), daemon=True)
-        t.start()
-        task_queue.task_done()
+        restored += 1
+        print(f"[QUEUE] Restored ({row['state']}): {row['script_name']} | lane={row['lane']} "
+              f"| reason={task['trigger_reason']}")
+    if restored:
+        print(f"[BOOT] {restored} run(s) restored from the persistent queue.")
+    return restored
 
 
 def kill_process(pid: int) -> bool:
-    """Kill a specific PID and all its child processes."""
+    """
+    Kill a specific PID and its whole process group (see launcher.sinalizar).
+    The slot is given back by the worker reaping the process, not here.
+    """
     with _running_lock:
         info = running_processes.get(pid)
     if not info:
         return False
     try:
-        parent = psutil.Process(pid)
-        children = parent.children(recursive=True)
-        for child in children:
-            try: child.kill()
-            except psutil.NoSuchProcess: pass
-        parent.kill()
+        launcher.sinalizar(pid, kill=True)
         print(f"[KILL] {info['script_name']} (PID {pid}) terminated.")
-    except psutil.NoSuchProcess:
-        pass
     except Exception as exc:
         print(f"[WARN] Error killing PID {pid}: {exc}")
     finally:
         with _running_lock:
             running_processes.pop(pid, None)
-        execution_semaphore.release()
     return True
 
 
@@ -149,19 +325,93 @@ def kill_all_regular_processes() -> list[str]:
     return killed
 
 
-def graceful_shutdown() -> None:
-    print("[SHUTDOWN] Killing all child processes...")
+def graceful_shutdown() -> list[dict]:
+    """
+    SIGTERM to every running process group at once, then one shared wait of at
+    most SHUTDOWN_TIMEOUT_SECONDS; survivors get SIGKILL. Returns (and prints)
+    how each run ended and how long it took.
+    """
+    global _shutting_down
     with _running_lock:
-        all_pids = list(running_processes.keys())
-    for pid in all_pids:
-        kill_process(pid)
-    print("[SHUTDOWN] Done.")
+        _shutting_down = True  # before any signal: no admission, no launch from here on
+    queue_store.encerrar()  # queued and in-flight runs stay persisted for the next boot
+    settle = time.monotonic() + _SHUTDOWN_KILL_WAIT_SECONDS
+    while True:
+        # runs already past the launch check are about to appear in running_processes: wait for them
+        with _running_lock:
+            if _launching == 0 or time.monotonic() > settle:
+                targets = list(running_processes.values())
+                break
+        time.sleep(0.01)
+    print(f"[SHUTDOWN] Terminating {len(targets)} running process group(s)...")
+    started = time.monotonic()
+    for info in targets:
+        try:
+            launcher.sinalizar(info["pid"])
+        except Exception as exc:
+            print(f"[WARN] SIGTERM to PID {info['pid']} failed: {exc}")
+
+    report, pending = [], list(targets)
+    kill_at = started + max(0, config.SHUTDOWN_TIMEOUT_SECONDS)
+    give_up = kill_at + _SHUTDOWN_KILL_WAIT_SECONDS
+    killed = False
+    while pending:
+        now = time.monotonic()
+        if not killed and now >= kill_at:
+            for info in pending:
+                print(f"[SHUTDOWN] {info['script_name']} (PID {info['pid']}) still running — SIGKILL.")
+                try:
+                    launcher.sinalizar(info["pid"], kill=True)
+                except Exception as exc:
+                    print(f"[WARN] SIGKILL to PID {info['pid']} failed: {exc}")
+            killed = True
+        for info in pending:
+            info["proc_obj"].poll()  # reaps an exited leader, which would otherwise keep its group "alive"
+        # a run is over when its whole group is gone, not just the script it launched
+        for info in [i for i in pending if not launcher.grupo_vivo(i["pid"])]:
+            pending.remove(info)
+            report.append({
+                "script_name": info["script_name"], "pid": info["pid"], "run_id": info.get("run_id"),
+                "signal": "SIGKILL" if killed else "SIGTERM", "seconds": round(now - started, 2),
+            })
+        if pending and now >= give_up:
+            report += [{"script_name": i["script_name"], "pid": i["pid"], "run_id": i.get("run_id"),
+                        "signal": "unreaped", "seconds": None} for i in pending]
+            break
+        if pending:
+            time.sleep(0.05)
+
+    for entry in report:
+        print(f"[SHUTDOWN]   {entry['script_name']} (PID {entry['pid']}): {entry['signal']} "
+              f"{'' if entry['seconds'] is None else str(entry['seconds']) + 's'}")
+    launcher.encerrar()
+    history.encerrar()
+    print(f"[SHUTDOWN] Done in {time.monotonic() - started:.1f}s.")
+    return report
+
+
+def _pids_em_execucao() -> set[int]:
+    with _running_lock:
+        return set(running_processes)
 
 
 def get_uptime_seconds() -> float:
     return round(time.time() - _start_time, 1)
 
 
-# Start the queue processor daemon thread at module import time
-_queue_thread = threading.Thread(target=_queue_processor, daemon=True, name="queue-processor")
-_queue_thread.start()
+# Resource telemetry sampler for everything in running_processes
+telemetry.iniciar(_pids_em_execucao)
+
+# Adaptive concurrency (optional): resizes slot_ledger from host load
+controlador: AdaptiveController | None = None
+if config.ADAPTIVE_CONCURRENCY:
+    controlador = AdaptiveController(slot_ledger, demand=lambda: task_queue.qsize() > 0, on_change=task_queue.notificar)
+    controlador.iniciar()
+
+# Start the dispatcher's worker pool at module import time (one worker per slot, at the largest capacity)
+_workers = [
+    threading.Thread(target=_worker, daemon=True, name=f"queue-worker-{i}")
+    for i in range(controlador.max_slots if controlador else slot_ledger.capacity)
+]
+for _w in _workers:
+    _w.start()
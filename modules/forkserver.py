@@ -0,0 +1,209 @@
+"""
+Warm-interpreter fork server (POSIX only). Started by modules/launcher.py as
+
+    python forkserver.py <socket_path> [module ...]
+
+It imports the preload modules once, then serves launch requests on a Unix
+socket. Every request forks a fresh child that runs one script via runpy, so
+the child starts with the preloaded imports already in memory.
+
+Protocol (one connection per launch, newline-delimited JSON):
+    client → {"path": ..., "cwd": ..., "limits": {...} | null} with stdin/stdout/stderr fds attached
+    server → {"pid": N}            once the child is forked
+    server → {"exit": code}        when the child is reaped (Popen returncode semantics)
+    server → {"error": "..."}      instead of "pid" if the launch failed
+
+Standalone on purpose: it must not import the server's modules (or their
+threads) before forking. It exits when its stdin (a pipe held by the
+server) reaches EOF, i.e. when the server goes away.
+
+Also the exec wrapper of the launcher's subprocess mode for scripts with
+rlimits (no preexec_fn in the threaded server):
+
+    python forkserver.py --exec '<limits json>' <script_path>
+
+applies the limits to itself, then execs the script in the same process.
+"""
+import atexit
+import json
+import os
+import resource
+import selectors
+import signal
+import socket
+import sys
+import traceback
+
+
+def aplicar_limites(limits: dict | None) -> None:
+    """
+    Applies a script's rlimits in the child before it runs (also used by the
+    launcher's subprocess mode): memory_mb caps the address space, cpu_seconds
+    the CPU time (SIGXCPU at the limit, SIGKILL 5 s of CPU later).
+    """
+    if not limits:
+        return
+    if limits.get("memory_mb"):
+        size = int(limits["memory_mb"] * 1024 * 1024)
+        resource.setrlimit(resource.RLIMIT_AS, (size, size))
+    if limits.get("cpu_seconds"):
+        soft = max(1, int(limits["cpu_seconds"]))
+        resource.setrlimit(resource.RLIMIT_CPU, (soft, soft + 5))
+
+
+def _run_child(request: dict, fds: list[int], inherited: list[socket.socket]) -> None:
+    """In the forked child: becomes the script process. Never returns."""
+    code = 1
+    try:
+        signal.set_wakeup_fd(-1)
+        signal.signal(signal.SIGCHLD, signal.SIG_DFL)
+        os.setsid()  # own session/process group, signalled as a whole by the launcher
+        for sock in inherited:
+            sock.close()
+        for target, fd in enumerate(fds[:3]):
+            os.dup2(fd, target)
+        for fd in fds:
+            if fd > 2:
+                os.close(fd)
+        aplicar_limites(request.get("limits"))
+        path = request["path"]
+        os.chdir(request["cwd"])
+        sys.argv = [path]
+        sys.path[0] = os.path.dirname(os.path.abspath(path))
+
+        import runpy
+        try:
+            runpy.run_path(path, run_name="__main__")
+            code = 0
+        except SystemExit as exc:
+            if exc.code is None:
+                code = 0
+            elif isinstance(exc.code, int):
+                code = exc.code
+            else:
+                print(exc.code, file=sys.stderr)
+                code = 1
+    except BaseException:
+        traceback.print_exc()
+        code = 1
+    finally:
+        try:
+            _finalizar_interpretador()
+        finally:
+            os._exit(code & 0xFF)
+
+
+def _finalizar_interpretador() -> None:
+    """
+    What a normal interpreter exit does before os._exit skips it: join the
+    script's non-daemon threads, run its atexit handlers, flush the streams.
+    """
+    threading = sys.modules.get("threading")
+    if threading is not None:
+        try:
+            threading._shutdown()
+        except BaseException:
+            traceback.print_exc()
+    try:
+        atexit._run_exitfuncs()
+    finally:
+        sys.stdout.flush()
+        sys.stderr.flush()
+
+
+def _send(conn: socket.socket, message: dict) -> None:
+    try:
+        conn.sendall(json.dumps(message).encode() + b"\n")
+    except OSError:
+        pass
+
+
+def main(socket_path: str, preload: list[str]) -> None:
+    for name in preload:
+        try:
+            __import__(name)
+        except Exception as exc:
+            print(f"[FORKSERVER] Preload of '{name}' failed: {exc}", file=sys.stderr)
+
+    # bound under a temporary name and renamed once listening: the path existing means "ready"
+    listener = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    listener.bind(socket_path + ".tmp")
+    listener.listen(64)
+    os.rename(socket_path + ".tmp", socket_path)
+
+    # SIGCHLD wakes the selector through a socketpair so exits are reported immediately
+    wake_r, wake_w = socket.socketpair()
+    wake_r.setblocking(False)
+    wake_w.setblocking(False)
+    signal.set_wakeup_fd(wake_w.fileno())
+    signal.signal(signal.SIGCHLD, lambda *_: None)
+
+    sel = selectors.DefaultSelector()
+    sel.register(listener, selectors.EVENT_READ, "accept")
+    sel.register(wake_r, selectors.EVENT_READ, "wake")
+    sel.register(sys.stdin, selectors.EVENT_READ, "parent")
+    children: dict[int, socket.socket] = {}
+
+    while True:
+        for key, _ in sel.select(timeout=1.0):
+            if key.data == "accept":
+                conn, _ = listener.accept()
+                sel.register(conn, selectors.EVENT_READ, "request")
+            elif key.data == "parent":
+                if not os.read(sys.stdin.fileno(), 512):
+                    return
+            elif key.data == "wake":
+                try:
+                    while wake_r.recv(512):
+                        pass
+                except BlockingIOError:
+                    pass
+            else:
+                conn = key.fileobj
+                sel.unregister(conn)
+                try:
+                    data, fds, _, _ = socket.recv_fds(conn, 65536, 3)
+                    request = json.loads(data)
+                except Exception as exc:
+                    _send(conn, {"error": f"bad request: {exc}"})
+                    conn.close()
+                    continue
+                sys.stdout.flush()
+                sys.stderr.flush()
+                try:
+                    pid = os.fork()
+                except OSError as exc:
+                    _send(conn, {"error": f"fork failed: {exc}"})
+                    conn.close()
+                    pid = None
+                if pid == 0:
+                    _run_child(request, fds, [listener, wake_r, wake_w, conn, *children.values()])
+                for fd in fds:
+                    os.close(fd)
+                if pid:
+                    children[pid] = conn
+                    _send(conn, {"pid": pid})
+
+        while children:
+            try:
+                pid, status = os.waitpid(-1, os.WNOHANG)
+            except ChildProcessError:
+                break
+            if pid == 0:
+                break
+            conn = children.pop(pid, None)
+            if conn is not None:
+                _send(conn, {"exit": os.waitstatus_to_exitcode(status)})
+                conn.close()
+
+
+def exec_com_limites(limits: dict, path: str) -> None:
+    """Applies `limits`, then replaces this process with `python path` (same pid and process group)."""
+    aplicar_limites(limits)
+    os.execv(sys.executable, [sys.executable, path])
+
+
+if __name__ == "__main__":
+    if sys.argv[1] == "--exec":
+        exec_com_limites(json.loads(sys.argv[2]), sys.argv[3])
+    main(sys.argv[1], sys.argv[2:])
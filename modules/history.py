@@ -0,0 +1,246 @@
+import json
+import math
+import queue
+import signal
+import sqlite3
+import threading
+import time
+from datetime import datetime
+from modules.config import config
+
+# Execution history in SQLite (DIRETORIO_DADOS/history.db, WAL).
+# Runs are handed to one writer thread and inserted in batches, so the
+# executor never waits on disk. Besides the raw `runs` table, the writer keeps
+# a per-script daily rollup with a log-scale duration histogram: percentile
+# and failure-rate queries read days × buckets rows, not millions of runs.
+
+_path = config.DIRETORIO_DADOS / "history.db"
+_FLUSH_SECONDS = 1.0
+_MAX_BATCH = 500
+_BUCKET_BASE = math.log(1.1)   # ~5% relative error on reported percentiles
+
+_COLUMNS = (
+    "run_id", "script_name", "area_name", "trigger_reason", "is_workflow",
+    "queued_at", "started_at", "ended_at", "duration", "exit_code", "outcome",
+    "peak_cpu_percent", "peak_rss_mb", "read_mb", "write_mb", "peak_children",
+)
+
+_pending: "queue.SimpleQueue[dict | None]" = queue.SimpleQueue()
+_conn: sqlite3.Connection | None = None
+_writer: threading.Thread | None = None
+_lock = threading.Lock()
+_db_lock = threading.Lock()
+
+
+def _db() -> sqlite3.Connection:
+    global _conn
+    if _conn is None:
+        _path.parent.mkdir(parents=True, exist_ok=True)
+        conn = sqlite3.connect(str(_path), check_same_thread=False, isolation_level=None)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        conn.execute(
+            "CREATE TABLE IF NOT EXISTS runs ("
+            " id INTEGER PRIMARY KEY,"
+            " run_id TEXT, script_name TEXT NOT NULL, area_name TEXT, trigger_reason TEXT, is_workflow INTEGER,"
+            " queued_at REAL, started_at REAL, ended_at REAL, duration REAL, exit_code INTEGER, outcome TEXT,"
+            " peak_cpu_percent REAL, peak_rss_mb REAL, read_mb REAL, write_mb REAL, peak_children INTEGER)"
+        )
+        conn.execute("CREATE INDEX IF NOT EXISTS ix_runs_script_id ON runs (script_name, id)")
+        conn.execute("CREATE INDEX IF NOT EXISTS ix_runs_started_at ON runs (started_at)")
+        conn.execute("CREATE INDEX IF NOT EXISTS ix_runs_run_id ON runs (run_id)")
+        conn.execute(
+            "CREATE TABLE IF NOT EXISTS script_daily ("
+            " script_name TEXT NOT NULL, day TEXT NOT NULL,"
+            " runs INTEGER NOT NULL, failures INTEGER NOT NULL, total_duration REAL NOT NULL,"
+            " max_duration REAL NOT NULL, histogram TEXT NOT NULL,"
+            " PRIMARY KEY (script_name, day))"
+        )
+        _conn = conn
+    return _conn
+
+
+def _bucket(duration: float) -> int:
+    return int(math.log1p(max(0.0, duration)) / _BUCKET_BASE)
+
+
+def _bucket_value(bucket: int) -> float:
+    return math.expm1((bucket + 0.5) * _BUCKET_BASE)
+
+
+def resultado(exit_code: int | None, timed_out: bool = False) -> str:
+    """
+    Outcome label of a run: timeout (its deadline fired), success, error,
+    cpu_limit (SIGXCPU from the CPU-time rlimit) or killed (other signals).
+    """
+    if timed_out:
+        return "timeout"
+    if exit_code == 0:
+        return "success"
+    if exit_code is not None and exit_code == -getattr(signal, "SIGXCPU", 0):
+        return "cpu_limit"
+    if exit_code is None or exit_code < 0:
+        return "killed"
+    return "error"
+
+
+def registrar(run: dict, peaks: dict | None = None) -> None:
+    """Queues one finished run (plus its telemetry peaks) for the writer; never blocks on disk."""
+    global _writer
+    if not config.HISTORY:
+        return
+    if peaks:
+        run = {
+            **run,
+            "peak_cpu_percent": peaks.get("cpu_percent"),
+            "peak_rss_mb": peaks.get("rss_mb"),
+            "read_mb": peaks.get("read_mb"),
+            "write_mb": peaks.get("write_mb"),
+            "peak_children": peaks.get("children"),
+        }
+    if _writer is None:
+        with _lock:
+            if _writer is None:
+                _writer = threading.Thread(target=_write_loop, daemon=True, name="history-writer")
+                _writer.start()
+    _pending.put(run)
+
+
+def _flush(batch: list[dict]) -> None:
+    rows = [tuple(run.get(col) for col in _COLUMNS) for run in batch]
+    daily: dict[tuple[str, str], list[dict]] = {}
+    for run in batch:
+        if run.get("duration") is not None:
+            day = datetime.fromtimestamp(run["ended_at"]).strftime("%Y-%m-%d")
+            daily.setdefault((run["script_name"], day), []).append(run)
+    with _db_lock:
+        conn = _db()
+        conn.execute("BEGIN")
+        try:
+            conn.executemany(
+                f"INSERT INTO runs ({', '.join(_COLUMNS)}) VALUES ({', '.join('?' * len(_COLUMNS))})", rows
+            )
+            for (script, day), runs in daily.items():
+                row = conn.execute(
+                    "SELECT runs, failures, total_duration, max_duration, histogram FROM script_daily"
+                    " WHERE script_name = ? AND day = ?", (script, day),
+                ).fetchone()
+                count, failures, total, longest, hist = row if row else (0, 0, 0.0, 0.0, "{}")
+                hist = json.loads(hist)
+                for run in runs:
+                    count += 1
+                    failures += run["outcome"] != "success"
+                    total += run["duration"]
+                    longest = max(longest, run["duration"])
+                    key = str(_bucket(run["duration"]))
+                    hist[key] = hist.get(key, 0) + 1
+                conn.execute(
+                    "INSERT OR REPLACE INTO script_daily VALUES (?, ?, ?, ?, ?, ?, ?)",
+                    (script, day, count, failures, total, longest, json.dumps(hist, separators=(",", ":"))),
+                )
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+
+
+def _write_loop() -> None:
+    while True:
+        first = _pending.get()
+        batch = [first]
+        deadline = time.monotonic() + _FLUSH_SECONDS
+        while first is not None and len(batch) < _MAX_BATCH:
+            try:
+                first = _pending.get(timeout=max(0.0, deadline - time.monotonic()))
+            except queue.Empty:
+                break
+            batch.append(first)
+        stop = None in batch
+        batch = [run for run in batch if run is not None]
+        if batch:
+            try:
+                _flush(batch)
+            except Exception as exc:
+                print(f"[WARN] History write failed ({len(batch)} runs lost): {exc}")
+        if stop:
+            return
+
+
+def encerrar(timeout: float = 5.0) -> None:
+    """Flushes queued runs (called on shutdown)."""
+    if _writer is not None and _writer.is_alive():
+        _pending.put(None)
+        _writer.join(timeout)
+
+
+def listar(script: str | None = None, before: int | None = None, since: float | None = None,
+           limit: int = 50) -> dict:
+    """
+    Newest-first page of runs. Keyset pagination: pass the returned
+    `next_cursor` as `before` to get the next page (stable while rows are added).
+    """
+    where, params = [], []
+    if script:
+        where.append("script_name = ?")
+        params.append(script)
+    if before is not None:
+        where.append("id < ?")
+        params.append(before)
+    if since is not None:
+        where.append("started_at >= ?")
+        params.append(since)
+    sql = (
+        f"SELECT id, {', '.join(_COLUMNS)} FROM runs"
+        f"{' WHERE ' + ' AND '.join(where) if where else ''} ORDER BY id DESC LIMIT ?"
+    )
+    with _db_lock:
+        rows = _db().execute(sql, (*params, limit + 1)).fetchall()
+    items = [dict(zip(("id", *_COLUMNS), row)) for row in rows[:limit]]
+    return {"items": items, "next_cursor": items[-1]["id"] if len(rows) > limit else None}
+
+
+def _percentile(hist: dict[int, int], total: int, q: float) -> float | None:
+    if not total:
+        return None
+    rank = max(1, math.ceil(q * total))
+    seen = 0
+    for bucket in sorted(hist):
+        seen += hist[bucket]
+        if seen >= rank:
+            return round(_bucket_value(bucket), 2)
+    return None
+
+
+def estatisticas(script: str | None = None, dias: int = 14) -> list[dict]:
+    """Per-script aggregates over the last `dias` days (percentiles are approximate, ~5%)."""
+    since = datetime.fromtimestamp(time.time() - dias * 86400).strftime("%Y-%m-%d")
+    sql = "SELECT script_name, runs, failures, total_duration, max_duration, histogram FROM script_daily WHERE day >= ?"
+    params: tuple = (since,)
+    if script:
+        sql += " AND script_name = ?"
+        params += (script,)
+    with _db_lock:
+        rows = _db().execute(sql, params).fetchall()
+    merged: dict[str, dict] = {}
+    for name, runs, failures, total, longest, hist in rows:
+        agg = merged.setdefault(name, {"runs": 0, "failures": 0, "total": 0.0, "max": 0.0, "hist": {}})
+        agg["runs"] += runs
+        agg["failures"] += failures
+        agg["total"] += total
+        agg["max"] = max(agg["max"], longest)
+        for bucket, count in json.loads(hist).items():
+            agg["hist"][int(bucket)] = agg["hist"].get(int(bucket), 0) + count
+    return [
+        {
+            "script_name": name,
+            "days": dias,
+            "runs": agg["runs"],
+            "failures": agg["failures"],
+            "failure_rate": round(agg["failures"] / agg["runs"], 4) if agg["runs"] else None,
+            "mean_duration": round(agg["total"] / agg["runs"], 2) if agg["runs"] else None,
+            "p50_duration": _percentile(agg["hist"], agg["runs"], 0.50),
+            "p95_duration": _percentile(agg["hist"], agg["runs"], 0.95),
+            "max_duration": round(agg["max"], 2),
+        }
+        for name, agg in sorted(merged.items())
+    ]
@@ -0,0 +1,144 @@
+import pickle
+import sqlite3
+import threading
+from pathlib import Path
+from apscheduler.job import Job
+from apscheduler.jobstores.base import BaseJobStore, ConflictingIdError, JobLookupError
+from apscheduler.util import datetime_to_utc_timestamp, utc_timestamp_to_datetime
+
+
+class SQLiteJobStore(BaseJobStore):
+    """
+    APScheduler job store on the standard-library sqlite3 module.
+
+    Same layout and semantics as APScheduler's SQLAlchemyJobStore (pickled job
+    state + indexed next_run_time), without requiring SQLAlchemy on the
+    server. A small `meta` table stores values the scheduler engine needs
+    across restarts (the registry fingerprint the jobs were built from).
+    """
+
+    def __init__(self, path: Path, pickle_protocol: int = pickle.HIGHEST_PROTOCOL):
+        super().__init__()
+        self.path = Path(path)
+        self.pickle_protocol = pickle_protocol
+        self._conn: sqlite3.Connection | None = None
+        self._lock = threading.RLock()
+
+    def start(self, scheduler, alias):
+        super().start(scheduler, alias)
+        self._open()
+
+    def _open(self) -> sqlite3.Connection:
+        with self._lock:
+            if self._conn is None:
+                self.path.parent.mkdir(parents=True, exist_ok=True)
+                conn = sqlite3.connect(str(self.path), check_same_thread=False, isolation_level=None)
+                conn.execute("PRAGMA journal_mode=WAL")
+                conn.execute(
+                    "CREATE TABLE IF NOT EXISTS apscheduler_jobs ("
+                    " id TEXT PRIMARY KEY, next_run_time REAL, job_state BLOB NOT NULL)"
+                )
+                conn.execute("CREATE INDEX IF NOT EXISTS ix_jobs_next_run_time ON apscheduler_jobs (next_run_time)")
+                conn.execute("CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT)")
+                self._conn = conn
+            return self._conn
+
+    def _execute(self, sql: str, params: tuple = ()) -> sqlite3.Cursor:
+        with self._lock:
+            return self._open().execute(sql, params)
+
+    # ── meta ─────────────────────────────────────────────────────────────────
+
+    def ler_meta(self, key: str) -> str | None:
+        row = self._execute("SELECT value FROM meta WHERE key = ?", (key,)).fetchone()
+        return row[0] if row else None
+
+    def gravar_meta(self, key: str, value: str) -> None:
+        self._execute(
+            "INSERT INTO meta (key, value) VALUES (?, ?) ON CONFLICT (key) DO UPDATE SET value = excluded.value",
+            (key, value),
+        )
+
+    def vazio(self) -> bool:
+        return self._execute("SELECT 1 FROM apscheduler_jobs LIMIT 1").fetchone() is None
+
+    # ── BaseJobStore ─────────────────────────────────────────────────────────
+
+    def lookup_job(self, job_id):
+        row = self._execute("SELECT job_state FROM apscheduler_jobs WHERE id = ?", (job_id,)).fetchone()
+        return self._reconstitute_job(row[0]) if row else None
+
+    def get_due_jobs(self, now):
+        return self._get_jobs("WHERE next_run_time <= ?", (datetime_to_utc_timestamp(now),))
+
+    def get_next_run_time(self):
+        row = self._execute(
+            "SELECT next_run_time FROM apscheduler_jobs WHERE next_run_time IS NOT NULL"
+            " ORDER BY next_run_time LIMIT 1"
+        ).fetchone()
+        return utc_timestamp_to_datetime(row[0]) if row else None
+
+    def get_all_jobs(self):
+        jobs = self._get_jobs()
+        self._fix_paused_jobs_sorting(jobs)
+        return jobs
+
+    def add_job(self, job):
+        try:
+            self._execute(
+                "INSERT INTO apscheduler_jobs (id, next_run_time, job_state) VALUES (?, ?, ?)",
+                (job.id, datetime_to_utc_timestamp(job.next_run_time),
+                 pickle.dumps(job.__getstate__(), self.pickle_protocol)),
+            )
+        except sqlite3.IntegrityError:
+            raise ConflictingIdError(job.id)
+
+    def update_job(self, job):
+        cur = self._execute(
+            "UPDATE apscheduler_jobs SET next_run_time = ?, job_state = ? WHERE id = ?",
+            (datetime_to_utc_timestamp(job.next_run_time),
+             pickle.dumps(job.__getstate__(), self.pickle_protocol), job.id),
+        )
+        if cur.rowcount == 0:
+            raise JobLookupError(job.id)
+
+    def remove_job(self, job_id):
+        cur = self._execute("DELETE FROM apscheduler_jobs WHERE id = ?", (job_id,))
+        if cur.rowcount == 0:
+            raise JobLookupError(job_id)
+
+    def remove_all_jobs(self):
+        self._execute("DELETE FROM apscheduler_jobs")
+
+    def shutdown(self):
+        with self._lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
+
+    def _reconstitute_job(self, job_state):
+        state = pickle.loads(job_state)
+        state["jobstore"] = self
+        job = Job.__new__(Job)
+        job.__setstate__(state)
+        job._scheduler = self._scheduler
+        job._jobstore_alias = self._alias
+        return job
+
+    def _get_jobs(self, where: str = "", params: tuple = ()):
+        jobs, failed = [], []
+        rows = self._execute(
+            f"SELECT id, job_state FROM apscheduler_jobs {where} ORDER BY next_run_time", params
+        ).fetchall()
+        for job_id, state in rows:
+            try:
+                jobs.append(self._reconstitute_job(state))
+            except BaseException:
+                self._logger.exception('Unable to restore job "%s" -- removing it', job_id)
+                failed.append(job_id)
+        for job_id in failed:
+            self._execute("DELETE FROM apscheduler_jobs WHERE id = ?", (job_id,))
+        return jobs
+
+    def __repr__(self):
+        return f"<{self.__class__.__name__} (path={self.path})>"
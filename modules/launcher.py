@@ -0,0 +1,257 @@
+import json
+import os
+import signal
+import socket
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from pathlib import Path
+import psutil
+from modules.config import config
+
+# Shared process launcher for the executor and workflow runs.
+# LAUNCH_MODE="subprocess" (default) starts `python script.py` cold;
+# "forkserver" (POSIX only) asks a warm interpreter with FORKSERVER_PRELOAD
+# already imported to fork a child that runs the script through runpy.
+# Both return an object with Popen's pid / wait() / poll() / returncode, so
+# exit codes, cwd and rlimits behave the same either way. Every script starts
+# in its own session / process group (POSIX; a new process group on Windows),
+# so sinalizar() reaches the whole tree it spawned with one killpg.
+# rlimits are never set through preexec_fn (unsafe in this threaded server):
+# a subprocess launch with limits goes through forkserver.py's exec wrapper.
+
+_FORKSERVER_SCRIPT = Path(__file__).with_name("forkserver.py")
+_STARTUP_TIMEOUT = 60.0
+
+
+def _read_message(conn: socket.socket, buffer: bytearray) -> dict | None:
+    """Next newline-terminated JSON message (None on EOF). Partial reads stay in `buffer`."""
+    while b"\n" not in buffer:
+        chunk = conn.recv(4096)
+        if not chunk:
+            return None
+        buffer.extend(chunk)
+    line, _, rest = bytes(buffer).partition(b"\n")
+    buffer[:] = rest
+    return json.loads(line)
+
+
+class ForkedProcess:
+    """Popen-like handle of a forkserver child; its exit code arrives over the launch socket."""
+
+    def __init__(self, conn: socket.socket, pid: int, buffer: bytearray):
+        self.pid = pid
+        self.returncode: int | None = None
+        self._conn = conn
+        self._buffer = buffer
+        self._lock = threading.Lock()
+
+    def wait(self, timeout: float | None = None) -> int:
+        with self._lock:
+            if self.returncode is not None:
+                return self.returncode
+            self._conn.settimeout(timeout)
+            try:
+                message = _read_message(self._conn, self._buffer)
+            except socket.timeout:
+                raise subprocess.TimeoutExpired(str(self.pid), timeout)
+            except (OSError, ValueError):
+                message = None
+            if message is not None and "exit" in message:
+                self.returncode = int(message["exit"])
+            else:
+                # forkserver went away before reaping the child: wait for the pid to disappear
+                while _pid_alive(self.pid):
+                    time.sleep(0.5)
+                self.returncode = -1
+            self._conn.close()
+            return self.returncode
+
+    def poll(self) -> int | None:
+        return self.returncode
+
+
+def _pid_alive(pid: int) -> bool:
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+
+class _ForkServer:
+    def __init__(self, preload: list[str]):
+        self.preload = preload
+        self._proc: subprocess.Popen | None = None
+        self._socket_path: str | None = None
+        self._lock = threading.Lock()
+        self.launches = 0
+        self.failures = 0
+
+    def _ensure(self) -> str:
+        with self._lock:
+            if self._proc is not None and self._proc.poll() is None:
+                return self._socket_path
+            if self._proc is not None:
+                print(f"[WARN] Forkserver exited (code {self._proc.returncode}) — restarting.")
+            self._socket_path = os.path.join(tempfile.mkdtemp(prefix="abobi-fork-"), "fork.sock")
+            started = time.perf_counter()
+            # stdin stays a pipe held by us: the forkserver exits on EOF when the server dies
+            self._proc = subprocess.Popen(
+                [sys.executable, str(_FORKSERVER_SCRIPT), self._socket_path, *self.preload],
+                stdin=subprocess.PIPE,
+                close_fds=True,
+            )
+            deadline = time.monotonic() + _STARTUP_TIMEOUT
+            while not os.path.exists(self._socket_path):
+                if self._proc.poll() is not None or time.monotonic() > deadline:
+                    raise RuntimeError("forkserver failed to start")
+                time.sleep(0.05)
+            print(
+                f"[BOOT] Forkserver ready (PID {self._proc.pid}) in {time.perf_counter() - started:.1f}s, "
+                f"preloaded: {', '.join(self.preload) or 'nothing'}."
+            )
+            return self._socket_path
+
+    def launch(self, script_path: Path, stdin=None, stdout=None, stderr=None,
+               limits: dict | None = None) -> ForkedProcess:
+        socket_path = self._ensure()
+        conn = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        try:
+            conn.connect(socket_path)
+            request = json.dumps({"path": str(script_path), "cwd": str(script_path.parent), "limits": limits})
+            request = request.encode() + b"\n"
+            fds = [
+                (stream if isinstance(stream, int) else stream.fileno()) if stream is not None else default
+                for stream, default in ((stdin, 0), (stdout, 1), (stderr, 2))
+            ]
+            socket.send_fds(conn, [request], fds)
+            buffer = bytearray()
+            reply = _read_message(conn, buffer) or {}
+            if "pid" not in reply:
+                raise RuntimeError(reply.get("error", "no reply from forkserver"))
+        except Exception:
+            conn.close()
+            self.failures += 1
+            raise
+        self.launches += 1
+        return ForkedProcess(conn, int(reply["pid"]), buffer)
+
+    def stop(self) -> None:
+        with self._lock:
+            if self._proc is not None and self._proc.poll() is None:
+                self._proc.stdin.close()
+                try:
+                    self._proc.wait(timeout=5)
+                except subprocess.TimeoutExpired:
+                    self._proc.kill()
+
+
+_forkserver: _ForkServer | None = None
+_mode = config.LAUNCH_MODE.lower()
+if _mode == "forkserver":
+    if os.name == "posix" and hasattr(socket, "send_fds"):
+        _forkserver = _ForkServer(list(config.FORKSERVER_PRELOAD))
+    else:
+        print("[WARN] LAUNCH_MODE=forkserver needs POSIX and Python 3.9+ — using subprocess launches.")
+elif _mode != "subprocess":
+    print(f"[WARN] Unknown LAUNCH_MODE '{config.LAUNCH_MODE}' — using subprocess launches.")
+
+
+def iniciar_processo(script_path: Path, stdin=None, stdout=None, stderr=None, limits: dict | None = None):
+    """
+    Starts `script_path` with its folder as cwd. Returns a Popen or ForkedProcess.
+    `limits` ({"memory_mb", "cpu_seconds"}, POSIX only) become the child's rlimits.
+    A forkserver failure falls back to a cold subprocess for that launch.
+    """
+    limits = {k: v for k, v in (limits or {}).items() if v} or None
+    if limits and os.name != "posix":
+        print(f"[WARN] Memory/CPU limits of {script_path.name} need POSIX rlimits — not applied.")
+        limits = None
+    if _forkserver is not None:
+        try:
+            return _forkserver.launch(script_path, stdin, stdout, stderr, limits)
+        except Exception as exc:
+            print(f"[WARN] Forkserver launch of {script_path.name} failed ({exc}) — using subprocess.")
+    args = [sys.executable, str(script_path)]
+    if limits:
+        args = [sys.executable, str(_FORKSERVER_SCRIPT), "--exec", json.dumps(limits), str(script_path)]
+    return subprocess.Popen(
+        args,
+        shell=False,
+        cwd=str(script_path.parent),
+        stdin=stdin,
+        stdout=stdout,
+        stderr=stderr,
+        start_new_session=os.name == "posix",
+        creationflags=getattr(subprocess, "CREATE_NEW_PROCESS_GROUP", 0),
+    )
+
+
+def _signal_tree(pid: int, kill: bool) -> None:
+    try:
+        parent = psutil.Process(pid)
+        procs = [*parent.children(recursive=True), parent]
+    except psutil.NoSuchProcess:
+        return
+    for proc in procs:
+        try:
+            proc.kill() if kill else proc.terminate()
+        except psutil.NoSuchProcess:
+            pass
+
+
+def sinalizar(pid: int, kill: bool = False) -> None:
+    """
+    SIGTERM (or SIGKILL with `kill`) to a launched script and everything it
+    spawned: one killpg on its process group. Every launch starts a new session,
+    so the group id is the script's pid for as long as any member lives, even
+    after the script itself exited. Windows walks the tree with psutil.
+    """
+    if os.name == "posix":
+        try:
+            os.killpg(pid, signal.SIGKILL if kill else signal.SIGTERM)
+        except ProcessLookupError:
+            pass
+        return
+    _signal_tree(pid, kill)
+
+
+def grupo_vivo(pid: int) -> bool:
+    """True while any process of the launched script's group still exists (POSIX), or the script (Windows)."""
+    if os.name == "posix":
+        try:
+            os.killpg(pid, 0)
+        except ProcessLookupError:
+            return False
+        except PermissionError:
+            return True
+        return True
+    return psutil.pid_exists(pid)
+
+
+def preaquecer() -> None:
+    """Starts the forkserver ahead of the first launch (no-op in subprocess mode)."""
+    if _forkserver is not None:
+        try:
+            _forkserver._ensure()
+        except Exception as exc:
+            print(f"[WARN] Forkserver unavailable: {exc}")
+
+
+def encerrar() -> None:
+    if _forkserver is not None:
+        _forkserver.stop()
+
+
+def estatisticas() -> dict:
+    return {
+        "mode": "forkserver" if _forkserver is not None else "subprocess",
+        "preload": _forkserver.preload if _forkserver else [],
+        "launches": _forkserver.launches if _forkserver else None,
+        "failures": _forkserver.failures if _forkserver else None,
+    }
@@ -0,0 +1,153 @@
+import json
+import queue
+import sqlite3
+import threading
+import time
+from modules.config import config
+
+# Optional write-ahead copy of the run queue (QUEUE_PERSISTENT), in SQLite
+# (DIRETORIO_DADOS/queue.db, WAL, synchronous=FULL). Every transition —
+# enqueued, slots merged, dispatched, finished — is handed to one writer
+# thread that commits whatever arrived within QUEUE_SYNC_MS in a single
+# transaction, so a burst of enqueues costs one fsync instead of one each.
+# A crash loses at most that window. On boot, rows still "queued" or
+# "running" (in flight when the server died) are put back in the queue.
+
+_path = config.DIRETORIO_DADOS / "queue.db"
+_MAX_BATCH = 1000
+
+_pending: "queue.SimpleQueue[tuple | None]" = queue.SimpleQueue()
+_conn: sqlite3.Connection | None = None
+_writer: threading.Thread | None = None
+_lock = threading.Lock()
+_closed = False
+
+
+def _db() -> sqlite3.Connection:
+    global _conn
+    if _conn is None:
+        _path.parent.mkdir(parents=True, exist_ok=True)
+        conn = sqlite3.connect(str(_path), check_same_thread=False, isolation_level=None)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=FULL")
+        conn.execute(
+            "CREATE TABLE IF NOT EXISTS tasks ("
+            " script_name TEXT PRIMARY KEY,"
+            " priority REAL NOT NULL, lane TEXT NOT NULL, state TEXT NOT NULL,"
+            " run_id TEXT, task TEXT NOT NULL, updated_at REAL NOT NULL)"
+        )
+        _conn = conn
+    return _conn
+
+
+def _submit(op: tuple) -> None:
+    global _writer
+    if not config.QUEUE_PERSISTENT or _closed:
+        return
+    if _writer is None:
+        with _lock:
+            if _writer is None:
+                _writer = threading.Thread(target=_write_loop, daemon=True, name="queue-store-writer")
+                _writer.start()
+    _pending.put(op)
+
+
+def enfileirado(name: str, priority: float, lane: str, task: dict) -> None:
+    _submit(("queued", name, priority, lane, json.dumps(task, default=str), time.time()))
+
+
+def atualizado(name: str, task: dict) -> None:
+    """A queued task changed (e.g. slots merged from a duplicate enqueue)."""
+    _submit(("updated", name, json.dumps(task, default=str), time.time()))
+
+
+def despachado(name: str, run_id: str) -> None:
+    _submit(("running", name, run_id, time.time()))
+
+
+def concluido(name: str, run_id: str | None = None) -> None:
+    """
+    The run `run_id` finished: drops its row. Keyed by run_id so a late "done"
+    cannot delete a newer queued run of the same script; without run_id the
+    script's row goes whatever its state.
+    """
+    _submit(("done", name, run_id))
+
+
+def _apply(conn: sqlite3.Connection, op: tuple) -> None:
+    kind = op[0]
+    if kind == "queued":
+        _, name, priority, lane, task, ts = op
+        conn.execute(
+            "INSERT OR REPLACE INTO tasks VALUES (?, ?, ?, 'queued', NULL, ?, ?)",
+            (name, priority, lane, task, ts),
+        )
+    elif kind == "updated":
+        _, name, task, ts = op
+        conn.execute("UPDATE tasks SET task = ?, updated_at = ? WHERE script_name = ?", (task, ts, name))
+    elif kind == "running":
+        _, name, run_id, ts = op
+        conn.execute(
+            "UPDATE tasks SET state = 'running', run_id = ?, updated_at = ? WHERE script_name = ?",
+            (run_id, ts, name),
+        )
+    else:
+        _, name, run_id = op
+        conn.execute(
+            "DELETE FROM tasks WHERE script_name = ? AND (? IS NULL OR run_id = ?)", (name, run_id, run_id)
+        )
+
+
+def _write_loop() -> None:
+    while True:
+        op = _pending.get()
+        batch = [op]
+        deadline = time.monotonic() + max(0, config.QUEUE_SYNC_MS) / 1000
+        while op is not None and len(batch) < _MAX_BATCH:
+            try:
+                op = _pending.get(timeout=max(0.0, deadline - time.monotonic()))
+            except queue.Empty:
+                break
+            batch.append(op)
+        ops = [op for op in batch if op is not None]
+        if ops:
+            conn = _db()
+            try:
+                conn.execute("BEGIN")
+                for op in ops:
+                    _apply(conn, op)
+                conn.execute("COMMIT")
+            except Exception as exc:
+                conn.execute("ROLLBACK")
+                print(f"[WARN] Queue store write failed ({len(ops)} transitions lost): {exc}")
+        if None in batch:
+            return
+
+
+def restaurar() -> list[dict]:
+    """
+    Rows left by the previous run, queued or in flight ("running"), as
+    {script_name, priority, lane, state, run_id, task}. Empty when disabled.
+    """
+    if not config.QUEUE_PERSISTENT:
+        return []
+    rows = _db().execute(
+        "SELECT script_name, priority, lane, state, run_id, task FROM tasks ORDER BY priority"
+    ).fetchall()
+    return [
+        {"script_name": name, "priority": priority, "lane": lane, "state": state, "run_id": run_id,
+         "task": json.loads(task)}
+        for name, priority, lane, state, run_id, task in rows
+    ]
+
+
+def encerrar(timeout: float = 5.0) -> None:
+    """
+    Commits pending transitions and stops recording: on shutdown the queued and
+    running rows stay in the store, so the next boot restores them.
+    """
+    global _closed
+    _closed = True
+    if _writer is not None and _writer.is_alive():
+        _pending.put(None)
+        _writer.join(timeout)
@@ -1,22 +1,250 @@
-import pandas as pd
+import hashlib
 import sys
+import threading
+import time
+from collections import deque
+from pathlib import Path
+from types import MappingProxyType
 from modules.config import config
-from modules.scanner import buscar_arquivos_locais, normalize_name
+from modules import snapshot
+from modules.registry_loader import carregar_registro, carregar_workflows
+from modules.scanner import buscar_arquivos_locais
 
 
-def _safe_str(val) -> str:
-    return "" if pd.isna(val) else str(val).strip()
+def _parse_registro() -> tuple[list[dict], list[dict]] | None:
+    try:
+        return carregar_registro(config.PLANILHA_REGISTRO)
+    except Exception as e:
+        print(f"[ERR] Failed to read registry spreadsheet: {e}")
+        return None
+
+
+def _parse_workflows() -> tuple[list[dict], list[dict]] | None:
+    try:
+        return carregar_workflows(config.PLANILHA_WORKFLOWS)
+    except Exception as e:
+        print(f"[WARN] Failed to read workflows spreadsheet: {e}")
+        return None
+
+
+def _freeze(value):
+    """Read-only copy all the way down: dicts → MappingProxyType, lists → tuples."""
+    if isinstance(value, (dict, MappingProxyType)):
+        return MappingProxyType({k: _freeze(v) for k, v in value.items()})
+    if isinstance(value, (list, tuple)):
+        return tuple(_freeze(v) for v in value)
+    return value
+
+
+def _thaw(value):
+    """Inverse of _freeze: a fresh mutable copy (dicts and lists) owned by the caller."""
+    if isinstance(value, (dict, MappingProxyType)):
+        return {k: _thaw(v) for k, v in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [_thaw(v) for v in value]
+    return value
+
+
+_MAX_REPORTED_ERRORS = 200
+
+
+class _SheetCache:
+    """
+    Process-wide parse cache for one spreadsheet.
+
+    The file is re-parsed only when its (mtime, size) changed AND its SHA-1
+    differs from the last parsed content; a touched-but-identical file is
+    still a cache hit. Rows are handed out as an immutable tuple of
+    read-only mappings (frozen all the way down), so every caller shares the
+    same parsed snapshot. A missing, unreadable or unparsable file keeps the
+    last good rows and logs a warning.
+    """
+
+    def __init__(self, name: str, path_fn, parser):
+        self.name = name
+        self._path_fn = path_fn
+        self._parser = parser
+        self._lock = threading.Lock()
+        self._key: tuple[float, int] | None = None
+        self._sha1: str | None = None
+        self._rows: tuple = ()
+        self._errors: list[dict] = []
+        self._trusted = False
+        self._missing = False
+        self.version = 0
+        self.hits = 0
+        self.misses = 0
+        self.hash_hits = 0
+        self.parses = 0
+        self.parse_failures = 0
+        self.parse_seconds: deque = deque(maxlen=20)
+
+    def get(self) -> tuple:
+        with self._lock:
+            if self._trusted:
+                self.hits += 1
+                return self._rows
+            path = self._path_fn()
+            key = _stat(path)
+            if key is None:
+                if not self._missing:
+                    print(f"[WARN] {self.name}: {path} not found — keeping the last {len(self._rows)} parsed row(s).")
+                    self._missing = True
+                return self._rows
+            self._missing = False
+            if key == self._key:
+                self.hits += 1
+                return self._rows
+            self.misses += 1
+            try:
+                sha1 = hashlib.sha1(path.read_bytes()).hexdigest()
+            except OSError as exc:
+                print(f"[WARN] Failed to hash {path}: {exc}")
+                return self._rows
+            if sha1 == self._sha1:
+                self.hash_hits += 1
+                self._key = key
+                return self._rows
+
+            started = time.perf_counter()
+            parsed = self._parser()
+            elapsed = time.perf_counter() - started
+            if parsed is None:
+                self.parse_failures += 1
+                print(f"[WARN] {self.name}: parse failed — keeping the last {len(self._rows)} parsed row(s).")
+                return self._rows
+            rows, self._errors = parsed
+            self.parses += 1
+            self.parse_seconds.append(round(elapsed, 4))
+            self._key, self._sha1 = key, sha1
+            self._rows = tuple(_freeze(r) for r in rows)
+            self.version += 1
+            print(f"[REGISTRY] Parsed {self.name}: {len(rows)} rows in {elapsed:.2f}s (version {self.version}).")
+            if self._errors:
+                print(f"[WARN] {self.name}: {len(self._errors)} validation error(s) — see /api/registry.")
+        _save_snapshot()
+        return self._rows
+
+    def restore(self, entry: dict) -> None:
+        with self._lock:
+            self._key = (entry["mtime"], entry["size"])
+            self._sha1 = entry.get("sha1")
+            self._rows = tuple(_freeze(r) for r in entry["rows"])
+            self._errors = entry.get("errors", [])
+            self._trusted = True
+            self.version += 1
+
+    def untrust(self) -> tuple:
+        with self._lock:
+            self._trusted = False
+            return self._rows
+
+    def export(self) -> dict | None:
+        with self._lock:
+            if self._key is None:
+                return None
+            return {
+                "mtime": self._key[0], "size": self._key[1], "sha1": self._sha1,
+                "rows": [_thaw(r) for r in self._rows],
+                "errors": self._errors,
+            }
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "version": self.version,
+                "rows": len(self._rows),
+                "hits": self.hits,
+                "misses": self.misses,
+                "hash_hits": self.hash_hits,
+                "parses": self.parses,
+                "parse_failures": self.parse_failures,
+                "parse_seconds": list(self.parse_seconds),
+                "from_snapshot": self._trusted,
+                "validation_error_count": len(self._errors),
+                "validation_errors": self._errors[:_MAX_REPORTED_ERRORS],
+            }
+
 
+_caches = {
+    "registro": _SheetCache("registro", lambda: config.PLANILHA_REGISTRO, _parse_registro),
+    "workflows": _SheetCache("workflows", lambda: config.PLANILHA_WORKFLOWS, _parse_workflows),
+}
 
-def _parse_hours(raw: str) -> list[int]:
-    hours = []
-    for part in raw.split(","):
-        part = part.strip()
-        if part.isdigit():
-            h = int(part)
-            if 0 <= h <= 23:
-                hours.append(h)
-    return sorted(set(hours))
+
+def _stat(path: Path) -> tuple[float, int] | None:
+    try:
+        st = path.stat()
+    except OSError:
+        return None
+    return st.st_mtime, st.st_size
+
+
+def _save_snapshot() -> None:
+    data = {}
+    for name, cache in _caches.items():
+        entry = cache.export()
+        if entry is not None:
+            data[name] = entry
+    snapshot.salvar_secao("registry", data)
+
+
+def obter_registro() -> tuple:
+    """Immutable snapshot of the parsed registry rows (shared, do not copy per call)."""
+    return _caches["registro"].get()
+
+
+_script_index: tuple[int, dict] = (-1, {})
+
+
+def obter_script(script_name: str) -> MappingProxyType | None:
+    """Registry row of one script by name (O(1); the index follows the registry version)."""
+    global _script_index
+    rows = obter_registro()
+    version, index = _script_index
+    if version != _caches["registro"].version:
+        index = {row["script_name"]: row for row in rows}
+        _script_index = (_caches["registro"].version, index)
+    return index.get(script_name)
+
+
+def versao_registro() -> int:
+    """Bumped whenever either spreadsheet is parsed with new content."""
+    return sum(cache.version for cache in _caches.values())
+
+
+def estatisticas_cache() -> dict:
+    return {
+        "version": versao_registro(),
+        "sheets": {name: cache.stats() for name, cache in _caches.items()},
+    }
+
+
+def restaurar_snapshot() -> bool:
+    """Boot helper: serve parsed spreadsheets from the persisted snapshot until verified."""
+    data = snapshot.ler_secao("registry")
+    if not data or "registro" not in data:
+        return False
+    for name, entry in data.items():
+        if name in _caches:
+            _caches[name].restore(entry)
+    print(f"[BOOT] Registry restored from snapshot: {len(data['registro']['rows'])} rows (verification pending).")
+    return True
+
+
+def verificar_snapshot() -> bool:
+    """
+    Compares snapshot-served spreadsheets with the files on disk.
+    Returns True if any of them had to be re-parsed with different content.
+    """
+    changed = False
+    for cache in _caches.values():
+        before = cache.version
+        cache.untrust()
+        cache.get()
+        if cache.version != before:
+            changed = True
+    return changed
 
 
 def obter_todos_scripts_planilha() -> list[dict]:
@@ -26,34 +254,13 @@ def obter_todos_scripts_planilha() -> list[dict]:
     Does NOT filter by availability on disk.
     """
     local_files = buscar_arquivos_locais()
-    try:
-        df = pd.read_excel(config.PLANILHA_REGISTRO, engine="openpyxl")
-    except Exception as e:
-        print(f"[ERR] Failed to read registry spreadsheet: {e}")
-        return []
-
     result = []
-    for row in df.itertuples(index=False):
-        raw_name = _safe_str(getattr(row, "script_name", ""))
-        if not raw_name:
-            continue
-        name = normalize_name(raw_name)
-        area = _safe_str(getattr(row, "area_name", "sem area")).lower()
-        is_active = _safe_str(getattr(row, "is_active", "false")).lower() == "true"
-        hours = _parse_hours(_safe_str(getattr(row, "cron_schedule", "")))
+    for row in obter_registro():
+        name = row["script_name"]
         result.append({
-            "script_name": name,
-            "area_name": area,
-            "is_active": is_active,
-            "cron_schedule": hours,
+            **_thaw(row),
             "available_locally": name in local_files,
             "path": str(local_files[name]) if name in local_files else None,
-            "emails_principal": _safe_str(getattr(row, "emails_principal", "")),
-            "emails_cc": _safe_str(getattr(row, "emails_cc", "")),
-            "move_file": _safe_str(getattr(row, "move_file", "false")).lower() == "true",
-            "movimentacao_financeira": _safe_str(getattr(row, "movimentacao_financeira", "nao")).lower(),
-            "interacao_cliente": _safe_str(getattr(row, "interacao_cliente", "nao")).lower(),
-            "tempo_manual": int(getattr(row, "tempo_manual", 0) if not pd.isna(getattr(row, "tempo_manual", 0)) else 0),
         })
     return result
 
@@ -79,22 +286,5 @@ def obter_scripts_agendaveis() -> list[dict]:
 
 
 def obter_workflows() -> list[dict]:
-    """Returns workflow definitions from workflows.xlsx. Returns [] if file missing."""
-    if not config.PLANILHA_WORKFLOWS.exists():
-        return []
-    try:
-        df = pd.read_excel(config.PLANILHA_WORKFLOWS, engine="openpyxl")
-    except Exception as e:
-        print(f"[WARN] Failed to read workflows spreadsheet: {e}")
-        return []
-
-    workflows = []
-    for _, row in df.iterrows():
-        name = _safe_str(row.get("Workflow_name", ""))
-        if not name:
-            continue
-        scripts = [s.strip().lower() for s in str(row.get("script_name", "")).split(",") if s.strip()]
-        hours = _parse_hours(_safe_str(row.get("horario", "")))
-        if scripts and hours:
-            workflows.append({"workflow_name": name, "scripts": scripts, "horarios": hours})
-    return workflows
+    """Workflow definitions from workflows.xlsx ([] until the file has been parsed once)."""
+    return [_thaw(w) for w in _caches["workflows"].get()]
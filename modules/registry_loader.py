@@ -0,0 +1,265 @@
+import pandas as pd
+from pathlib import Path
+from openpyxl import load_workbook
+from modules import cron
+
+# Columnar spreadsheet loader for the registry and workflow sheets.
+# Only the needed columns are pulled out of openpyxl's streaming read-only
+# reader; each column is then normalized in one vectorized pass. Problems
+# are collected as {"sheet", "row", "column", "value", "error"} entries
+# (row = spreadsheet row number) instead of being dropped silently.
+
+REGISTRO_COLUMNS = (
+    "script_name", "area_name", "is_active", "cron_schedule",
+    "emails_principal", "emails_cc", "move_file",
+    "movimentacao_financeira", "interacao_cliente", "tempo_manual",
+    "slot_weight", "resource_class",
+    "timeout_seconds", "memory_limit_mb", "cpu_limit_seconds",
+    "max_retries", "retry_backoff_seconds", "retry_exit_codes",
+)
+LIMIT_COLUMNS = ("timeout_seconds", "memory_limit_mb", "cpu_limit_seconds")
+WORKFLOW_COLUMNS = ("Workflow_name", "script_name", "horario", "depends_on", "max_parallel")
+
+
+def _read_columns(path: Path, wanted: tuple[str, ...]) -> pd.DataFrame:
+    """Streams the first sheet, keeping only `wanted` columns. Index = spreadsheet row."""
+    wb = load_workbook(path, read_only=True, data_only=True)
+    try:
+        rows = wb.worksheets[0].iter_rows(values_only=True)
+        header = next(rows, ())
+        positions: dict[str, int] = {}
+        for i, cell in enumerate(header):
+            if cell is not None and str(cell).strip() in wanted:
+                positions.setdefault(str(cell).strip(), i)
+        data: dict[str, list] = {col: [] for col in positions}
+        for row in rows:
+            for col, i in positions.items():
+                data[col].append(row[i] if i < len(row) else None)
+    finally:
+        wb.close()
+    df = pd.DataFrame(data, dtype=object)
+    df.index = df.index + 2
+    return df
+
+
+def _text(df: pd.DataFrame, col: str, default: str = "") -> pd.Series:
+    """str(cell).strip() for every cell, "" for empty cells, `default` if the column is missing."""
+    if col not in df:
+        return pd.Series(default, index=df.index, dtype=object)
+    s = df[col]
+    return s.where(s.notna(), "").astype(str).str.strip()
+
+
+def _flag(df: pd.DataFrame, col: str, default: str = "false") -> pd.Series:
+    return _text(df, col, default).str.lower() == "true"
+
+
+def _report(errors: list, sheet: str, col: str, bad: pd.Series, message: str) -> None:
+    errors.extend(
+        {"sheet": sheet, "row": int(row), "column": col, "value": str(value), "error": message}
+        for row, value in bad.items()
+    )
+
+
+def _split(text: pd.Series) -> pd.Series:
+    """Comma-separated cells → one stripped, non-empty item per entry (index repeats per row)."""
+    parts = text.str.split(",").explode().str.strip()
+    return parts[parts.notna() & (parts != "")]
+
+
+def _regroup(items: pd.Series, index: pd.Index) -> pd.Series:
+    """Inverse of _split: list of items per row, [] for rows without items."""
+    grouped = items.groupby(level=0).agg(list)
+    return grouped.reindex(index).apply(lambda v: v if isinstance(v, list) else [])
+
+
+def _hours(text: pd.Series, sheet: str, col: str, errors: list) -> pd.Series:
+    """Comma- or space-separated hour lists → sorted unique list[int] per row."""
+    parts = _split(text.str.replace(r"\s+", ",", regex=True))
+    numeric = parts.str.fullmatch(r"\d+(?:\.0+)?")
+    values = pd.to_numeric(parts.where(numeric), errors="coerce")
+    valid = numeric & values.between(0, 23)
+    _report(errors, sheet, col, parts[~valid], "not an hour between 0 and 23")
+
+    good = values[valid].astype(int).rename("hour").rename_axis("row").reset_index()
+    good = good.drop_duplicates().sort_values(["row", "hour"]).set_index("row")["hour"]
+    return _regroup(good, text.index)
+
+
+def _schedule(text: pd.Series, sheet: str, col: str, errors: list) -> tuple[pd.Series, pd.Series]:
+    """
+    Schedule cells → (hours, cron_expr) per row. Cells of digits and separators
+    only ("7, 8, 9, 10, 11", "8 12 14 16 18") are hour lists, as are cells that
+    do not have 5 whitespace-separated fields; both go through the vectorized
+    _hours path, where a bad item is reported and the rest kept. Anything else
+    is a crontab expression.
+    """
+    is_list = text.str.fullmatch(r"[\d\s,.]*") | (text.str.split().str.len() != 5)
+    hours = _hours(text.where(is_list, ""), sheet, col, errors)
+    exprs = hours.apply(cron.de_horas)
+    for row, raw in text[~is_list].items():
+        try:
+            expr = cron.normalizar(raw)
+            hours[row] = cron.horas(expr)
+        except ValueError as exc:
+            errors.append({"sheet": sheet, "row": int(row), "column": col, "value": raw,
+                           "error": f"invalid cron expression: {exc}"})
+            continue
+        exprs[row] = expr
+    return hours, exprs
+
+
+def _limit(df: pd.DataFrame, col: str, sheet: str, errors: list[dict]) -> pd.Series:
+    """Optional positive number; blank or invalid → None (no limit)."""
+    text = _text(df, col)
+    value = pd.to_numeric(text.where(text != ""), errors="coerce")
+    bad = (text != "") & ~(value > 0)
+    _report(errors, sheet, col, text[bad], "not a number > 0")
+    return value.astype(object).where(value > 0, None)
+
+
+def _exit_codes(text: pd.Series, sheet: str, col: str, errors: list) -> pd.Series:
+    """Comma-separated exit codes → sorted unique list[int] per row ([] = any non-zero code)."""
+    parts = _split(text)
+    values = pd.to_numeric(parts.where(parts.str.fullmatch(r"\d+(?:\.0+)?")), errors="coerce")
+    valid = values.between(1, 255)
+    _report(errors, sheet, col, parts[~valid], "not an exit code between 1 and 255")
+    codes = values[valid].astype(int)
+    return _regroup(codes, text.index).apply(lambda v: sorted(set(v)))
+
+
+def _names(text: pd.Series) -> pd.Series:
+    return text.str.lower().str.replace(r"\.py$", "", regex=True)
+
+
+def carregar_registro(path: Path) -> tuple[list[dict], list[dict]]:
+    """Parses registro_automacoes.xlsx. Returns (rows, validation_errors)."""
+    sheet = "registro"
+    df = _read_columns(path, REGISTRO_COLUMNS)
+    errors: list[dict] = []
+
+    names = _names(_text(df, "script_name"))
+    blank = names == ""
+    has_content = df.notna().any(axis=1)
+    _report(errors, sheet, "script_name", names[blank & has_content], "missing script_name")
+    dup = names[~blank & names.duplicated(keep=False)]
+    _report(errors, sheet, "script_name", dup, "duplicate script_name")
+
+    tempo_raw = df["tempo_manual"] if "tempo_manual" in df else pd.Series(None, index=df.index, dtype=object)
+    tempo = pd.to_numeric(tempo_raw, errors="coerce")
+    _report(errors, sheet, "tempo_manual", tempo_raw[tempo_raw.notna() & tempo.isna()], "not a number")
+
+    weight_text = _text(df, "slot_weight")
+    weight = pd.to_numeric(weight_text.where(weight_text != ""), errors="coerce")
+    bad_weight = (weight_text != "") & ~((weight >= 1) & (weight % 1 == 0))
+    _report(errors, sheet, "slot_weight", weight_text[bad_weight], "not a whole number >= 1")
+    resource_class = _text(df, "resource_class").str.lower()
+
+    retries_text = _text(df, "max_retries")
+    retries = pd.to_numeric(retries_text.where(retries_text != ""), errors="coerce")
+    bad_retries = (retries_text != "") & ~((retries >= 0) & (retries % 1 == 0))
+    _report(errors, sheet, "max_retries", retries_text[bad_retries], "not a whole number >= 0")
+
+    hours, exprs = _schedule(_text(df, "cron_schedule"), sheet, "cron_schedule", errors)
+    out = pd.DataFrame({
+        "script_name": names,
+        "area_name": _text(df, "area_name", "sem area").str.lower(),
+        "is_active": _flag(df, "is_active"),
+        "cron_schedule": hours,
+        "cron_expr": exprs,
+        "emails_principal": _text(df, "emails_principal"),
+        "emails_cc": _text(df, "emails_cc"),
+        "move_file": _flag(df, "move_file"),
+        "movimentacao_financeira": _text(df, "movimentacao_financeira", "nao").str.lower(),
+        "interacao_cliente": _text(df, "interacao_cliente", "nao").str.lower(),
+        "tempo_manual": tempo.fillna(0).astype(int),
+        "slot_weight": weight.where(~bad_weight).fillna(1).astype(int),
+        "resource_class": resource_class.where(resource_class != "", "default"),
+        **{col: _limit(df, col, sheet, errors) for col in LIMIT_COLUMNS},
+        "max_retries": retries.astype(object).where(retries.notna() & ~bad_retries, None),
+        "retry_backoff_seconds": _limit(df, "retry_backoff_seconds", sheet, errors),
+        "retry_exit_codes": _exit_codes(_text(df, "retry_exit_codes"), sheet, "retry_exit_codes", errors),
+    }, index=df.index)
+    rows = out[~blank].to_dict("records")
+    return rows, sorted(errors, key=lambda e: e["row"])
+
+
+def _dependencies(text: pd.Series, scripts: pd.Series, sheet: str, col: str, errors: list) -> pd.Series:
+    """
+    "c: a, b; d: c" cells → {step: [steps it waits for]} per row ({} = blank).
+    Unknown steps and self-dependencies are reported and dropped; a cycle
+    is reported and the row gets None (the workflow cannot run).
+    """
+    out = pd.Series([{}] * len(text), index=text.index, dtype=object)
+    for row, raw in text[text != ""].items():
+        steps = set(scripts[row])
+        deps: dict[str, list[str]] = {}
+        for clause in filter(None, (c.strip() for c in raw.split(";"))):
+            step, sep, before = clause.partition(":")
+            step = step.strip().lower()
+            waits = [d.strip().lower() for d in before.split(",") if d.strip()]
+            unknown = [s for s in (step, *waits) if s not in steps]
+            if not sep or unknown:
+                problem = f"unknown step(s) {', '.join(unknown)}" if sep else "expected 'step: dep, dep'"
+                errors.append({"sheet": sheet, "row": int(row), "column": col, "value": clause, "error": problem})
+                continue
+            if step in waits:
+                errors.append({"sheet": sheet, "row": int(row), "column": col, "value": clause,
+                               "error": "step depends on itself"})
+            deps.setdefault(step, [])
+            deps[step] += [d for d in waits if d != step and d not in deps[step]]
+        # Kahn's algorithm: steps left over sit on a cycle
+        pending = {s: set(deps.get(s, ())) for s in steps}
+        ready = [s for s, waits in pending.items() if not waits]
+        while ready:
+            done = ready.pop()
+            del pending[done]
+            for s, waits in pending.items():
+                if done in waits:
+                    waits.discard(done)
+                    if not waits:
+                        ready.append(s)
+        if pending:
+            errors.append({"sheet": sheet, "row": int(row), "column": col, "value": raw,
+                           "error": f"dependency cycle between {', '.join(sorted(pending))}"})
+            out[row] = None
+        else:
+            out[row] = deps
+    return out
+
+
+def carregar_workflows(path: Path) -> tuple[list[dict], list[dict]]:
+    """Parses workflows.xlsx. Returns (workflows, validation_errors)."""
+    sheet = "workflows"
+    df = _read_columns(path, WORKFLOW_COLUMNS)
+    errors: list[dict] = []
+
+    names = _text(df, "Workflow_name")
+    blank = names == ""
+    scripts = _regroup(_split(_text(df, "script_name").str.lower()), df.index)
+    hours, exprs = _schedule(_text(df, "horario"), sheet, "horario", errors)
+    no_scripts = ~blank & (scripts.map(len) == 0)
+    no_hours = ~blank & (hours.map(len) == 0)
+    _report(errors, sheet, "script_name", names[no_scripts], "workflow has no scripts")
+    _report(errors, sheet, "horario", names[no_hours], "workflow has no valid hours")
+    deps = _dependencies(_text(df, "depends_on").where(~blank, ""), scripts, sheet, "depends_on", errors)
+    cyclic = deps.isna()
+
+    parallel_text = _text(df, "max_parallel")
+    parallel = pd.to_numeric(parallel_text.where(parallel_text != ""), errors="coerce")
+    bad_parallel = (parallel_text != "") & ~((parallel >= 1) & (parallel % 1 == 0))
+    _report(errors, sheet, "max_parallel", parallel_text[bad_parallel], "not a whole number >= 1")
+
+    out = pd.DataFrame({
+        "workflow_name": names,
+        "scripts": scripts,
+        "horarios": hours,
+        "cron_expr": exprs,
+        "depends_on": deps,
+        "max_parallel": pd.Series(
+            [int(v) if pd.notna(v) and not bad else None for v, bad in zip(parallel, bad_parallel)],
+            index=df.index, dtype=object,
+        ),
+    }, index=df.index)
+    workflows = out[~blank & ~no_scripts & ~no_hours & ~cyclic].to_dict("records")
+    return workflows, sorted(errors, key=lambda e: e["row"])
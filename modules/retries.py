@@ -0,0 +1,81 @@
+import heapq
+import itertools
+import random
+import threading
+import time
+from typing import Callable
+from modules.config import config
+
+# Pending retries of failed runs. They wait here, in ONE timer thread's heap,
+# not in the run queue and without holding a slot; when a retry's backoff has
+# passed its callback re-enqueues the run (executor → "retry" lane).
+# One pending retry per script: scheduling again replaces it, and a later
+# successful run of the script cancels it.
+
+_heap: list[tuple[float, int, str]] = []   # (due, seq, script_name)
+_pending: dict[str, dict] = {}             # script_name → {due, seq, attempt, action, ...}
+_seq = itertools.count()
+_cond = threading.Condition(threading.Lock())
+_thread: threading.Thread | None = None
+_fired = 0
+
+
+def atraso(attempt: int, base_seconds: float) -> float:
+    """
+    Exponential backoff with "equal jitter": half of min(cap, base × 2^(attempt-1))
+    is fixed, the other half random, so retries of scripts that failed together
+    (e.g. a shared dependency was down) do not all come back at the same moment.
+    """
+    ceiling = min(config.RETRY_BACKOFF_MAX_SECONDS, base_seconds * 2 ** max(0, attempt - 1))
+    return ceiling / 2 + random.uniform(0, ceiling / 2)
+
+
+def agendar(script_name: str, attempt: int, delay: float, action: Callable[[], None], reason: str) -> None:
+    """Runs `action` (the re-enqueue) once `delay` seconds have passed."""
+    global _thread
+    with _cond:
+        if _thread is None:
+            _thread = threading.Thread(target=_loop, daemon=True, name="retry-timer")
+            _thread.start()
+        seq = next(_seq)
+        due = time.time() + delay
+        _pending[script_name] = {"due": due, "seq": seq, "attempt": attempt, "action": action, "reason": reason}
+        heapq.heappush(_heap, (due, seq, script_name))
+        _cond.notify()
+
+
+def cancelar(script_name: str) -> bool:
+    with _cond:
+        return _pending.pop(script_name, None) is not None
+
+
+def _loop() -> None:
+    global _fired
+    while True:
+        with _cond:
+            while not _heap or _heap[0][0] > time.time():
+                _cond.wait(None if not _heap else _heap[0][0] - time.time())
+            _, seq, name = heapq.heappop(_heap)
+            entry = _pending.get(name)
+            if entry is None or entry["seq"] != seq:
+                continue
+            del _pending[name]
+            _fired += 1
+        try:
+            entry["action"]()
+        except Exception as exc:
+            print(f"[WARN] Retry of {name} failed to enqueue: {exc}")
+
+
+def listar() -> dict:
+    """Pending retries (soonest first) and how many have fired."""
+    with _cond:
+        items = sorted(_pending.items(), key=lambda item: item[1]["due"])
+        return {
+            "pending": [
+                {"script_name": name, "attempt": e["attempt"], "due_at": e["due"],
+                 "due_in_seconds": round(e["due"] - time.time(), 1), "reason": e["reason"]}
+                for name, e in items
+            ],
+            "fired": _fired,
+        }
@@ -0,0 +1,102 @@
+import sqlite3
+import threading
+import time
+from modules.config import config
+
+# Append-only journal of scheduled slots → run outcome, in SQLite (WAL mode,
+# synchronous=FULL so a completed run survives a crash right after it ends).
+# A slot is the timestamp a cron fire was meant for; a run that was started
+# but never completed (server died mid-run) does not count as done.
+_path = config.DIRETORIO_DADOS / "run_journal.db"
+_conn: sqlite3.Connection | None = None
+_lock = threading.Lock()
+
+
+def _db() -> sqlite3.Connection | None:
+    global _conn
+    if _conn is None and config.RUN_JOURNAL:
+        _path.parent.mkdir(parents=True, exist_ok=True)
+        conn = sqlite3.connect(str(_path), check_same_thread=False, isolation_level=None)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=FULL")
+        conn.execute(
+            "CREATE TABLE IF NOT EXISTS slot_runs ("
+            " script_name TEXT NOT NULL,"
+            " slot_ts REAL NOT NULL,"
+            " started_at REAL,"
+            " completed_at REAL,"
+            " exit_code INTEGER,"
+            " PRIMARY KEY (script_name, slot_ts))"
+        )
+        cutoff = time.time() - config.RUN_JOURNAL_RETENTION_DAYS * 86400
+        conn.execute("DELETE FROM slot_runs WHERE slot_ts < ?", (cutoff,))
+        _conn = conn
+    return _conn
+
+
+def registrar_inicio(script_name: str, slots: list[float]) -> None:
+    if not slots:
+        return
+    now = time.time()
+    with _lock:
+        conn = _db()
+        if conn is None:
+            return
+        try:
+            conn.executemany(
+                "INSERT INTO slot_runs (script_name, slot_ts, started_at) VALUES (?, ?, ?)"
+                " ON CONFLICT (script_name, slot_ts) DO UPDATE SET started_at = excluded.started_at",
+                [(script_name, ts, now) for ts in slots],
+            )
+        except sqlite3.Error as exc:
+            print(f"[WARN] Run journal write failed: {exc}")
+
+
+def registrar_conclusao(script_name: str, slots: list[float], exit_code: int | None) -> None:
+    if not slots:
+        return
+    now = time.time()
+    with _lock:
+        conn = _db()
+        if conn is None:
+            return
+        try:
+            conn.executemany(
+                "INSERT INTO slot_runs (script_name, slot_ts, completed_at, exit_code) VALUES (?, ?, ?, ?)"
+                " ON CONFLICT (script_name, slot_ts) DO UPDATE SET"
+                " completed_at = excluded.completed_at, exit_code = excluded.exit_code",
+                [(script_name, ts, now, exit_code) for ts in slots],
+            )
+        except sqlite3.Error as exc:
+            print(f"[WARN] Run journal write failed: {exc}")
+
+
+def slots_concluidos(desde_ts: float) -> dict[str, set[float]]:
+    """{script_name: {slot_ts, ...}} of slots since `desde_ts` whose run completed."""
+    done: dict[str, set[float]] = {}
+    with _lock:
+        conn = _db()
+        if conn is None:
+            return done
+        rows = conn.execute(
+            "SELECT script_name, slot_ts FROM slot_runs WHERE slot_ts >= ? AND completed_at IS NOT NULL",
+            (desde_ts,),
+        ).fetchall()
+    for name, ts in rows:
+        done.setdefault(name, set()).add(ts)
+    return done
+
+
+def duracoes_medias(dias: int = 14) -> dict[str, float]:
+    """{script_name: mean seconds} of completed journaled runs over the last `dias` days."""
+    with _lock:
+        conn = _db()
+        if conn is None:
+            return {}
+        rows = conn.execute(
+            "SELECT script_name, AVG(completed_at - started_at) FROM slot_runs"
+            " WHERE slot_ts >= ? AND started_at IS NOT NULL AND completed_at >= started_at"
+            " GROUP BY script_name",
+            (time.time() - dias * 86400,),
+        ).fetchall()
+    return {name: avg for name, avg in rows if avg is not None}
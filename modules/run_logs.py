@@ -0,0 +1,280 @@
+import os
+import re
+import selectors
+import socket
+import threading
+import time
+from collections import OrderedDict
+from pathlib import Path
+from modules.config import config
+
+# Per-run stdout/stderr capture.
+# Each run gets two pipes; the read ends are multiplexed by ONE selector
+# thread (POSIX) — Windows pipes are not selectable, so there each stream
+# gets a small blocking reader thread instead. Output lands in a bounded
+# in-memory ring buffer per run and in DIRETORIO_DADOS/logs/<script>/<run_id>.log,
+# rotated at RUN_LOG_FILE_MAX_MB, keeping the newest RUN_LOG_KEEP_PER_SCRIPT runs.
+
+_LOG_DIR = config.DIRETORIO_DADOS / "logs"
+_MAX_RUNS_IN_MEMORY = 200
+_RUN_ID = re.compile(r"[0-9a-f]{6,32}")
+_READ_CHUNK = 65536
+
+
+class RunLog:
+    """
+    Output of one run, addressed by absolute byte offset since the run started.
+    The ring buffer keeps roughly the last RUN_LOG_BUFFER_KB; older offsets are
+    served from the log file (or reported as truncated once rotated away).
+    """
+
+    def __init__(self, run_id: str, script_name: str, path: Path):
+        self.run_id = run_id
+        self.script_name = script_name
+        self.path = path
+        self.started_at = time.time()
+        self.finished_at: float | None = None
+        self.size = 0
+        self._capacity = max(1, config.RUN_LOG_BUFFER_KB) * 1024
+        self._buf = bytearray()
+        self._buf_start = 0
+        self._file = None
+        self._file_base = 0
+        self._file_bytes = 0
+        self._open_streams = 2
+        self._lock = threading.Lock()
+        try:
+            path.parent.mkdir(parents=True, exist_ok=True)
+            self._file = open(path, "ab")
+        except OSError as exc:
+            print(f"[WARN] Run log file unavailable for {script_name}: {exc}")
+
+    @property
+    def complete(self) -> bool:
+        return self._open_streams == 0
+
+    def escrever(self, data: bytes) -> None:
+        with self._lock:
+            self.size += len(data)
+            self._buf.extend(data)
+            excess = len(self._buf) - self._capacity
+            if excess > self._capacity // 4:  # trim in batches, not one memmove per chunk
+                del self._buf[:excess]
+                self._buf_start += excess
+            if self._file is not None:
+                try:
+                    self._file.write(data)
+                    self._file_bytes += len(data)
+                    if self._file_bytes >= config.RUN_LOG_FILE_MAX_MB * 1024 * 1024:
+                        self._rotate()
+                except OSError as exc:
+                    print(f"[WARN] Run log write failed for {self.script_name}: {exc}")
+                    self._file = None
+
+    def _rotate(self) -> None:
+        self._file.close()
+        backups = max(0, config.RUN_LOG_FILE_BACKUPS)
+        for i in range(backups, 0, -1):
+            src = self.path if i == 1 else self.path.with_name(f"{self.path.name}.{i - 1}")
+            if src.exists():
+                os.replace(src, self.path.with_name(f"{self.path.name}.{i}"))
+        if not backups:
+            self.path.unlink(missing_ok=True)
+        self._file = open(self.path, "ab")
+        self._file_base, self._file_bytes = self.size, 0
+
+    def fechar_stream(self) -> None:
+        with self._lock:
+            self._open_streams -= 1
+            if self._open_streams == 0:
+                self.finished_at = time.time()
+                if self._file is not None:
+                    self._file.close()
+                    self._file = None
+
+    def _read_file(self, offset: int, limit: int) -> bytes:
+        if self._file is not None:
+            self._file.flush()
+        with open(self.path, "rb") as f:
+            f.seek(offset - self._file_base)
+            return f.read(limit)
+
+    def ler(self, offset: int | None = None, tail: int | None = None, limit: int = _READ_CHUNK) -> dict:
+        """`tail` = last N lines; otherwise `limit` bytes from `offset` (default: from the start)."""
+        with self._lock:
+            truncated = False
+            if tail is not None:
+                lines = bytes(self._buf).splitlines(keepends=True)
+                data = b"".join(lines[-tail:]) if tail > 0 else b""
+                start = self.size - len(data)
+                truncated = self._buf_start > 0 and len(lines) <= tail
+            else:
+                start = max(0, offset or 0)
+                earliest = min(self._buf_start, self._file_base if self.path.exists() else self._buf_start)
+                if start < earliest:
+                    start, truncated = earliest, True
+                if start >= self._buf_start:
+                    data = bytes(self._buf[start - self._buf_start:start - self._buf_start + limit])
+                else:
+                    data = self._read_file(start, limit)
+            return {
+                "run_id": self.run_id,
+                "script_name": self.script_name,
+                "complete": self.complete,
+                "started_at": self.started_at,
+                "finished_at": self.finished_at,
+                "size": self.size,
+                "offset": start,
+                "next_offset": start + len(data),
+                "truncated": truncated,
+                "text": data.decode("utf-8", errors="replace"),
+            }
+
+
+class _PipeReader:
+    """Single selector thread draining every run's pipes (thread-per-stream where select() can't)."""
+
+    def __init__(self):
+        self._use_selector = os.name == "posix"
+        self._pending: list[tuple[int, RunLog]] = []
+        self._lock = threading.Lock()
+        if self._use_selector:
+            self._sel = selectors.DefaultSelector()
+            self._wake_r, self._wake_w = socket.socketpair()
+            self._wake_r.setblocking(False)
+            self._wake_w.setblocking(False)
+            self._sel.register(self._wake_r, selectors.EVENT_READ, None)
+            threading.Thread(target=self._loop, daemon=True, name="run-log-reader").start()
+
+    def adicionar(self, fd: int, log: RunLog) -> None:
+        if not self._use_selector:
+            threading.Thread(target=self._drain_blocking, args=(fd, log), daemon=True,
+                             name=f"run-log-{log.run_id}").start()
+            return
+        os.set_blocking(fd, False)
+        with self._lock:
+            self._pending.append((fd, log))
+        try:
+            self._wake_w.send(b"\0")
+        except BlockingIOError:
+            pass
+
+    @staticmethod
+    def _drain_blocking(fd: int, log: RunLog) -> None:
+        try:
+            while data := os.read(fd, _READ_CHUNK):
+                log.escrever(data)
+        finally:
+            os.close(fd)
+            log.fechar_stream()
+
+    def _close(self, fd: int, log: RunLog) -> None:
+        self._sel.unregister(fd)
+        os.close(fd)
+        log.fechar_stream()
+
+    def _loop(self) -> None:
+        while True:
+            for key, _ in self._sel.select():
+                if key.data is None:
+                    try:
+                        while self._wake_r.recv(4096):
+                            pass
+                    except BlockingIOError:
+                        pass
+                    with self._lock:
+                        pending, self._pending = self._pending, []
+                    for fd, log in pending:
+                        self._sel.register(fd, selectors.EVENT_READ, log)
+                    continue
+                try:
+                    data = os.read(key.fd, _READ_CHUNK)
+                except BlockingIOError:
+                    continue
+                except OSError:
+                    data = b""
+                if data:
+                    key.data.escrever(data)
+                else:
+                    self._close(key.fd, key.data)
+
+
+_reader: _PipeReader | None = None
+_logs: "OrderedDict[str, RunLog]" = OrderedDict()
+_logs_lock = threading.Lock()
+
+
+def _prune(script_dir: Path) -> None:
+    """Keeps the newest RUN_LOG_KEEP_PER_SCRIPT runs' files of one script."""
+    try:
+        runs: dict[str, list[Path]] = {}
+        for f in script_dir.iterdir():
+            runs.setdefault(f.name.split(".", 1)[0], []).append(f)
+        newest = sorted(runs.values(), key=lambda fs: max(f.stat().st_mtime for f in fs), reverse=True)
+        for files in newest[max(1, config.RUN_LOG_KEEP_PER_SCRIPT):]:
+            for f in files:
+                f.unlink(missing_ok=True)
+    except OSError as exc:
+        print(f"[WARN] Run log pruning failed in {script_dir}: {exc}")
+
+
+def abrir_captura(run_id: str, script_name: str) -> tuple[int, int] | None:
+    """
+    Creates the run's log and pipes. Returns the (stdout, stderr) write ends to
+    hand to the launcher — the caller must close them once the child has them —
+    or None when capture is disabled.
+    """
+    global _reader
+    if not config.RUN_LOG_CAPTURE:
+        return None
+    script_dir = _LOG_DIR / re.sub(r"[^\w.-]", "_", script_name)
+    log = RunLog(run_id, script_name, script_dir / f"{run_id}.log")
+    _prune(script_dir)
+    with _logs_lock:
+        if _reader is None:
+            _reader = _PipeReader()
+        _logs[run_id] = log
+        while len(_logs) > _MAX_RUNS_IN_MEMORY:
+            oldest = next((rid for rid, entry in _logs.items() if entry.complete), None)
+            if oldest is None:
+                break
+            del _logs[oldest]
+    out_r, out_w = os.pipe()
+    err_r, err_w = os.pipe()
+    _reader.adicionar(out_r, log)
+    _reader.adicionar(err_r, log)
+    return out_w, err_w
+
+
+def ler_log(run_id: str, offset: int | None = None, tail: int | None = None, limit: int = _READ_CHUNK) -> dict | None:
+    """Run output from memory, or from its log file once evicted. None if unknown."""
+    if not _RUN_ID.fullmatch(run_id):
+        return None
+    with _logs_lock:
+        log = _logs.get(run_id)
+    if log is not None:
+        return log.ler(offset, tail, limit)
+    matches = sorted(_LOG_DIR.glob(f"*/{run_id}.log"))
+    if not matches:
+        return None
+    path = matches[0]
+    data = path.read_bytes()
+    if tail is not None:
+        lines = data.splitlines(keepends=True)
+        chunk = b"".join(lines[-tail:]) if tail > 0 else b""
+        start = len(data) - len(chunk)
+    else:
+        start = min(max(0, offset or 0), len(data))
+        chunk = data[start:start + limit]
+    return {
+        "run_id": run_id,
+        "script_name": path.parent.name,
+        "complete": True,
+        "started_at": None,
+        "finished_at": path.stat().st_mtime,
+        "size": len(data),
+        "offset": start,
+        "next_offset": start + len(chunk),
+        "truncated": path.with_name(f"{path.name}.1").exists(),
+        "text": chunk.decode("utf-8", errors="replace"),
+    }
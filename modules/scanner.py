@@ -1,6 +1,16 @@
 import os
+import threading
+import time
 from pathlib import Path
 from modules.config import config
+from modules import snapshot
+
+try:
+    from watchdog.observers import Observer
+    from watchdog.events import FileSystemEventHandler
+except ImportError:  # optional: falls back to directory mtime re-checks only
+    Observer = None
+    FileSystemEventHandler = object
 
 
 def normalize_name(raw: str) -> str:
@@ -13,32 +23,264 @@ def _is_under_metodos(path: Path) -> bool:
     return any(part.lower() == "metodos" for part in path.parts)
 
 
-def buscar_arquivos_locais() -> dict[str, Path]:
+def _is_script(filename: str) -> bool:
+    return filename.endswith(".py") and not filename.startswith("_")
+
+
+class _WatchHandler(FileSystemEventHandler):
+    """Forwards filesystem events to the index as a set of touched directories."""
+
+    def __init__(self, index: "_ScriptIndex"):
+        self._index = index
+
+    def on_any_event(self, event):
+        if event.event_type not in ("created", "deleted", "moved"):
+            return  # content edits/opens do not change the name → path map
+        touched = set()
+        for raw in (getattr(event, "src_path", None), getattr(event, "dest_path", None)):
+            if not raw:
+                continue
+            path = Path(os.fsdecode(raw))
+            touched.add(path.parent)
+            if event.is_directory:
+                touched.add(path)
+        if touched:
+            self._index.apply_events(touched)
+
+
+class _ScriptIndex:
     """
-    Walk DIRETORIO_AUTOMACOES recursively.
-    Returns {normalized_name: full_path} for all .py files under metodos/ folders.
-    Files starting with '_' are skipped.
-    Duplicate names: first found wins, warning printed.
+    Long-lived {normalized_name: path} index of the scripts under metodos/ folders.
+
+    The first call walks DIRETORIO_AUTOMACOES once. After that only directories
+    that changed are re-listed: watchdog events (inotify & co.) mark them
+    directly, and every SCAN_RECHECK_SECONDS a stat-only sweep compares the
+    recorded directory mtimes, which also covers shares where events are lost.
+    `version` is bumped whenever the name → path map changes.
     """
-    found: dict[str, Path] = {}
-
-    if not config.DIRETORIO_AUTOMACOES.exists():
-        print(f"[WARN] DIRETORIO_AUTOMACOES does not exist: {config.DIRETORIO_AUTOMACOES}")
-        return found
-
-    for root, _dirs, files in os.walk(config.DIRETORIO_AUTOMACOES):
-        root_path = Path(root)
-        if not _is_under_metodos(root_path):
-            continue
-        for filename in files:
-            if not filename.endswith(".py") or filename.startswith("_"):
-                continue
-            name = normalize_name(filename)
-            full_path = root_path / filename
-            if name in found:
-                print(f"[WARN] Duplicate script name '{name}': keeping {found[name]}, ignoring {full_path}")
+
+    def __init__(self, root: Path):
+        self._root = root
+        self._lock = threading.RLock()
+        self._dir_mtimes: dict[Path, float] = {}
+        self._dir_children: dict[Path, set[Path]] = {}
+        self._dir_scripts: dict[Path, dict[str, Path]] = {}
+        self._files: dict[str, Path] = {}
+        self._loaded = False
+        self._last_sweep = 0.0
+        self._observer = None
+        self._unsaved = False
+        self.version = 0
+
+    # ── Directory bookkeeping ────────────────────────────────────────────────
+
+    def _list_dir(self, d: Path) -> bool:
+        """(Re)list one directory. Returns False if it no longer exists."""
+        try:
+            mtime = os.stat(d).st_mtime
+            entries = list(os.scandir(d))
+        except OSError:
+            return False
+
+        children: set[Path] = set()
+        scripts: dict[str, Path] = {}
+        under_metodos = _is_under_metodos(d)
+        for entry in entries:
+            try:
+                if entry.is_dir(follow_symlinks=False):
+                    children.add(Path(entry.path))
+                elif under_metodos and _is_script(entry.name):
+                    scripts[normalize_name(entry.name)] = Path(entry.path)
+            except OSError:
                 continue
-            found[name] = full_path
 
-    print(f"[BOOT] Disk scan complete: {len(found)} .py files found under metodos/ folders.")
-    return found
+        self._dir_mtimes[d] = mtime
+        self._dir_children[d] = children
+        self._unsaved = True
+        if scripts:
+            self._dir_scripts[d] = scripts
+        else:
+            self._dir_scripts.pop(d, None)
+        return True
+
+    def _walk(self, top: Path) -> None:
+        stack = [top]
+        while stack:
+            d = stack.pop()
+            if self._list_dir(d):
+                stack.extend(self._dir_children[d])
+
+    def _drop(self, top: Path) -> None:
+        stack = [top]
+        while stack:
+            d = stack.pop()
+            self._dir_mtimes.pop(d, None)
+            self._dir_scripts.pop(d, None)
+            self._unsaved = True
+            stack.extend(self._dir_children.pop(d, ()))
+
+    def _refresh(self, d: Path) -> None:
+        """Re-list a known directory, walking new subtrees and dropping vanished ones."""
+        before = self._dir_children.get(d, set())
+        if not self._list_dir(d):
+            self._drop(d)
+            parent = self._dir_children.get(d.parent)
+            if parent is not None:
+                parent.discard(d)
+            return
+        after = self._dir_children[d]
+        for gone in before - after:
+            self._drop(gone)
+        for new in after - before:
+            self._walk(new)
+
+    def _rebuild(self) -> None:
+        found: dict[str, Path] = {}
+        for d in sorted(self._dir_scripts):
+            for name, full_path in sorted(self._dir_scripts[d].items()):
+                if name in found:
+                    print(f"[WARN] Duplicate script name '{name}': keeping {found[name]}, ignoring {full_path}")
+                    continue
+                found[name] = full_path
+        if found != self._files:
+            self._files = found
+            self.version += 1
+
+    # ── Snapshot ─────────────────────────────────────────────────────────────
+
+    def _save_snapshot(self) -> None:
+        if not self._unsaved:
+            return
+        self._unsaved = False
+        dirs = {
+            str(d): [mtime, sorted(p.name for p in self._dir_scripts.get(d, {}).values())]
+            for d, mtime in self._dir_mtimes.items()
+        }
+        snapshot.salvar_secao("scanner", {"root": str(self._root), "dirs": dirs})
+
+    def restore(self) -> bool:
+        """Loads the persisted index without touching the disk. Returns True on success."""
+        data = snapshot.ler_secao("scanner")
+        if not data or data.get("root") != str(self._root) or not data.get("dirs"):
+            return False
+        with self._lock:
+            if self._loaded:
+                return False
+            for raw, (mtime, names) in data["dirs"].items():
+                d = Path(raw)
+                self._dir_mtimes[d] = mtime
+                self._dir_children.setdefault(d, set())
+                if names:
+                    self._dir_scripts[d] = {normalize_name(n): d / n for n in names}
+            for d in self._dir_mtimes:
+                if d != self._root and d.parent in self._dir_children:
+                    self._dir_children[d.parent].add(d)
+            self._rebuild()
+            self._loaded = True
+            self._last_sweep = time.time()
+        print(f"[BOOT] Script index restored from snapshot: {len(self._files)} .py files (verification pending).")
+        return True
+
+    # ── Entry points ─────────────────────────────────────────────────────────
+
+    def _load(self) -> None:
+        self._dir_mtimes.clear()
+        self._dir_children.clear()
+        self._dir_scripts.clear()
+        if self._root.exists():
+            self._walk(self._root)
+        else:
+            print(f"[WARN] DIRETORIO_AUTOMACOES does not exist: {self._root}")
+        self._rebuild()
+        self._loaded = True
+        self._last_sweep = time.time()
+        print(f"[BOOT] Disk scan complete: {len(self._files)} .py files found under metodos/ folders.")
+        self._save_snapshot()
+        self._start_observer()
+
+    def _sweep(self) -> None:
+        """Stat every known directory and re-list only those whose mtime moved."""
+        if not self._dir_mtimes:
+            # Root was missing (or empty) at load time: try a full walk again.
+            if self._root.exists():
+                self._walk(self._root)
+        else:
+            for d, mtime in list(self._dir_mtimes.items()):
+                if d not in self._dir_mtimes:
+                    continue  # dropped together with an ancestor in this sweep
+                try:
+                    changed = os.stat(d).st_mtime != mtime
+                except OSError:
+                    changed = True
+                if changed:
+                    self._refresh(d)
+        self._last_sweep = time.time()
+
+    def apply_events(self, touched: set[Path]) -> None:
+        with self._lock:
+            if not self._loaded:
+                return
+            before = self.version
+            for d in touched:
+                if d in self._dir_mtimes:
+                    self._refresh(d)
+                elif d.parent in self._dir_mtimes:
+                    self._refresh(d.parent)
+            self._rebuild()
+            if self.version != before:
+                print(f"[SCAN] Index updated from watcher events (version {self.version}, {len(self._files)} scripts).")
+            self._save_snapshot()
+
+    def get(self, force: bool = False) -> dict[str, Path]:
+        with self._lock:
+            if not self._loaded:
+                self._load()
+            elif force or time.time() - self._last_sweep >= config.SCAN_RECHECK_SECONDS:
+                before = self.version
+                self._sweep()
+                self._rebuild()
+                if self.version != before:
+                    print(f"[SCAN] Index updated from mtime sweep (version {self.version}, {len(self._files)} scripts).")
+                self._save_snapshot()
+                if force:
+                    self._start_observer()
+            return dict(self._files)
+
+    def _start_observer(self) -> None:
+        if self._observer is not None or not config.SCAN_WATCHER or not self._root.exists():
+            return
+        if Observer is None:
+            print("[SCAN] watchdog not installed: using directory mtime re-checks only.")
+            return
+        try:
+            observer = Observer()
+            observer.schedule(_WatchHandler(self), str(self._root), recursive=True)
+            observer.daemon = True
+            observer.start()
+            self._observer = observer
+            print(f"[SCAN] Watching {self._root} for changes.")
+        except Exception as exc:
+            print(f"[WARN] File watcher unavailable ({exc}): using directory mtime re-checks only.")
+
+
+_index = _ScriptIndex(config.DIRETORIO_AUTOMACOES)
+
+
+def buscar_arquivos_locais(forcar: bool = False) -> dict[str, Path]:
+    """
+    Returns {normalized_name: full_path} for all .py files under metodos/ folders
+    of DIRETORIO_AUTOMACOES. Files starting with '_' are skipped.
+    Served from the in-memory index; `forcar=True` re-checks directory mtimes now.
+    Duplicate names: the lexicographically first path wins, warning printed.
+    """
+    return _index.get(force=forcar)
+
+
+def restaurar_snapshot() -> bool:
+    """Boot helper: serve the index from the persisted snapshot until verified."""
+    return _index.restore()
+
+
+def versao_indice() -> int:
+    """Counter bumped every time the name → path map changes."""
+    return _index.version
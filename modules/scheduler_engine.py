@@ -1,112 +1,521 @@
+import bisect
+import copy
+import hashlib
 import threading
 import pytz
 import time
-from datetime import datetime
+import uuid
+import zlib
+from collections import OrderedDict
+from datetime import datetime, timedelta
 from apscheduler.schedulers.background import BackgroundScheduler
-from apscheduler.triggers.cron import CronTrigger
+from apscheduler.triggers.interval import IntervalTrigger
+from apscheduler.util import obj_to_ref
 from modules.config import config
+from modules import cron, registry, run_journal, scanner
+from modules.jobstore import SQLiteJobStore
 from modules.registry import obter_scripts_agendaveis, obter_workflows
+from modules.scanner import buscar_arquivos_locais
 from modules import executor
 from modules import workflow_manager
 
 _tz = pytz.timezone(config.TIMEZONE)
-scheduler = BackgroundScheduler(timezone=_tz)
+# Script/workflow jobs live in "persistent" (SQLite) when JOBSTORE_PERSISTENT is on;
+# hot_reload_job always stays in the in-memory default store.
+_job_store = SQLiteJobStore(config.DIRETORIO_DADOS / "jobs.db") if config.JOBSTORE_PERSISTENT else None
+_JOBSTORE = "persistent" if _job_store else "default"
+_MISFIRE_GRACE = config.MISFIRE_GRACE_SECONDS if _job_store else 86400
+scheduler = BackgroundScheduler(timezone=_tz, jobstores={"persistent": _job_store} if _job_store else {})
+_reload_lock = threading.Lock()
 
+# Precomputed fire timeline: {job_id: (cache_key, fire_ts list, slot_ts list)}.
+# slot_ts is the unshifted cron time a fire stands for (used by the run journal).
+_timeline: dict[str, tuple] = {}
+_timeline_specs: dict[str, tuple[str, dict[int, int]]] = {}
+_timeline_window: tuple[float, float] = (0.0, 0.0)
+_timeline_lock = threading.Lock()
 
-def _run_workflow_async(workflow_name: str, scripts: list[str]) -> None:
+# Top-of-hour smoothing: {(script_name, hour): offset_seconds} of the last reload
+_DEFAULT_DURATION = 60.0
+_offsets_planejados: dict[tuple[str, int], int] = {}
+
+# Background reload records (most recent last), see solicitar_recarga().
+# Records are only mutated under _reloads_lock.
+_MAX_RELOAD_RECORDS = 20
+_reloads: "OrderedDict[str, dict]" = OrderedDict()
+_reload_inflight: str | None = None
+_reload_followup: tuple[dict, bool] | None = None   # (record, forcar_scan) run after the in-flight one
+_reloads_lock = threading.Lock()
+
+
+def _run_workflow_async(
+    workflow_name: str, scripts: list[str], depends_on: dict | None = None, max_parallel: int | None = None,
+) -> None:
     """Wrapper: run workflow in a daemon thread so the scheduler does not block."""
     t = threading.Thread(
         target=workflow_manager.iniciar_workflow,
-        args=(workflow_name, scripts),
+        args=(workflow_name, scripts, depends_on, max_parallel),
         daemon=True,
         name=f"workflow-cron-{workflow_name}",
     )
     t.start()
 
 
+def _timeline_entries(expr: str, offsets: dict[int, int], start: datetime, end: datetime) -> tuple[list, list]:
+    """Sorted (fire_ts, slot_ts) lists of an expression between start and end."""
+    trigger = cron.criar_trigger(expr, _tz)
+    fires, slots = [], []
+    t = trigger.get_next_fire_time(None, start)
+    while t is not None and t < end:
+        slot = t.timestamp()
+        fires.append(slot + offsets.get(t.hour, 0))
+        slots.append(slot)
+        t = trigger.get_next_fire_time(t, t + timedelta(seconds=1))
+    return fires, slots
+
+
+def _construir_timeline(specs: dict[str, tuple[str, dict[int, int]]]) -> None:
+    """
+    Precomputes every fire of every script from yesterday 00:00 to the day after
+    tomorrow. Per-script arrays are reused when the expression and offsets are
+    unchanged, so a reload only expands the scripts that actually changed.
+    Built under _timeline_lock, so a lookup rebuilding the window cannot
+    store a timeline of older specs over a reload's newer one.
+    """
+    with _timeline_lock:
+        _construir_timeline_bloqueado(specs)
+
+
+def _construir_timeline_bloqueado(specs: dict[str, tuple[str, dict[int, int]]]) -> None:
+    """_construir_timeline body; the caller holds _timeline_lock."""
+    global _timeline, _timeline_specs, _timeline_window
+    midnight = datetime.now(_tz).replace(hour=0, minute=0, second=0, microsecond=0)
+    start, end = midnight - timedelta(days=1), midnight + timedelta(days=2)
+    window = (start.timestamp(), end.timestamp())
+    timeline = {}
+    for name, (expr, offsets) in specs.items():
+        key = (expr, tuple(sorted(offsets.items())), window)
+        cached = _timeline.get(name)
+        timeline[name] = cached if cached is not None and cached[0] == key else (key, *_timeline_entries(expr, offsets, start, end))
+    _timeline, _timeline_specs, _timeline_window = timeline, specs, window
+
+
+def _timeline_de(name: str) -> tuple[list, list]:
+    """(fires, slots) of one script/workflow, rebuilding the window once it runs short."""
+    with _timeline_lock:
+        if time.time() > _timeline_window[1] - 86400:
+            _construir_timeline_bloqueado(_timeline_specs)  # specs read under the lock: always the latest
+        entry = _timeline.get(name)
+    return (entry[1], entry[2]) if entry else ([], [])
+
+
+def _disparo_atual(name: str, now: float | None = None) -> tuple[float, float] | None:
+    """(fire_ts, slot_ts) of the latest fire at or before now."""
+    fires, slots = _timeline_de(name)
+    i = bisect.bisect_right(fires, now or time.time()) - 1
+    return (fires[i], slots[i]) if i >= 0 else None
+
+
+def proximo_disparo(name: str, now: float | None = None) -> float | None:
+    fires, _ = _timeline_de(name)
+    i = bisect.bisect_right(fires, now or time.time())
+    return fires[i] if i < len(fires) else None
+
+
+def _script_job_id(script_name: str) -> str:
+    """Job (and timeline) id of a script — prefixed so no script name can clash with flow_* or hot_reload_job."""
+    return f"script:{script_name}"
+
+
 def _job_wrapper(script_name: str, script_path: str, area_name: str) -> None:
+    fire = _disparo_atual(_script_job_id(script_name))
     executor.enqueue_script(
         script_name, script_path, area_name,
         scheduled_timestamp=time.time(),
         trigger_reason="scheduled",
+        slots=[fire[1]] if fire else None,
+        expected_start=fire[0] if fire else None,
     )
 
 
-def _apply_catchup(scripts: list[dict]) -> None:
-    """
-    For each active script that had scheduled hours earlier today,
-    enqueue it ONCE with the priority of its oldest missed hour.
-    """
-    now = datetime.now(_tz)
-    for s in scripts:
-        past_hours = [h for h in s["cron_schedule"] if h <= now.hour]
-        if not past_hours:
-            continue
-        oldest_hour = min(past_hours)
-        catchup_ts = now.replace(hour=oldest_hour, minute=0, second=0, microsecond=0).timestamp()
-        print(f"[CATCHUP] {s['script_name']} missed {oldest_hour:02d}:00 → enqueuing now")
+def _admitir_catchup(pending: list[tuple[float, dict, list[float]]]) -> None:
+    """Feeds catch-up runs into the queue at CATCHUP_RATE_PER_MINUTE."""
+    interval = 60.0 / config.CATCHUP_RATE_PER_MINUTE if config.CATCHUP_RATE_PER_MINUTE > 0 else 0.0
+    for i, (catchup_ts, s, missed) in enumerate(pending):
+        if i and interval:
+            time.sleep(interval)
         executor.enqueue_script(
             s["script_name"],
             str(s["path_obj"]),
             s["area_name"],
             scheduled_timestamp=catchup_ts,
             trigger_reason="catchup",
+            slots=missed,
         )
 
 
-def recarregar_agendamentos() -> tuple[list, list]:
-    """Remove all non-reload jobs and re-register from spreadsheets."""
-    print("[RELOAD] Hot-reloading schedules...")
-    for job in scheduler.get_jobs():
-        if job.id != "hot_reload_job":
-            job.remove()
+def _apply_catchup(scripts: list[dict]) -> None:
+    """
+    For each active script with slots earlier today that the run journal has
+    no completed run for, enqueue it ONCE with the priority of its oldest
+    missed slot. The run covers all of its missed slots. Runs are admitted
+    at CATCHUP_RATE_PER_MINUTE by a background thread, oldest first.
+    """
+    now = datetime.now(_tz)
+    midnight = now.replace(hour=0, minute=0, second=0, microsecond=0).timestamp()
+    done = run_journal.slots_concluidos(midnight)
+    pending = []
+    for s in scripts:
+        _, all_slots = _timeline_de(_script_job_id(s["script_name"]))
+        lo = bisect.bisect_left(all_slots, midnight)
+        hi = bisect.bisect_right(all_slots, now.timestamp())
+        slots = all_slots[lo:hi]
+        missed = [ts for ts in slots if ts not in done.get(s["script_name"], ())]
+        if not missed:
+            continue
+        oldest = datetime.fromtimestamp(min(missed), tz=_tz)
+        print(f"[CATCHUP] {s['script_name']} missed {len(missed)} slot(s) since {oldest:%H:%M} → enqueuing")
+        pending.append((min(missed), s, missed))
+    if not pending:
+        return
+    pending.sort(key=lambda p: p[0])
+    threading.Thread(target=_admitir_catchup, args=(pending,), daemon=True, name="catchup-admission").start()
 
-    scripts = obter_scripts_agendaveis()
+
+def _calcular_offsets(scripts: list[dict]) -> dict[tuple[str, int], int]:
+    """
+    Seconds after HH:00 each (script, hour) fires at, per SPREAD_MODE.
+    Only top-of-hour expressions (minute field "0") are spread:
+    "hash" gives every script a stable pseudo-random offset inside the window;
+    "duration" packs each hour's scripts longest-first onto MAX_PROCESSOS_SIMULTANEOS
+    lanes using journaled mean durations, so a job starts when a slot should free up.
+    """
+    mode = config.SPREAD_MODE.lower()
+    window = max(1, min(config.SPREAD_WINDOW_MINUTES, 60)) * 60
+    offsets: dict[tuple[str, int], int] = {}
+    scripts = [s for s in scripts if s["cron_expr"].split()[0] == "0"]
+    if mode == "hash":
+        for s in scripts:
+            offset = zlib.crc32(s["script_name"].encode()) % window
+            for hora in s["cron_schedule"]:
+                offsets[(s["script_name"], hora)] = offset
+    elif mode == "duration":
+        durations = run_journal.duracoes_medias()
+        by_hour: dict[int, list[str]] = {}
+        for s in scripts:
+            for hora in s["cron_schedule"]:
+                by_hour.setdefault(hora, []).append(s["script_name"])
+        for hora, names in by_hour.items():
+            lanes = [0.0] * max(1, config.MAX_PROCESSOS_SIMULTANEOS)
+            for name in sorted(names, key=lambda n: (-durations.get(n, _DEFAULT_DURATION), n)):
+                lane = min(range(len(lanes)), key=lanes.__getitem__)
+                offsets[(name, hora)] = int(min(lanes[lane], window - 1))
+                lanes[lane] += durations.get(name, _DEFAULT_DURATION)
+    elif mode != "off":
+        print(f"[WARN] Unknown SPREAD_MODE '{config.SPREAD_MODE}': jobs fire at HH:00.")
+    return offsets
+
+
+def _desired_jobs(scripts: list[dict], workflows: list[dict]) -> dict[str, dict]:
+    """Job specs the spreadsheets ask for, keyed by job id: one job per script/workflow."""
+    global _offsets_planejados
+    offsets = _calcular_offsets(scripts)
+    _offsets_planejados = offsets
+    by_script: dict[str, dict[int, int]] = {}
+    for (name, hora), offset in offsets.items():
+        by_script.setdefault(name, {})[hora] = offset
+    desired = {}
+    specs: dict[str, tuple[str, dict[int, int]]] = {}
     for s in scripts:
-        for hora in s["cron_schedule"]:
-            job_id = f"{s['script_name']}_{hora:02d}h"
-            scheduler.add_job(
-                _job_wrapper,
-                CronTrigger(hour=hora, minute=0, timezone=_tz),
-                id=job_id,
-                name=f"{s['script_name']} @ {hora:02d}:00",
-                args=[s["script_name"], str(s["path_obj"]), s["area_name"]],
-                replace_existing=True,
-                misfire_grace_time=86400,
-                coalesce=True,
-            )
-
-    workflows = obter_workflows()
+        name = s["script_name"]
+        by_hour = by_script.get(name, {})
+        job_id = _script_job_id(name)
+        specs[job_id] = (s["cron_expr"], by_hour)
+        desired[job_id] = {
+            "func": _job_wrapper,
+            "trigger": cron.criar_trigger(s["cron_expr"], _tz, by_hour),
+            "name": f"{name} @ {s['cron_expr']}",
+            "args": [name, str(s["path_obj"]), s["area_name"]],
+            "misfire_grace_time": _MISFIRE_GRACE,
+        }
     for w in workflows:
-        for hora in w["horarios"]:
-            job_id = f"flow_{w['workflow_name']}_{hora:02d}h"
-            scheduler.add_job(
-                _run_workflow_async,
-                CronTrigger(hour=hora, minute=0, timezone=_tz),
-                id=job_id,
-                name=f"WORKFLOW:{w['workflow_name']} @ {hora:02d}:00",
-                args=[w["workflow_name"], w["scripts"]],
-                replace_existing=True,
-                misfire_grace_time=86400,
-                coalesce=True,
-            )
-
-    print(f"[RELOAD OK] {len(scripts)} scripts | {len(workflows)} workflows registered.")
-    return scripts, workflows
+        job_id = f"flow_{w['workflow_name']}"
+        specs[job_id] = (w["cron_expr"], {})
+        desired[job_id] = {
+            "func": _run_workflow_async,
+            "trigger": cron.criar_trigger(w["cron_expr"], _tz),
+            "name": f"WORKFLOW:{w['workflow_name']} @ {w['cron_expr']}",
+            "args": [w["workflow_name"], w["scripts"], w["depends_on"], w["max_parallel"]],
+            "misfire_grace_time": _MISFIRE_GRACE,
+        }
+    _construir_timeline(specs)
+    return desired
+
+
+def _fingerprint(desired: dict[str, dict]) -> str:
+    """Digest of every desired job (call, trigger, misfire policy): equal digests → same jobs."""
+    h = hashlib.sha1()
+    for job_id in sorted(desired):
+        spec = desired[job_id]
+        h.update(repr((
+            job_id, obj_to_ref(spec["func"]), spec["args"], spec["name"],
+            str(spec["trigger"]), spec["misfire_grace_time"],
+        )).encode())
+    return h.hexdigest()
+
+
+def _empty_plan(unchanged: int = 0) -> dict:
+    return {"add": [], "remove": [], "modify": [], "reschedule": [], "unchanged": unchanged}
+
+
+def _diff_jobs(desired: dict[str, dict]) -> dict:
+    """Compares desired specs with the registered jobs. Returns the change plan."""
+    current = {job.id: job for job in scheduler.get_jobs(jobstore=_JOBSTORE) if job.id != "hot_reload_job"}
+    plan = _empty_plan()
+    plan["remove"] = sorted(current.keys() - desired.keys())
+    for job_id, spec in desired.items():
+        job = current.get(job_id)
+        if job is None:
+            plan["add"].append((job_id, spec))
+            continue
+        same_call = (
+            job.func_ref == obj_to_ref(spec["func"]) and list(job.args) == spec["args"]
+            and job.name == spec["name"] and job.misfire_grace_time == spec["misfire_grace_time"]
+        )
+        same_trigger = str(job.trigger) == str(spec["trigger"])
+        if not same_call:
+            plan["modify"].append((job_id, spec))
+        if not same_trigger:
+            plan["reschedule"].append((job_id, spec))
+        if same_call and same_trigger:
+            plan["unchanged"] += 1
+    return plan
+
+
+def _apply_plan(plan: dict) -> dict:
+    """Adds, removes or modifies only the jobs listed in the plan. Returns the change summary."""
+    for job_id in plan["remove"]:
+        scheduler.remove_job(job_id)
+    for job_id, spec in plan["add"]:
+        scheduler.add_job(
+            spec["func"],
+            spec["trigger"],
+            id=job_id,
+            name=spec["name"],
+            args=spec["args"],
+            jobstore=_JOBSTORE,
+            replace_existing=True,
+            misfire_grace_time=spec["misfire_grace_time"],
+            coalesce=True,
+        )
+    for job_id, spec in plan["modify"]:
+        scheduler.modify_job(
+            job_id, func=spec["func"], args=spec["args"], name=spec["name"],
+            misfire_grace_time=spec["misfire_grace_time"],
+        )
+    for job_id, spec in plan["reschedule"]:
+        scheduler.reschedule_job(job_id, trigger=spec["trigger"])
+    return {
+        "added": [job_id for job_id, _ in plan["add"]],
+        "removed": list(plan["remove"]),
+        "modified": sorted({job_id for job_id, _ in plan["modify"] + plan["reschedule"]}),
+        "unchanged": plan["unchanged"],
+    }
+
+
+def recarregar_agendamentos(forcar_scan: bool = True, progresso: dict | None = None) -> tuple[list, list, dict]:
+    """
+    Re-read spreadsheets and bring the registered jobs in line with them.
+    Only jobs that were added, removed or changed are touched; returns
+    (scripts, workflows, changes) with the ids in each change bucket.
+    With the persistent job store, an unchanged job fingerprint skips the
+    diff entirely (the stored jobs are already what the spreadsheets ask for).
+    `progresso`, if given, receives the phase in progress and the duration
+    of each finished phase.
+    """
+    timings: dict[str, float] = {}
+    current: list = [None, 0.0]  # [phase name, perf_counter at its start]
+    if progresso is not None:
+        progresso["timings"] = timings
+
+    def phase(name: str | None) -> None:
+        """Ends the phase in progress (recording its duration) and starts `name`."""
+        now = time.perf_counter()
+        with _reloads_lock:
+            if current[0] is not None:
+                timings[current[0]] = round(now - current[1], 4)
+            current[:] = [name, now]
+            if progresso is not None and name is not None:
+                progresso["phase"] = name
+
+    with _reload_lock:
+        print("[RELOAD] Hot-reloading schedules...")
+        phase("scan")
+        if forcar_scan:
+            buscar_arquivos_locais(forcar=True)
+
+        phase("parse")
+        scripts = obter_scripts_agendaveis()
+        workflows = obter_workflows()
+
+        phase("diff")
+
+        desired = _desired_jobs(scripts, workflows)
+        fingerprint = _fingerprint(desired)
+        if _job_store is not None and _job_store.ler_meta("fingerprint") == fingerprint:
+            plan = _empty_plan(unchanged=len(desired))
+        else:
+            plan = _diff_jobs(desired)
+
+        phase("apply")
+        changes = _apply_plan(plan)
+        if _job_store is not None:
+            _job_store.gravar_meta("fingerprint", fingerprint)
+        phase(None)
+
+        print(
+            f"[RELOAD OK] {len(scripts)} scripts | {len(workflows)} workflows | "
+            f"+{len(changes['added'])} -{len(changes['removed'])} ~{len(changes['modified'])} "
+            f"={changes['unchanged']} jobs."
+        )
+        return scripts, workflows, changes
+
+
+def _executar_recarga(record: dict, forcar_scan: bool) -> None:
+    global _reload_inflight, _reload_followup
+    try:
+        scripts, workflows, changes = recarregar_agendamentos(forcar_scan, progresso=record)
+        with _reloads_lock:
+            record["result"] = {
+                "script_count": len(scripts),
+                "workflow_count": len(workflows),
+                "changes": changes,
+            }
+            record["status"] = "success"
+    except Exception as exc:
+        with _reloads_lock:
+            record["status"] = "error"
+            record["error"] = str(exc)
+        print(f"[ERR] Reload {record['reload_id']} failed: {exc}")
+    finally:
+        with _reloads_lock:
+            record["phase"] = "done"
+            record["finished_at"] = time.time()
+            _reload_inflight = None
+            followup, _reload_followup = _reload_followup, None
+            if followup is not None:
+                _reload_inflight = followup[0]["reload_id"]
+                followup[0]["phase"] = "queued"
+        if followup is not None:
+            _iniciar_thread_recarga(*followup)
+
+
+def _novo_registro(origem: str) -> dict:
+    """New reload record, registered in _reloads. Caller holds _reloads_lock."""
+    reload_id = uuid.uuid4().hex[:12]
+    record = {
+        "reload_id": reload_id,
+        "origin": origem,
+        "status": "running",
+        "phase": "queued",
+        "requested_at": time.time(),
+        "finished_at": None,
+        "timings": {},
+        "coalesced": 0,
+        "result": None,
+        "error": None,
+    }
+    _reloads[reload_id] = record
+    while len(_reloads) > _MAX_RELOAD_RECORDS:
+        _reloads.popitem(last=False)
+    return record
+
+
+def _iniciar_thread_recarga(record: dict, forcar_scan: bool) -> None:
+    threading.Thread(
+        target=_executar_recarga, args=(record, forcar_scan), daemon=True, name=f"reload-{record['reload_id']}"
+    ).start()
+
+
+def solicitar_recarga(origem: str, forcar_scan: bool = True) -> tuple[str, bool]:
+    """
+    Single-flight background reload. Returns (reload_id, coalesced). A request
+    arriving while a reload is still queued or scanning joins it (its parse has
+    not read the spreadsheets yet); once the running reload is past that point, the
+    request gets ONE follow-up reload, shared by every later request, that
+    starts when the running one finishes — so the newest edit is always seen.
+    """
+    global _reload_inflight, _reload_followup
+    with _reloads_lock:
+        if _reload_inflight is not None:
+            inflight = _reloads[_reload_inflight]
+            if inflight["phase"] in ("queued", "scan"):
+                inflight["coalesced"] += 1
+                return _reload_inflight, True
+            if _reload_followup is not None:
+                record, scan = _reload_followup
+                record["coalesced"] += 1
+                _reload_followup = (record, scan or forcar_scan)
+                return record["reload_id"], True
+            record = _novo_registro(origem)
+            record["phase"] = "waiting"
+            _reload_followup = (record, forcar_scan)
+            return record["reload_id"], False
+        record = _novo_registro(origem)
+        _reload_inflight = record["reload_id"]
+    _iniciar_thread_recarga(record, forcar_scan)
+    return record["reload_id"], False
+
+
+def obter_recarga(reload_id: str) -> dict | None:
+    with _reloads_lock:
+        record = _reloads.get(reload_id)
+        return copy.deepcopy(record) if record else None
+
+
+def _recarga_automatica() -> None:
+    solicitar_recarga("interval")
+
+
+def _verificar_snapshot() -> None:
+    """Background boot step: check snapshot-served state against disk, reload on drift."""
+    started = time.time()
+    versao = scanner.versao_indice()
+    buscar_arquivos_locais(forcar=True)
+    registry_changed = registry.verificar_snapshot()
+    if registry_changed or scanner.versao_indice() != versao:
+        print("[SNAPSHOT] Disk differs from snapshot — reloading schedules.")
+        solicitar_recarga("snapshot", forcar_scan=False)
+    print(f"[SNAPSHOT] Verification finished in {time.time() - started:.1f}s.")
 
 
 def iniciar_scheduler() -> None:
-    scripts, _ = recarregar_agendamentos()
-    _apply_catchup(scripts)
+    """
+    Starts the scheduler paused so persisted jobs are visible to the first
+    reload, then resumes it. With persisted jobs, missed fires are handled by
+    APScheduler from their stored next-run times (one coalesced run within
+    MISFIRE_GRACE_SECONDS); otherwise the run journal drives catch-up.
+    """
+    from_snapshot = scanner.restaurar_snapshot() and registry.restaurar_snapshot()
+    scheduler.start(paused=True)
+    had_jobs = _job_store is not None and not _job_store.vazio()
+    scripts, _, _ = recarregar_agendamentos(forcar_scan=not from_snapshot)
+    if had_jobs:
+        print("[BOOT] Jobs restored from the persistent job store — misfires handled from stored next-run times.")
+    else:
+        _apply_catchup(scripts)
     scheduler.add_job(
-        recarregar_agendamentos,
+        _recarga_automatica,
         "interval",
         minutes=config.RELOAD_INTERVAL_MINUTES,
         id="hot_reload_job",
         name="Hot-Reload (auto)",
+        replace_existing=True,
     )
-    scheduler.start()
+    scheduler.resume()
     print(f"[BOOT] APScheduler started (timezone: {config.TIMEZONE}, CPU: ~0%).")
+    if from_snapshot:
+        threading.Thread(target=_verificar_snapshot, daemon=True, name="snapshot-verify").start()
 
 
 def pausar_tudo() -> None:
@@ -120,11 +529,42 @@ def retomar_tudo() -> None:
 def obter_jobs() -> list[dict]:
     jobs = []
     for job in scheduler.get_jobs():
-        next_run = job.next_run_time
+        is_cron = not isinstance(job.trigger, IntervalTrigger)
+        if is_cron:
+            next_ts = proximo_disparo(job.id)
+            next_run = datetime.fromtimestamp(next_ts, tz=_tz) if next_ts else None
+        else:
+            next_run = getattr(job, "next_run_time", None)
         jobs.append({
             "id": job.id,
             "name": job.name or job.id,
             "next_run_br": next_run.astimezone(_tz).isoformat() if next_run else None,
-            "trigger": "cron" if "cron" in job.id or "flow_" in job.id else "interval",
+            "trigger": "cron" if is_cron else "interval",
         })
     return sorted(jobs, key=lambda j: j["next_run_br"] or "")
+
+
+def obter_skew() -> dict:
+    """Planned offsets vs. observed start skew (actual - expected start), per hour."""
+    hours: dict[str, dict] = {}
+    for (name, hora), offset in sorted(_offsets_planejados.items(), key=lambda kv: (kv[0][1], kv[1])):
+        hours.setdefault(f"{hora:02d}", {"planned": [], "runs": 0})["planned"].append(
+            {"script_name": name, "offset_seconds": offset}
+        )
+    by_hour: dict[str, list[float]] = {}
+    for expected, actual in list(executor.start_skew):
+        by_hour.setdefault(f"{datetime.fromtimestamp(expected, tz=_tz).hour:02d}", []).append(actual - expected)
+    for hora, skews in by_hour.items():
+        skews.sort()
+        entry = hours.setdefault(hora, {"planned": [], "runs": 0})
+        entry.update({
+            "runs": len(skews),
+            "mean_skew_seconds": round(sum(skews) / len(skews), 2),
+            "p95_skew_seconds": round(skews[min(len(skews) - 1, int(len(skews) * 0.95))], 2),
+            "max_skew_seconds": round(skews[-1], 2),
+        })
+    return {
+        "mode": config.SPREAD_MODE.lower(),
+        "window_minutes": config.SPREAD_WINDOW_MINUTES,
+        "hours": dict(sorted(hours.items())),
+    }
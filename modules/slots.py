@@ -0,0 +1,156 @@
+import threading
+import time
+
+
+class SlotLedger:
+    """
+    Explicit accounting of execution slots, keyed by run id.
+
+    Slots are weighted: a run holds `weight` units of the global capacity and
+    of its area's and resource class's pools (when those have a limit). A run
+    heavier than a pool's limit is admitted only while it runs alone there.
+    Releasing is idempotent, so a run that is both killed and reaped gives its
+    units back once. Invariants (0 <= in use <= capacity at admission, holders
+    match the acquire/release counters) are checked on every change and
+    violations are counted instead of silently over-admitting. Lanes may
+    reserve units: a run of another lane is not admitted into the part of the
+    capacity a lane has reserved and is not using. Capacity may
+    be changed at runtime (see modules/adaptive.py); lowering it never
+    preempts running work, it only stops admissions until usage drops.
+    """
+
+    def __init__(self, capacity: int, area_limits: dict[str, int] | None = None,
+                 class_limits: dict[str, int] | None = None, lane_reserved: dict[str, int] | None = None):
+        self.capacity = max(1, capacity)
+        self.area_limits = {k.lower(): max(1, v) for k, v in (area_limits or {}).items()}
+        self.class_limits = {k.lower(): max(1, v) for k, v in (class_limits or {}).items()}
+        self.lane_reserved = {k.lower(): max(0, v) for k, v in (lane_reserved or {}).items()}
+        self._holders: dict[str, dict] = {}
+        self._in_use = 0
+        self._area_use: dict[str, int] = {}
+        self._class_use: dict[str, int] = {}
+        self._lane_use: dict[str, int] = {}
+        self._lock = threading.Lock()
+        self._created = time.monotonic()
+        self._last_change = self._created
+        self._busy_slot_seconds = 0.0
+        self._capacity_seconds = 0.0
+        self._acquired = 0
+        self._released = 0
+        self._duplicate_releases = 0
+        self._invariant_violations = 0
+        self._blocked = {"global": 0, "reserved": 0, "area": 0, "resource_class": 0}
+        self._peak = 0
+
+    def _accumulate(self) -> None:
+        now = time.monotonic()
+        self._busy_slot_seconds += self._in_use * (now - self._last_change)
+        self._capacity_seconds += self.capacity * (now - self._last_change)
+        self._last_change = now
+
+    def _check(self, admitted: bool = False) -> None:
+        held = sum(h["weight"] for h in self._holders.values())
+        if (self._in_use < 0 or (admitted and self._in_use > self.capacity) or held != self._in_use
+                or self._acquired - self._released != len(self._holders)):
+            self._invariant_violations += 1
+            print(
+                f"[WARN] [SLOTS] Invariant violated: in_use={self._in_use} held={held} capacity={self.capacity} "
+                f"acquired={self._acquired} released={self._released}"
+            )
+
+    @staticmethod
+    def _fits(used: int, limit: int | None, weight: int) -> bool:
+        return limit is None or used == 0 or used + weight <= limit
+
+    @staticmethod
+    def _pools(use: dict[str, int], limits: dict[str, int]) -> dict:
+        names = sorted(set(limits) | {name for name, used in use.items() if used})
+        return {name: {"in_use": use.get(name, 0), "limit": limits.get(name)} for name in names}
+
+    def _reserved_for_others(self, lane: str) -> int:
+        return sum(max(0, units - self._lane_use.get(other, 0))
+                   for other, units in self.lane_reserved.items() if other != lane)
+
+    def livres(self) -> int:
+        with self._lock:
+            return self.capacity - self._in_use
+
+    def adquirir(self, run_id: str, script_name: str, weight: int = 1,
+                 area: str = "", resource_class: str = "default", lane: str = "scheduled") -> str | None:
+        """
+        Takes `weight` units for `run_id`. Returns None when admitted, otherwise
+        the pool that is full: "global", "reserved" (the free units are held
+        for other lanes), "area" or "resource_class".
+        """
+        weight = min(max(1, weight), self.capacity)
+        with self._lock:
+            if run_id in self._holders or self._in_use + weight > self.capacity:
+                blocked = "global"
+            elif self._in_use + weight > self.capacity - self._reserved_for_others(lane):
+                blocked = "reserved"
+            elif not self._fits(self._area_use.get(area, 0), self.area_limits.get(area), weight):
+                blocked = "area"
+            elif not self._fits(self._class_use.get(resource_class, 0), self.class_limits.get(resource_class), weight):
+                blocked = "resource_class"
+            else:
+                blocked = None
+            if blocked:
+                self._blocked[blocked] += 1
+                return blocked
+            self._accumulate()
+            self._holders[run_id] = {
+                "script_name": script_name, "weight": weight, "area": area,
+                "resource_class": resource_class, "lane": lane, "since": time.time(),
+            }
+            self._in_use += weight
+            self._area_use[area] = self._area_use.get(area, 0) + weight
+            self._class_use[resource_class] = self._class_use.get(resource_class, 0) + weight
+            self._lane_use[lane] = self._lane_use.get(lane, 0) + weight
+            self._acquired += 1
+            self._peak = max(self._peak, self._in_use)
+            self._check(admitted=True)
+            return None
+
+    def liberar(self, run_id: str) -> bool:
+        """Gives back the units held by `run_id`. Returns False if they were already released."""
+        with self._lock:
+            holder = self._holders.pop(run_id, None)
+            if holder is None:
+                self._duplicate_releases += 1
+                return False
+            self._accumulate()
+            self._in_use -= holder["weight"]
+            self._area_use[holder["area"]] -= holder["weight"]
+            self._class_use[holder["resource_class"]] -= holder["weight"]
+            self._lane_use[holder["lane"]] -= holder["weight"]
+            self._released += 1
+            self._check()
+            return True
+
+    def definir_capacidade(self, capacity: int) -> None:
+        with self._lock:
+            self._accumulate()
+            self.capacity = max(1, capacity)
+
+    def stats(self) -> dict:
+        with self._lock:
+            self._accumulate()
+            return {
+                "capacity": self.capacity,
+                "in_use": self._in_use,
+                "peak_in_use": self._peak,
+                "acquired": self._acquired,
+                "released": self._released,
+                "duplicate_releases": self._duplicate_releases,
+                "invariant_violations": self._invariant_violations,
+                "admission_blocks": dict(self._blocked),
+                "busy_slot_seconds": round(self._busy_slot_seconds, 1),
+                "utilization": round(self._busy_slot_seconds / max(self._capacity_seconds, 1e-9), 4),
+                "areas": self._pools(self._area_use, self.area_limits),
+                "resource_classes": self._pools(self._class_use, self.class_limits),
+                "lanes": {
+                    name: {"in_use": self._lane_use.get(name, 0), "reserved": self.lane_reserved.get(name, 0)}
+                    for name in sorted(set(self.lane_reserved) | {n for n, used in self._lane_use.items() if used})
+                },
+                "holders": {run_id: dict(h) for run_id, h in self._holders.items()},
+            }
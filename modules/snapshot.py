@@ -0,0 +1,55 @@
+import json
+import os
+import threading
+from modules.config import config
+
+# One JSON document with a section per producer (scanner, registry).
+# Sections are written as the in-memory state changes and read back on boot,
+# so the server can schedule before touching the automation share.
+_SNAPSHOT_VERSION = 6
+_path = config.DIRETORIO_DADOS / "scan_snapshot.json"
+_doc: dict | None = None
+_lock = threading.Lock()
+
+
+def _load() -> dict:
+    global _doc
+    if _doc is None:
+        _doc = {}
+        if config.SCAN_SNAPSHOT and _path.exists():
+            try:
+                with open(_path, encoding="utf-8") as f:
+                    data = json.load(f)
+                if data.get("version") == _SNAPSHOT_VERSION:
+                    _doc = data
+                else:
+                    print(f"[SNAPSHOT] Ignoring {_path}: incompatible version.")
+            except Exception as exc:
+                print(f"[WARN] Failed to read snapshot {_path}: {exc}")
+    return _doc
+
+
+def ler_secao(nome: str) -> dict | None:
+    """Returns a section of the persisted snapshot, or None if absent/disabled."""
+    if not config.SCAN_SNAPSHOT:
+        return None
+    with _lock:
+        return _load().get(nome)
+
+
+def salvar_secao(nome: str, dados: dict) -> None:
+    """Replaces one section and rewrites the snapshot file atomically."""
+    if not config.SCAN_SNAPSHOT:
+        return
+    with _lock:
+        doc = _load()
+        doc["version"] = _SNAPSHOT_VERSION
+        doc[nome] = dados
+        tmp = _path.with_suffix(".tmp")
+        try:
+            _path.parent.mkdir(parents=True, exist_ok=True)
+            with open(tmp, "w", encoding="utf-8") as f:
+                json.dump(doc, f, separators=(",", ":"), default=str)
+            os.replace(tmp, _path)
+        except Exception as exc:
+            print(f"[WARN] Failed to write snapshot {_path}: {exc}")
@@ -0,0 +1,269 @@
+import heapq
+import itertools
+import threading
+import time
+from typing import Callable
+
+# Entry layout inside a lane's heap: [priority, seq, name, task, lane]; task is None once removed.
+_PRIORITY, _SEQ, _NAME, _TASK, _LANE = range(5)
+
+# Tie-break between lanes with equal virtual time (unknown lanes sort after, by name)
+LANE_ORDER = ("manual", "retry", "scheduled", "catchup")
+
+
+class IndexedTaskQueue:
+    """
+    Priority queue of script runs, split into lanes, with a name → entry index
+    under one lock.
+
+    - put_if_absent: atomic dedup against queued AND running names, O(log n)
+    - remove / reprioritize: O(log n) — the old heap entry is tombstoned and
+      skipped (and periodically compacted) instead of being searched for
+    - get: blocks until a task is available and admitted; the name moves to
+      the running set in the same critical section, so there is no window
+      where a script is neither queued nor running. Admission can skip a
+      blocked head task and take the next admissible one in priority order
+    - snapshot: projected dispatch order for /api/status, cached until the
+      queue changes
+
+    Each lane is its own heap (lower priority values first; ties in insertion
+    order). Lanes share dispatches by weight (weighted fair queuing): every
+    dispatch advances its lane's virtual time by 1 / weight and the non-empty
+    lane with the lowest virtual time goes first. A lane that was empty
+    restarts at the current minimum: idle time is not banked as credit and
+    past service is not carried as debt.
+    """
+
+    def __init__(self, lane_weights: dict[str, float] | None = None):
+        self._weights = {lane: max(0.01, float(w)) for lane, w in (lane_weights or {}).items()}
+        self._heaps: dict[str, list[list]] = {}
+        self._sizes: dict[str, int] = {}
+        self._vtime: dict[str, float] = {}
+        self._dispatched: dict[str, int] = {}
+        self._index: dict[str, list] = {}
+        self._running: set[str] = set()
+        self._seq = itertools.count()
+        self._tombstones: dict[str, int] = {}
+        self._version = 0
+        self._ordered: tuple[int, list, tuple] = (-1, [], ())
+        self._cond = threading.Condition(threading.Lock())
+
+    # ── admission ────────────────────────────────────────────────────────────
+
+    def put_if_absent(
+        self,
+        name: str,
+        priority: float,
+        task: dict,
+        on_duplicate: Callable[[dict], None] | None = None,
+        lane: str = "scheduled",
+        on_enqueue: Callable[[dict], None] | None = None,
+    ) -> str:
+        """
+        Enqueues `task` in `lane` unless `name` is already queued or running.
+        Returns "enqueued", "queued" or "running". On a queued duplicate,
+        `on_duplicate(existing_task)` runs under the lock (e.g. to merge slots);
+        `on_enqueue(task)` runs under the lock once enqueued, before any get()
+        can take it (e.g. to persist the transition in order).
+        """
+        with self._cond:
+            if name in self._running:
+                return "running"
+            entry = self._index.get(name)
+            if entry is not None:
+                if on_duplicate is not None:
+                    on_duplicate(entry[_TASK])
+                    self._version += 1
+                return "queued"
+            self._push(name, priority, task, lane)
+            if on_enqueue is not None:
+                on_enqueue(task)
+            self._cond.notify()
+            return "enqueued"
+
+    def _weight(self, lane: str) -> float:
+        return self._weights.get(lane, 1.0)
+
+    def _push(self, name: str, priority: float, task: dict, lane: str) -> None:
+        if not self._sizes.get(lane):
+            active = [self._vtime[other] for other, size in self._sizes.items() if size]
+            self._vtime[lane] = min(active) if active else self._vtime.get(lane, 0.0)
+        entry = [priority, next(self._seq), name, task, lane]
+        self._index[name] = entry
+        heapq.heappush(self._heaps.setdefault(lane, []), entry)
+        self._sizes[lane] = self._sizes.get(lane, 0) + 1
+        self._version += 1
+
+    def _discard(self, entry: list) -> None:
+        """Takes a live entry out of its lane (popped if at the top, tombstoned otherwise)."""
+        lane = entry[_LANE]
+        heap = self._heaps[lane]
+        del self._index[entry[_NAME]]
+        self._sizes[lane] -= 1
+        self._version += 1
+        if heap[0] is entry:
+            heapq.heappop(heap)
+            return
+        entry[_TASK] = None
+        self._tombstones[lane] = self._tombstones.get(lane, 0) + 1
+        if self._tombstones[lane] > 64 and self._tombstones[lane] > self._sizes[lane]:
+            self._heaps[lane] = [e for e in heap if e[_TASK] is not None]
+            heapq.heapify(self._heaps[lane])
+            self._tombstones[lane] = 0
+
+    def _tombstone(self, name: str) -> list | None:
+        entry = self._index.get(name)
+        if entry is None:
+            return None
+        removed = list(entry)
+        self._discard(entry)
+        return removed
+
+    def remove(self, name: str) -> dict | None:
+        """Drops a queued task. Returns it, or None if `name` was not queued."""
+        with self._cond:
+            removed = self._tombstone(name)
+            return removed[_TASK] if removed else None
+
+    def reprioritize(self, name: str, priority: float) -> bool:
+        """Moves a queued task to a new priority (keeps its task dict)."""
+        with self._cond:
+            removed = self._tombstone(name)
+            if removed is None:
+                return False
+            self._push(name, priority, removed[_TASK], removed[_LANE])
+            self._cond.notify()
+            return True
+
+    # ── dispatch ─────────────────────────────────────────────────────────────
+
+    def _head(self, lane: str) -> list | None:
+        heap = self._heaps.get(lane)
+        while heap and heap[0][_TASK] is None:
+            heapq.heappop(heap)
+            self._tombstones[lane] -= 1
+        return heap[0] if heap else None
+
+    def _lane_rank(self, lane: str) -> tuple:
+        return (LANE_ORDER.index(lane), "") if lane in LANE_ORDER else (len(LANE_ORDER), lane)
+
+    def _lanes(self) -> list[str]:
+        """Non-empty lanes, next to be served first."""
+        return sorted((lane for lane, size in self._sizes.items() if size),
+                      key=lambda lane: (self._vtime[lane], self._lane_rank(lane)))
+
+    def _entries(self) -> list[list]:
+        """
+        Queued entries in projected dispatch order (the fair-share interleaving
+        of the lanes, assuming each task is admitted in turn), cached until the
+        queue changes.
+        """
+        version, entries, _ = self._ordered
+        if version != self._version:
+            per_lane = {
+                lane: sorted((e for e in self._index.values() if e[_LANE] == lane),
+                             key=lambda e: (e[_PRIORITY], e[_SEQ]), reverse=True)
+                for lane in self._lanes()
+            }
+            vtime = {lane: self._vtime[lane] for lane in per_lane}
+            entries = []
+            while per_lane:
+                lane = min(per_lane, key=lambda lane: (vtime[lane], self._lane_rank(lane)))
+                entries.append(per_lane[lane].pop())
+                vtime[lane] += 1.0 / self._weight(lane)
+                if not per_lane[lane]:
+                    del per_lane[lane]
+            self._ordered = (self._version, entries, tuple((e[_PRIORITY], e[_TASK]) for e in entries))
+        return entries
+
+    def _select(self, admitir: Callable[[dict], str] | None) -> list | None:
+        """
+        First admitted entry. Lanes are tried in fair-share order; inside a
+        lane it walks past "skip" verdicts, and the first "wait" stops it all.
+        """
+        for lane in self._lanes():
+            head = self._head(lane)
+            if admitir is None:
+                return head
+            verdict = admitir(head[_TASK])
+            if verdict != "skip":
+                return head if verdict == "admit" else None
+            for entry in self._entries():
+                if entry[_LANE] != lane or entry is head:
+                    continue
+                verdict = admitir(entry[_TASK])
+                if verdict != "skip":
+                    return entry if verdict == "admit" else None
+        return None
+
+    def get(
+        self,
+        timeout: float | None = None,
+        admitir: Callable[[dict], str] | None = None,
+    ) -> tuple[float, dict] | None:
+        """
+        Pops the next admissible task and marks its name running.
+        `admitir(task)` runs under the lock and returns "admit", "skip" (this
+        task is blocked, try the next one) or "wait" (nothing may pass it, e.g.
+        no free capacity or queue frozen); the caller then sleeps until
+        notificar(). Blocks until a task is admitted (None after `timeout` seconds).
+        """
+        deadline = None if timeout is None else time.monotonic() + timeout
+        with self._cond:
+            while True:
+                entry = self._select(admitir)
+                if entry is not None:
+                    task, lane = entry[_TASK], entry[_LANE]
+                    self._discard(entry)
+                    self._vtime[lane] += 1.0 / self._weight(lane)
+                    self._dispatched[lane] = self._dispatched.get(lane, 0) + 1
+                    self._running.add(entry[_NAME])
+                    return entry[_PRIORITY], task
+                remaining = None if deadline is None else deadline - time.monotonic()
+                if remaining is not None and remaining <= 0:
+                    return None
+                self._cond.wait(remaining)
+
+    def notificar(self) -> None:
+        """Wakes blocked get() callers so they re-evaluate admission."""
+        with self._cond:
+            self._cond.notify_all()
+
+    def concluir(self, name: str) -> None:
+        """Releases a running name so the script can be enqueued again."""
+        with self._cond:
+            self._running.discard(name)
+
+    # ── inspection ───────────────────────────────────────────────────────────
+
+    def __contains__(self, name: str) -> bool:
+        with self._cond:
+            return name in self._index
+
+    def qsize(self) -> int:
+        with self._cond:
+            return len(self._index)
+
+    def running(self) -> set[str]:
+        with self._cond:
+            return set(self._running)
+
+    def lanes(self) -> dict[str, dict]:
+        """Per-lane queued count, weight, virtual time and dispatches so far."""
+        with self._cond:
+            names = sorted(set(self._weights) | set(self._sizes), key=self._lane_rank)
+            return {
+                lane: {
+                    "queued": self._sizes.get(lane, 0),
+                    "weight": self._weight(lane),
+                    "virtual_time": round(self._vtime.get(lane, 0.0), 3),
+                    "dispatched": self._dispatched.get(lane, 0),
+                }
+                for lane in names
+            }
+
+    def snapshot(self) -> tuple[tuple[float, dict], ...]:
+        """((priority, task), ...) in projected dispatch order. Rebuilt only after a change."""
+        with self._cond:
+            self._entries()
+            return self._ordered[2]
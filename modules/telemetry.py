@@ -0,0 +1,151 @@
+import threading
+import time
+from collections import OrderedDict, deque
+from typing import Callable
+import psutil
+from modules.config import config
+
+# Resource telemetry of running scripts, gathered by ONE sampler thread.
+# Every TELEMETRY_INTERVAL_SECONDS each running PID and its process tree is
+# sampled (CPU %, RSS, IO bytes, child count) into a fixed-size series per
+# run; peaks are kept when the run ends.
+
+_MAX_FINISHED = 200
+_MB = 1024 * 1024
+
+
+class _RunTelemetry:
+    __slots__ = ("run_id", "script_name", "procs", "series", "peaks")
+
+    def __init__(self, run_id: str | None, script_name: str, pid: int):
+        self.run_id = run_id
+        self.script_name = script_name
+        self.procs: dict[int, psutil.Process] = {}
+        self.series: deque = deque(maxlen=max(1, config.TELEMETRY_SAMPLES))
+        self.peaks = {"cpu_percent": 0.0, "rss_mb": 0.0, "children": 0, "read_mb": 0.0, "write_mb": 0.0}
+        try:
+            proc = psutil.Process(pid)
+            proc.cpu_percent(None)
+            self.procs[pid] = proc
+        except psutil.Error:
+            pass
+
+    def sample(self, pid: int) -> tuple | None:
+        """One reading of the process tree (psutil calls, done outside the module lock)."""
+        root = self.procs.get(pid)
+        if root is None:
+            return None
+        try:
+            tree = [root, *root.children(recursive=True)]
+        except psutil.Error:
+            return None
+        cpu = rss = read = write = 0.0
+        alive = {}
+        for proc in tree:
+            proc = self.procs.get(proc.pid, proc)
+            try:
+                with proc.oneshot():
+                    cpu += proc.cpu_percent(None)
+                    rss += proc.memory_info().rss
+                    try:
+                        io = proc.io_counters()
+                        read += io.read_bytes
+                        write += io.write_bytes
+                    except (AttributeError, psutil.AccessDenied):
+                        pass
+            except psutil.Error:
+                continue
+            alive[proc.pid] = proc
+        self.procs = alive
+        return (round(time.time(), 1), round(cpu, 1), round(rss / _MB, 1),
+                round(read / _MB, 2), round(write / _MB, 2), max(0, len(alive) - 1))
+
+    def record(self, point: tuple) -> None:
+        self.series.append(point)
+        peaks = self.peaks
+        peaks["cpu_percent"] = max(peaks["cpu_percent"], point[1])
+        peaks["rss_mb"] = max(peaks["rss_mb"], point[2])
+        peaks["read_mb"] = max(peaks["read_mb"], point[3])
+        peaks["write_mb"] = max(peaks["write_mb"], point[4])
+        peaks["children"] = max(peaks["children"], point[5])
+
+    def export(self, with_series: bool = True) -> dict:
+        last = self.series[-1] if self.series else None
+        data = {
+            "cpu_percent": last[1] if last else None,
+            "rss_mb": last[2] if last else None,
+            "read_mb": last[3] if last else None,
+            "write_mb": last[4] if last else None,
+            "children": last[5] if last else None,
+            "peaks": dict(self.peaks),
+        }
+        if with_series:
+            # compact columns: [ts, cpu_percent, rss_mb, read_mb, write_mb, children]
+            data["series"] = [list(p) for p in self.series]
+        return data
+
+
+_runs: dict[int, _RunTelemetry] = {}
+_finished: "OrderedDict[str, dict]" = OrderedDict()
+_lock = threading.Lock()
+
+
+def registrar(pid: int, run_id: str | None, script_name: str) -> None:
+    """Starts tracking a run (the first CPU reading needs a baseline)."""
+    if config.TELEMETRY_INTERVAL_SECONDS <= 0:
+        return
+    entry = _RunTelemetry(run_id, script_name, pid)
+    with _lock:
+        _runs[pid] = entry
+
+
+def finalizar(pid: int) -> dict | None:
+    """Stops tracking a run. Returns its peaks (also kept for /api/status)."""
+    with _lock:
+        entry = _runs.pop(pid, None)
+        if entry is None:
+            return None
+        peaks = {**entry.peaks, "samples": len(entry.series)}
+        _finished[entry.run_id or str(pid)] = {"script_name": entry.script_name, "finished_at": time.time(), **peaks}
+        while len(_finished) > _MAX_FINISHED:
+            _finished.popitem(last=False)
+    return peaks
+
+
+def obter(pid: int, with_series: bool = True) -> dict | None:
+    with _lock:
+        entry = _runs.get(pid)
+        return entry.export(with_series) if entry else None
+
+
+def picos_recentes(limit: int = 20) -> list[dict]:
+    """Peaks of the most recently finished runs, newest first."""
+    with _lock:
+        items = list(_finished.items())[-limit:]
+    return [{"run_id": run_id, **peaks} for run_id, peaks in reversed(items)]
+
+
+def _loop(running_pids: Callable[[], set[int]]) -> None:
+    while True:
+        time.sleep(config.TELEMETRY_INTERVAL_SECONDS)
+        try:
+            live = running_pids()
+            with _lock:
+                entries = list(_runs.items())
+            for pid, entry in entries:
+                if pid not in live:
+                    finalizar(pid)
+                    continue
+                point = entry.sample(pid)
+                if point is not None:
+                    with _lock:
+                        entry.record(point)
+        except Exception as exc:
+            print(f"[WARN] Telemetry sample failed: {exc}")
+
+
+def iniciar(running_pids: Callable[[], set[int]]) -> None:
+    """Starts the sampler thread; `running_pids` returns the PIDs still running."""
+    if config.TELEMETRY_INTERVAL_SECONDS <= 0:
+        return
+    threading.Thread(target=_loop, args=(running_pids,), daemon=True, name="telemetry-sampler").start()
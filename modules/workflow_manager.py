@@ -1,9 +1,11 @@
-import subprocess
-import sys
+import os
 import time
 import threading
-from modules import executor
+import uuid
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from modules import deadlines, executor, history, launcher, registry, run_logs, telemetry
 from modules import scheduler_engine
+from modules.config import config
 from modules.scanner import buscar_arquivos_locais
 
 _state: dict = {
@@ -12,6 +14,7 @@ _state: dict = {
     "current_script": None,
     "progress": None,
     "log": [],
+    "timing": None,
 }
 _lock = threading.Lock()
 
@@ -25,15 +28,170 @@ def is_active() -> bool:
     return _state["active"]
 
 
-def iniciar_workflow(workflow_name: str, script_names: list[str]) -> None:
+def _run_step(workflow_name: str, script_name: str, step: str, path) -> dict:
+    """Runs one workflow step to completion (blocking). Returns its log entry."""
+    run_id = uuid.uuid4().hex[:12]
+    step_log = {"script": script_name, "step": step, "status": "not_found", "run_id": run_id,
+                "started_at": time.time(), "duration": 0.0}
+    if path is None:
+        print(f"[WARN] Workflow step '{script_name}' not found on disk — skipping.")
+        return step_log
+
+    profile = registry.obter_script(script_name) or {}
+    _reservar_slot(run_id, script_name, profile)
+    print(f"[WORKFLOW] Step {step}: {script_name}")
+    proc = None
+    step_log["started_at"] = time.time()
+    timeout = profile.get("timeout_seconds") or config.DEFAULT_TIMEOUT_SECONDS or None
+    run = {
+        "run_id": run_id,
+        "script_name": script_name,
+        "area_name": workflow_name.upper(),
+        "trigger_reason": "workflow",
+        "is_workflow": 1,
+        "queued_at": None,
+        "started_at": step_log["started_at"],
+    }
+    try:
+        pipes = run_logs.abrir_captura(run_id, script_name)
+        try:
+            proc = launcher.iniciar_processo(
+                path, stdout=pipes and pipes[0], stderr=pipes and pipes[1], limits=executor.limites(profile),
+            )
+        finally:
+            for fd in pipes or ():
+                os.close(fd)
+        if timeout:
+            deadlines.agendar(run_id, proc.pid, timeout, f"[FLOW] {script_name}")
+        with executor._running_lock:
+            executor.running_processes[proc.pid] = {
+                "pid": proc.pid,
+                "run_id": run_id,
+                "proc_obj": proc,
+                "script_name": f"[FLOW] {script_name}",
+                "area_name": workflow_name.upper(),
+                "start_time": run["started_at"],
+                "is_workflow_item": True,
+                "trigger_reason": "workflow",
+            }
+        telemetry.registrar(proc.pid, run_id, script_name)
+        proc.wait()
+        timed_out = deadlines.concluir(run_id)
+        step_log["peaks"] = telemetry.finalizar(proc.pid)
+        if timed_out:
+            status = f"timeout ({timeout:g}s)"
+        else:
+            status = "success" if proc.returncode == 0 else f"error (exit {proc.returncode})"
+        ended = time.time()
+        history.registrar({
+            **run, "ended_at": ended, "duration": ended - run["started_at"],
+            "exit_code": proc.returncode, "outcome": history.resultado(proc.returncode, timed_out),
+        }, step_log["peaks"])
+    except Exception as exc:
+        status = f"exception: {exc}"
+        print(f"[CRIT] Workflow step {script_name}: {exc}")
+        history.registrar({**run, "ended_at": time.time(), "outcome": "launch_error"})
+    finally:
+        deadlines.concluir(run_id)
+        if proc:
+            with executor._running_lock:
+                executor.running_processes.pop(proc.pid, None)
+        executor.slot_ledger.liberar(run_id)
+
+    step_log["status"] = status
+    step_log["duration"] = round(time.time() - step_log["started_at"], 2)
+    print(f"[WORKFLOW] Step {step} done: {status} ({step_log['duration']:.1f}s)")
+    return step_log
+
+
+def _reservar_slot(run_id: str, script_name: str, profile: dict) -> None:
     """
-    Runs workflow sequentially in the calling thread.
+    Holds the step's weighted slot in the executor's SlotLedger for the whole
+    run (same area/resource-class pools as a queued run), waiting while it is
+    full, so a workflow never runs more than the server-wide capacity.
+    """
+    waiting = False
+    while executor.slot_ledger.adquirir(
+        run_id, script_name, profile.get("slot_weight", 1),
+        profile.get("area_name", ""), profile.get("resource_class", "default"),
+    ) is not None:
+        if not waiting:
+            print(f"[WORKFLOW] {script_name} waiting for a free slot.")
+            waiting = True
+        time.sleep(0.2)
+
+
+def _ordem_topologica(waits: dict[int, set[int]]) -> list[int]:
+    """Step indices with every step after the steps it waits for (Kahn)."""
+    pending = {i: len(before) for i, before in waits.items()}
+    dependents: dict[int, list[int]] = {i: [] for i in waits}
+    for i, before in waits.items():
+        for j in before:
+            dependents[j].append(i)
+    ready = sorted(i for i, n in pending.items() if n == 0)
+    order = []
+    while ready:
+        i = ready.pop()
+        order.append(i)
+        for k in dependents[i]:
+            pending[k] -= 1
+            if pending[k] == 0:
+                ready.append(k)
+    return order
+
+
+def caminho_critico(durations: list[float], waits: dict[int, set[int]]) -> tuple[list[int], float]:
+    """
+    Longest chain of dependent steps by duration: (step indices in order, total
+    seconds). No amount of parallelism finishes the workflow faster than this.
+    """
+    if not durations:
+        return [], 0.0
+    finish: dict[int, float] = {}
+    via: dict[int, int | None] = {}
+    for i in _ordem_topologica(waits):
+        before = max(waits[i], key=finish.__getitem__, default=None)
+        via[i] = before
+        finish[i] = durations[i] + (finish[before] if before is not None else 0.0)
+    last = max(finish, key=finish.__getitem__)
+    path = [last]
+    while via[path[-1]] is not None:
+        path.append(via[path[-1]])
+    return path[::-1], finish[last]
+
+
+def iniciar_workflow(
+    workflow_name: str,
+    script_names: list[str],
+    depends_on: dict[str, list[str]] | None = None,
+    max_parallel: int | None = None,
+) -> None:
+    """
+    Runs workflow in the calling thread.
     Must be called from a daemon thread (started by api.py endpoint).
+
+    Without `depends_on` the steps run one after another in sheet order, each
+    after the previous one whatever its outcome. With it the steps form a DAG:
+    a step starts once every step it depends on succeeded (it is skipped if one
+    did not), and up to `max_parallel` (default WORKFLOW_MAX_PARALLEL) ready
+    steps run at once — never more than the executor's slot capacity, and
+    every step holds its slots in the executor's SlotLedger while it runs.
     """
-    print(f"\n[WORKFLOW] Starting: {workflow_name} ({len(script_names)} scripts)")
+    total = len(script_names)
+    if depends_on:
+        waits = {
+            i: {j for j, other in enumerate(script_names) if other in depends_on.get(name, ())}
+            for i, name in enumerate(script_names)
+        }
+        parallel = max(1, min(int(max_parallel or config.WORKFLOW_MAX_PARALLEL), executor.slot_ledger.capacity))
+    else:
+        waits = {i: {i - 1} if i else set() for i in range(total)}
+        parallel = 1
+    print(f"\n[WORKFLOW] Starting: {workflow_name} ({total} scripts, up to {parallel} at once)")
 
     with _lock:
-        _state.update({"active": True, "name": workflow_name, "log": [], "current_script": None, "progress": None})
+        _state.update({"active": True, "name": workflow_name, "log": [], "current_script": None,
+                       "progress": None, "timing": None})
 
     scheduler_engine.pausar_tudo()
     executor.set_workflow_state(True)
@@ -43,59 +201,59 @@ def iniciar_workflow(workflow_name: str, script_names: list[str]) -> None:
     time.sleep(0.5)  # grace period
 
     local_files = buscar_arquivos_locais()
-    total = len(script_names)
+    started = time.time()
+    results: dict[int, dict] = {}
+    running: dict[Future, int] = {}
 
-    for i, script_name in enumerate(script_names, 1):
-        progress_str = f"{i}/{total}"
+    def finished(i: int, step_log: dict) -> None:
+        results[i] = step_log
         with _lock:
-            _state["current_script"] = script_name
-            _state["progress"] = progress_str
-
-        print(f"[WORKFLOW] Step {progress_str}: {script_name}")
-        step_log = {"script": script_name, "step": progress_str, "status": "not_found"}
+            _state["log"].append(step_log)
+            _state["progress"] = f"{len(results)}/{total}"
+            _state["current_script"] = ", ".join(script_names[j] for j in running.values()) or None
 
-        path = local_files.get(script_name)
-        if path is None:
-            print(f"[WARN] Workflow step '{script_name}' not found on disk — skipping.")
+    with ThreadPoolExecutor(max_workers=parallel, thread_name_prefix=f"workflow-{workflow_name}") as pool:
+        while len(results) < total:
+            for i, name in enumerate(script_names):
+                if i in results or i in running.values() or not waits[i] <= results.keys():
+                    continue
+                if depends_on and any(results[j]["status"] != "success" for j in waits[i]):
+                    failed = ", ".join(script_names[j] for j in sorted(waits[i]) if results[j]["status"] != "success")
+                    print(f"[WORKFLOW] Step {i + 1}/{total}: {name} skipped — {failed} did not succeed.")
+                    finished(i, {"script": name, "step": f"{i + 1}/{total}", "status": f"skipped ({failed} did not succeed)",
+                                 "run_id": None, "started_at": None, "duration": 0.0})
+                    continue
+                if len(running) >= parallel:
+                    break
+                running[pool.submit(_run_step, workflow_name, name, f"{i + 1}/{total}", local_files.get(name))] = i
             with _lock:
-                _state["log"].append(step_log)
-            continue
-
-        proc = None
-        try:
-            proc = subprocess.Popen(
-                [sys.executable, str(path)],
-                shell=False,
-                cwd=str(path.parent),
-            )
-            with executor._running_lock:
-                executor.running_processes[proc.pid] = {
-                    "pid": proc.pid,
-                    "proc_obj": proc,
-                    "script_name": f"[FLOW] {script_name}",
-                    "area_name": workflow_name.upper(),
-                    "start_time": time.time(),
-                    "is_workflow_item": True,
-                    "trigger_reason": "workflow",
-                }
-            proc.wait()
-            status = "success" if proc.returncode == 0 else f"error (exit {proc.returncode})"
-        except Exception as exc:
-            status = f"exception: {exc}"
-            print(f"[CRIT] Workflow step {script_name}: {exc}")
-        finally:
-            if proc:
-                with executor._running_lock:
-                    executor.running_processes.pop(proc.pid, None)
-
-        step_log["status"] = status
-        with _lock:
-            _state["log"].append(step_log)
-        print(f"[WORKFLOW] Step {progress_str} done: {status}")
+                _state["current_script"] = ", ".join(script_names[j] for j in running.values()) or None
+            if not running:
+                continue  # skips above may have unblocked more steps
+            done, _ = wait(running, return_when=FIRST_COMPLETED)
+            for future in done:
+                finished(running.pop(future), future.result())
 
+    wall = time.time() - started
+    durations = [results[i]["duration"] for i in range(total)]
+    path, critical = caminho_critico(durations, waits)
+    for i in path:
+        results[i]["critical"] = True
+    timing = {
+        "wall_seconds": round(wall, 1),
+        "serial_seconds": round(sum(durations), 1),
+        "critical_path": [script_names[i] for i in path],
+        "critical_path_seconds": round(critical, 1),
+        "max_parallel": parallel,
+    }
+    print(
+        f"[WORKFLOW] Critical path: {' → '.join(timing['critical_path']) or '-'} ({critical:.1f}s) | "
+        f"wall {wall:.1f}s | steps one after another {timing['serial_seconds']:.1f}s"
+    )
     print(f"[WORKFLOW] Completed: {workflow_name}\n")
     with _lock:
-        _state.update({"active": False, "name": workflow_name, "current_script": None, "progress": None})
+        _state.update({"active": False, "name": workflow_name, "current_script": None, "progress": None,
+                       "timing": timing})
 
     executor.set_workflow_state(False)
     scheduler_engine.retomar_tudo()
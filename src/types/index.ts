@@ -1,10 +1,26 @@
 export interface RunningProcess {
   pid: number;
+  run_id: string | null;
   script_name: string;
   area_name: string;
   running_time_seconds: number;
   is_workflow: boolean;
   trigger_reason: "scheduled" | "manual" | "catchup" | "workflow";
+  telemetry: ProcessTelemetry | null;
+}
+
+export interface TelemetryPeaks {
+  cpu_percent: number;
+  rss_mb: number;
+  read_mb: number;
+  write_mb: number;
+  children: number;
+}
+
+export interface ProcessTelemetry extends Partial<TelemetryPeaks> {
+  peaks: TelemetryPeaks;
+  /** [ts, cpu_percent, rss_mb, read_mb, write_mb, children] */
+  series?: number[][];
 }
 
 export interface QueuedProcess {
@@ -13,12 +29,39 @@ export interface QueuedProcess {
   priority_timestamp: number | string; // ISO string from API
   status?: string; // "waiting"
   position?: number;
+  predicted_seconds?: number;
+  lane?: "manual" | "retry" | "scheduled" | "catchup";
+  lane_position?: number;
+  estimated_start?: string;
+  estimated_wait_seconds?: number;
+}
+
+export interface LaneStatus {
+  queued: number;
+  weight: number;
+  virtual_time: number;
+  dispatched: number;
+  in_use?: number;
+  reserved?: number;
+  next_estimated_start: string | null;
 }
 
 export interface WorkflowStep {
   script: string;
   step: string;
   status: string;
+  run_id?: string | null;
+  started_at?: number | null;
+  duration?: number;
+  critical?: boolean;
+}
+
+export interface WorkflowTiming {
+  wall_seconds: number;
+  serial_seconds: number;
+  critical_path: string[];
+  critical_path_seconds: number;
+  max_parallel: number;
 }
 
 export interface WorkflowState {
@@ -27,6 +70,7 @@ export interface WorkflowState {
   current_script: string | null;
   progress: string | null; // "2/4"
   log: WorkflowStep[];
+  timing: WorkflowTiming | null;
 }
 
 export interface StatusResponse {
@@ -40,6 +84,7 @@ export interface StatusResponse {
   max_concurrent: number;
   running_count: number;
   queued_count: number;
+  lanes?: Record<string, LaneStatus>;
 }
 
 export interface ScriptInfo {
@@ -56,12 +101,35 @@ export interface ScriptInfo {
   movimentacao_financeira: string;
   interacao_cliente: string;
   tempo_manual: number;
+  slot_weight: number;
+  resource_class: string;
+  timeout_seconds: number | null;
+  memory_limit_mb: number | null;
+  cpu_limit_seconds: number | null;
+  max_retries: number | null;
+  retry_backoff_seconds: number | null;
+  retry_exit_codes: number[];
+}
+
+export interface PendingRetry {
+  script_name: string;
+  attempt: number;
+  due_at: number;
+  due_in_seconds: number;
+  reason: string;
+}
+
+export interface RetriesResponse {
+  pending: PendingRetry[];
+  fired: number;
 }
 
 export interface Workflow {
   workflow_name: string;
   scripts: string[];
   horarios: number[];
+  depends_on: Record<string, string[]>; // {} = steps run one after another
+  max_parallel: number | null;
 }
 
 export interface ScheduledJob {
@@ -79,8 +147,75 @@ export interface HealthResponse {
 }
 
 export interface ReloadResponse {
-  status: "success" | "cooldown";
+  status: "accepted" | "cooldown";
   wait_seconds?: number;
-  script_count?: number;
-  workflow_count?: number;
+  reload_id?: string;
+  coalesced?: boolean;
+}
+
+export interface RunLog {
+  run_id: string;
+  script_name: string;
+  complete: boolean;
+  started_at: number | null;
+  finished_at: number | null;
+  size: number;
+  offset: number;
+  next_offset: number;
+  truncated: boolean;
+  text: string;
+}
+
+export interface HistoryRun {
+  id: number;
+  run_id: string | null;
+  script_name: string;
+  area_name: string | null;
+  trigger_reason: string | null;
+  is_workflow: number;
+  queued_at: number | null;
+  started_at: number | null;
+  ended_at: number | null;
+  duration: number | null;
+  exit_code: number | null;
+  outcome: "success" | "error" | "killed" | "timeout" | "cpu_limit" | "launch_error";
+  peak_cpu_percent: number | null;
+  peak_rss_mb: number | null;
+  read_mb: number | null;
+  write_mb: number | null;
+  peak_children: number | null;
+}
+
+export interface HistoryPage {
+  items: HistoryRun[];
+  next_cursor: number | null;
+}
+
+export interface ScriptHistoryStats {
+  script_name: string;
+  days: number;
+  runs: number;
+  failures: number;
+  failure_rate: number | null;
+  mean_duration: number | null;
+  p50_duration: number | null;
+  p95_duration: number | null;
+  max_duration: number;
+}
+
+export interface DispatchSimulation {
+  policy: "fifo" | "sjf";
+  jobs: number;
+  mean_wait: number | null;
+  max_wait: number | null;
+  makespan: number | null;
+}
+
+export interface DispatchReport {
+  policy: "fifo" | "sjf";
+  aging: number;
+  observed: { runs: number; mean_wait: number | null; max_wait: number | null };
+  queue: Record<"fifo" | "sjf", DispatchSimulation>;
+  replay: Record<"fifo" | "sjf", DispatchSimulation>;
+  predictions: Record<string, number>;
 }
@@ -62,6 +62,341 @@ def assert_key(obj, key, msg=""):
     return True
 
 
+def check(cond, msg):
+    if not cond:
+        FAILED.append(msg)
+    return cond
+
+
+def testar_planilhas():
+    """Parse das planilhas: horários legados e expressões cron."""
+    import pandas as pd
+    from modules.registry_loader import _schedule
+
+    print("=== registry_loader._schedule ===")
+    cells = ["7, 8, 9, 10, 11", "8 12 14 16 18", "7,25,abc", "0 7,19 * * 1-5", "0 99 * * *"]
+    errors = []
+    hours, exprs = _schedule(pd.Series(cells, index=range(2, 2 + len(cells))), "s", "c", errors)
+    check(hours[2] == [7, 8, 9, 10, 11], f"hour list with 5 items: {hours[2]}")
+    check(hours[3] == [8, 12, 14, 16, 18], f"space-separated hour list: {hours[3]}")
+    check(hours[4] == [7], f"bad items drop only themselves: {hours[4]}")
+    check(exprs[5] == "0 7,19 * * 1-5" and hours[5] == [7, 19], f"cron cell: {exprs[5]} {hours[5]}")
+    check(hours[6] == [] and any(e["row"] == 6 for e in errors), "invalid cron reported")
+    check(sorted(e["value"] for e in errors if e["row"] == 4) == ["25", "abc"], f"bad hours reported: {errors}")
+    check(not any(e["row"] in (2, 3) for e in errors), f"valid hour lists reported: {errors}")
+    print("  OK\n")
+
+
+def testar_cron():
+    """Expansão de campos cron, mapeamento de dia da semana e deslocamento por hora."""
+    from datetime import datetime
+    import pytz
+    from modules import cron
+
+    print("=== cron ===")
+    check(cron.expandir_campo("*/15", 0, 59) == [0, 15, 30, 45], "*/15")
+    check(cron.expandir_campo("8-18/5", 0, 23) == [8, 13, 18], "8-18/5")
+    check(cron.expandir_campo("5/20", 0, 59) == [5, 25, 45], "5/20")
+    check(cron.expandir_campo("3,1,3", 0, 23) == [1, 3], "3,1,3")
+    for bad in ("24", "5-2", "*/0"):
+        try:
+            cron.expandir_campo(bad, 0, 23)
+            FAILED.append(f"cron: '{bad}' accepted")
+        except ValueError:
+            pass
+    check(cron._day_of_week("0") == "sun" and cron._day_of_week("7") == "sun", "weekday 0/7 → sun")
+    check(cron._day_of_week("1-5") == "mon,tue,wed,thu,fri", f"1-5 → {cron._day_of_week('1-5')}")
+    check(cron._day_of_week("mon-fri") == "mon-fri", "weekday names pass through")
+    check(cron.de_horas([7, 19]) == "0 7,19 * * *" and cron.de_horas([]) == "", "de_horas")
+    check(cron.horas("*/30 8-10 * * *") == [8, 9, 10], "horas")
+
+    tz = pytz.timezone("America/Sao_Paulo")
+    wednesday = tz.localize(datetime(2026, 10, 14, 12, 0))
+    sunday = cron.criar_trigger("0 7 * * 0", tz).get_next_fire_time(None, wednesday)
+    check(sunday is not None and (sunday.weekday(), sunday.hour) == (6, 7), f"crontab 0 = Sunday: {sunday}")
+    weekdays = cron.criar_trigger("30 9 * * 1-5", tz)
+    friday = tz.localize(datetime(2026, 10, 16, 10, 0))
+    monday = weekdays.get_next_fire_time(None, friday)
+    check(monday is not None and (monday.weekday(), monday.hour, monday.minute) == (0, 9, 30),
+          f"1-5 skips the weekend: {monday}")
+    shifted = cron.criar_trigger("0 7,8 * * *", tz, {7: 90})
+    early = shifted.get_next_fire_time(None, tz.localize(datetime(2026, 10, 14, 6, 0)))
+    late = shifted.get_next_fire_time(None, tz.localize(datetime(2026, 10, 14, 7, 30)))
+    check((early.hour, early.minute, early.second) == (7, 1, 30), f"07h offset 90s: {early}")
+    check((late.hour, late.minute, late.second) == (8, 0, 0), f"08h not shifted: {late}")
+    for bad in ("0 7 * *", "0 25 * * *", "61 7 * * *"):
+        try:
+            cron.normalizar(bad)
+            FAILED.append(f"cron: '{bad}' normalized")
+        except ValueError:
+            pass
+    print("  OK\n")
+
+
+def testar_forkserver():
+    """Script lançado pelo forkserver sai como `python script.py`: threads, atexit, código de saída."""
+    import socket
+    import subprocess
+    import tempfile
+    from pathlib import Path
+    from modules import launcher
+
+    print("=== forkserver x subprocess (semântica de saída) ===")
+    if os.name != "posix" or not hasattr(socket, "send_fds"):
+        print("  skip (forkserver precisa de POSIX)\n")
+        return
+    script = (
+        "import atexit, sys, threading, time\n"
+        "atexit.register(lambda: print('ATEXIT RAN', flush=True))\n"
+        "def work():\n"
+        "    time.sleep(0.2)\n"
+        "    print('THREAD DONE', flush=True)\n"
+        "threading.Thread(target=work).start()\n"
+        "print('MAIN DONE', flush=True)\n"
+        "sys.exit(3)\n"
+    )
+    with tempfile.TemporaryDirectory() as tmp:
+        path = Path(tmp) / "exit_semantics.py"
+        path.write_text(script)
+        cold = subprocess.run([sys.executable, str(path)], capture_output=True, text=True, cwd=tmp)
+        server = launcher._ForkServer([])
+        try:
+            with tempfile.TemporaryFile() as out:
+                code = server.launch(path, None, out, out).wait()
+                out.seek(0)
+                forked = out.read().decode()
+        finally:
+            server.stop()
+    check(cold.stdout.split() == forked.split(), f"forked output {forked!r} != subprocess {cold.stdout!r}")
+    check(code == cold.returncode == 3, f"exit codes: forked {code}, subprocess {cold.returncode}")
+    print("  OK\n")
+
+
+def testar_fila():
+    """Dedup por nome: enfileirado, já na fila (com merge) e em execução até concluir."""
+    from modules.task_queue import IndexedTaskQueue
+
+    print("=== task_queue (dedup) ===")
+    q = IndexedTaskQueue()
+    check(q.put_if_absent("a", 1, {"slots": [7]}) == "enqueued", "first put enqueues")
+    merged = []
+    dup = q.put_if_absent("a", 0, {"slots": [8]}, on_duplicate=lambda t: (t["slots"].append(8), merged.append(1)))
+    check(dup == "queued" and merged == [1], f"queued duplicate merged: {dup}")
+    check(q.qsize() == 1 and "a" in q, "duplicate not enqueued twice")
+    _, task = q.get(timeout=1)
+    check(task["slots"] == [7, 8], f"merged task: {task}")
+    check(q.put_if_absent("a", 1, {}) == "running" and q.qsize() == 0, "running name refused")
+    check(q.running() == {"a"}, f"running set: {q.running()}")
+    q.concluir("a")
+    check(q.put_if_absent("a", 1, {}) == "enqueued", "name free again after concluir")
+    check(q.remove("a") == {} and q.remove("a") is None and "a" not in q, "remove drops the index entry")
+    check(q.get(timeout=0.05) is None, "empty get times out")
+    print("  OK\n")
+
+
+def testar_slots():
+    """Limites por área e por classe de recurso no SlotLedger; pesos e liberação idempotente."""
+    from modules.slots import SlotLedger
+
+    print("=== slots (área / classe) ===")
+    ledger = SlotLedger(4, area_limits={"fin": 1}, class_limits={"browser": 2})
+    check(ledger.adquirir("r1", "a", area="fin") is None, "first fin run admitted")
+    check(ledger.adquirir("r2", "b", area="fin") == "area", "second fin run blocked by area")
+    check(ledger.adquirir("r3", "c", area="rh", resource_class="browser") is None, "browser 1/2")
+    check(ledger.adquirir("r4", "d", area="rh", resource_class="browser") is None, "browser 2/2")
+    check(ledger.adquirir("r5", "e", area="rh", resource_class="browser") == "resource_class", "browser full")
+    check(ledger.adquirir("r6", "f", area="rh") is None, "default class still admitted")
+    check(ledger.adquirir("r7", "g", area="rh") == "global", "global capacity full")
+    check(ledger.liberar("r1") and not ledger.liberar("r1"), "release is idempotent")
+    check(ledger.adquirir("r2", "b", area="fin") is None, "fin admitted after release")
+
+    heavy = SlotLedger(4, class_limits={"gpu": 2})
+    check(heavy.adquirir("h1", "big", weight=3, resource_class="gpu") is None, "heavier run admitted alone")
+    check(heavy.adquirir("h2", "small", weight=1, resource_class="gpu") == "resource_class", "nothing joins it")
+    check(heavy.adquirir("h3", "x", weight=5) == "global", "weight clamped to capacity, still blocked")
+    heavy.liberar("h1")
+    stats = ledger.stats()
+    check(stats["in_use"] == 4 and stats["invariant_violations"] == 0, f"ledger stats: {stats}")
+    check(stats["admission_blocks"]["area"] == 1 and stats["admission_blocks"]["resource_class"] == 1,
+          f"blocks: {stats['admission_blocks']}")
+    check(heavy.stats()["in_use"] == 0 and heavy.stats()["duplicate_releases"] == 0, "heavy ledger drained")
+    print("  OK\n")
+
+
+def testar_lanes():
+    """Raias: fila justa ponderada (sem crédito acumulado) e reserva de slots por raia."""
+    from modules.slots import SlotLedger
+    from modules.task_queue import IndexedTaskQueue
+
+    print("=== lanes (fila justa / reserva) ===")
+    q = IndexedTaskQueue({"manual": 3, "catchup": 1})
+
+    def put(name, lane):
+        q.put_if_absent(name, 0, {"name": name}, lane=lane)
+
+    def drain():
+        return [q.get(timeout=0)[1]["name"] for _ in range(q.qsize())]
+
+    for i in range(6):
+        put(f"c{i}", "catchup")
+    for i in range(3):
+        put(f"m{i}", "manual")
+    projected = [e[2] for e in q._entries()]
+    order = drain()
+    check(order == ["m0", "c0", "m1", "m2", "c1", "c2", "c3", "c4", "c5"], f"weighted order: {order}")
+    check(projected == order, f"snapshot projection {projected} != dispatch order")
+
+    # Idle manual lane restarts at the busy lane's virtual time: no banked credit
+    put("c6", "catchup")
+    put("c7", "catchup")
+    for i in range(3, 7):
+        put(f"m{i}", "manual")
+    order = drain()
+    check(order == ["m3", "c6", "m4", "m5", "m6", "c7"], f"no banked credit: {order}")
+
+    # A skipped head lets the next task of the same lane through
+    put("m7", "manual")
+    put("m8", "manual")
+    _, task = q.get(timeout=0, admitir=lambda t: "skip" if t["name"] == "m7" else "admit")
+    check(task["name"] == "m8", f"skip head: {task}")
+    check(q.get(timeout=0, admitir=lambda t: "wait") is None and q.qsize() == 1, "wait holds the queue")
+
+    ledger = SlotLedger(3, lane_reserved={"manual": 1})
+    check(ledger.adquirir("s1", "a", lane="scheduled") is None, "scheduled 1/2")
+    check(ledger.adquirir("s2", "b", lane="scheduled") is None, "scheduled 2/2")
+    check(ledger.adquirir("s3", "c", lane="catchup") == "reserved", "reserved unit kept for manual")
+    check(ledger.adquirir("m1", "d", lane="manual") is None, "manual takes its reserved unit")
+    check(ledger.adquirir("m2", "e", lane="manual") == "global", "then the pool is full")
+    ledger.liberar("s1")
+    check(ledger.adquirir("m2", "e", lane="manual") is None, "manual may also use shared units")
+    lanes = ledger.stats()["lanes"]
+    check(lanes["manual"] == {"in_use": 2, "reserved": 1}, f"lane stats: {lanes}")
+    print("  OK\n")
+
+
+def testar_workflow_dag():
+    """DAG de workflow: ordem das dependências, passos em paralelo, falha propagada e caminho crítico."""
+    import tempfile
+    from pathlib import Path
+    from modules import scheduler_engine, workflow_manager
+
+    print("=== workflow DAG ===")
+    path, seconds = workflow_manager.caminho_critico([1, 5, 2, 1], {0: set(), 1: {0}, 2: {0}, 3: {1, 2}})
+    check(path == [0, 1, 3] and seconds == 7, f"diamond critical path: {path} {seconds}")
+    check(workflow_manager.caminho_critico([], {}) == ([], 0.0), "empty workflow")
+
+    steps = {"a": "time.sleep(0.3)", "b": "sys.exit(1)", "c": "time.sleep(0.3)", "d": "", "e": ""}
+    depends_on = {"b": ["a"], "c": ["a"], "d": ["b"], "e": ["c"]}
+    original = (workflow_manager.buscar_arquivos_locais, scheduler_engine.pausar_tudo, scheduler_engine.retomar_tudo)
+    with tempfile.TemporaryDirectory() as tmp:
+        files = {}
+        for name, body in steps.items():
+            files[name] = Path(tmp) / f"{name}.py"
+            files[name].write_text(f"import sys, time\n{body}\n")
+        workflow_manager.buscar_arquivos_locais = lambda: files
+        scheduler_engine.pausar_tudo = scheduler_engine.retomar_tudo = lambda: None
+        try:
+            workflow_manager.iniciar_workflow("dag_test", list(steps), depends_on, max_parallel=2)
+        finally:
+            workflow_manager.buscar_arquivos_locais, scheduler_engine.pausar_tudo, scheduler_engine.retomar_tudo = original
+    state = workflow_manager.get_state()
+    log = {entry["script"]: entry for entry in state["log"]}
+    status = {name: entry["status"] for name, entry in log.items()}
+    check(status.pop("d", "").startswith("skipped (b"), f"d skipped after b failed: {log.get('d')}")
+    check(status == {"a": "success", "b": "error (exit 1)", "c": "success", "e": "success"}, f"step outcomes: {status}")
+    a_end = log["a"]["started_at"] + log["a"]["duration"]
+    check(log["b"]["started_at"] >= a_end - 0.05 and log["c"]["started_at"] >= a_end - 0.05, "b/c wait for a")
+    check(abs(log["b"]["started_at"] - log["c"]["started_at"]) < 0.25, "b and c run in parallel")
+    check(log["e"]["started_at"] >= log["c"]["started_at"] + log["c"]["duration"] - 0.05, "e waits for c")
+    timing = state["timing"]
+    check(timing["critical_path"] == ["a", "c", "e"] and timing["max_parallel"] == 2, f"timing: {timing}")
+    check(not state["active"] and not workflow_manager.is_active(), "workflow finished")
+    print("  OK\n")
+
+
+def testar_scanner():
+    """Índice de scripts: nomes duplicados, varredura por mtime e restauração do snapshot."""
+    import tempfile
+    from pathlib import Path
+    from modules import snapshot
+    from modules.config import config
+    from modules.scanner import _ScriptIndex
+
+    print("=== scanner (duplicados / snapshot) ===")
+    saved = (snapshot._path, snapshot._doc, config.SCAN_WATCHER)
+    with tempfile.TemporaryDirectory() as tmp:
+        root = Path(tmp) / "automacoes"
+        files = ["a/metodos/job.py", "b/metodos/Job.py", "b/metodos/_helper.py", "b/solto.py", "b/metodos/sub/deep.py"]
+        for rel in files:
+            (root / rel).parent.mkdir(parents=True, exist_ok=True)
+            (root / rel).write_text("")
+        snapshot._path, snapshot._doc, config.SCAN_WATCHER = Path(tmp) / "snapshot.json", None, False
+        try:
+            index = _ScriptIndex(root)
+            found = index.get()
+            check(found == {"job": root / "a/metodos/job.py", "deep": root / "b/metodos/sub/deep.py"},
+                  f"first path wins, _/non-metodos skipped: {found}")
+
+            (root / "a/metodos/job.py").unlink()
+            os.utime(root / "a/metodos", (time.time() + 5, time.time() + 5))
+            version = index.version
+            found = index.get(force=True)
+            check(found.get("job") == root / "b/metodos/Job.py" and index.version == version + 1,
+                  f"duplicate takes over after removal: {found}")
+
+            (root / "b/metodos/sub/deep.py").unlink()
+            snapshot._doc = None  # read the file back, as a fresh boot would
+            restored = _ScriptIndex(root)
+            check(restored.restore(), "snapshot restored")
+            check(restored.get() == found, f"snapshot served without a disk walk: {restored.get()}")
+            os.utime(root / "b/metodos/sub", (time.time() + 5, time.time() + 5))
+            check("deep" not in restored.get(force=True), "sweep after restore drops the removed file")
+            check(not _ScriptIndex(Path(tmp) / "outra").restore(), "snapshot of another root ignored")
+        finally:
+            snapshot._path, snapshot._doc, config.SCAN_WATCHER = saved
+    print("  OK\n")
+
+
+def testar_fila_persistente():
+    """Fila persistente: o que estava na fila ou em execução quando o processo morreu volta no boot."""
+    import subprocess
+    import tempfile
+
+    print("=== queue_store (restauração após queda) ===")
+    crash = (
+        "import os, time\n"
+        "from modules import queue_store as qs\n"
+        "qs.enfileirado('a', 1, 'scheduled', {'path': 'a.py', 'slots': [7]})\n"
+        "qs.enfileirado('b', 2, 'manual', {'path': 'b.py'})\n"
+        "qs.enfileirado('c', 3, 'catchup', {'path': 'c.py'})\n"
+        "qs.atualizado('a', {'path': 'a.py', 'slots': [7, 8]})\n"
+        "qs.despachado('a', 'run-a')\n"
+        "qs.despachado('c', 'run-c')\n"
+        "qs.concluido('c', 'run-c')\n"
+        "qs.concluido('b', 'run-antigo')\n"
+        "time.sleep(1)\n"
+        "os._exit(9)\n"
+    )
+    boot = "import json\nfrom modules import queue_store as qs\nprint(json.dumps(qs.restaurar()))\n"
+    with tempfile.TemporaryDirectory() as tmp:
+        env = {**os.environ, "QUEUE_PERSISTENT": "true", "DIRETORIO_DADOS": tmp}
+        cwd = os.path.dirname(os.path.abspath(__file__))
+        died = subprocess.run([sys.executable, "-c", crash], env=env, cwd=cwd, capture_output=True, text=True)
+        check(died.returncode == 9, f"crash child exit {died.returncode}: {died.stderr}")
+        restarted = subprocess.run([sys.executable, "-c", boot], env=env, cwd=cwd, capture_output=True, text=True)
+    try:
+        rows = json.loads(restarted.stdout.strip().splitlines()[-1])
+    except (IndexError, json.JSONDecodeError):
+        FAILED.append(f"queue_store restore output: {restarted.stdout!r} {restarted.stderr!r}")
+        return
+    check([r["script_name"] for r in rows] == ["a", "b"], f"restored rows: {rows}")
+    if len(rows) == 2:
+        check(rows[0]["state"] == "running" and rows[0]["run_id"] == "run-a", f"in-flight run kept: {rows[0]}")
+        check(rows[0]["task"]["slots"] == [7, 8], f"merged slots persisted: {rows[0]['task']}")
+        check(rows[1]["state"] == "queued" and rows[1]["lane"] == "manual", f"stale done kept queued row: {rows[1]}")
+    print("  OK\n")
+
+
 def main():
     # Importa e sobe o app em thread (sem webbrowser)
     from modules.config import config
@@ -84,6 +419,33 @@ def main():
     assert config.TIMEZONE == "America/Sao_Paulo", "TIMEZONE"
     print("  OK config\n")
 
+    testar_planilhas()
+    testar_cron()
+    testar_forkserver()
+    testar_fila()
+    testar_slots()
+    testar_lanes()
+    testar_workflow_dag()
+    testar_scanner()
+    testar_fila_persistente()
+
+    # Planilha de workflows só com cabeçalho: nenhum workflow, sem erro de parse
+    print("=== carregar_workflows (planilha vazia) ===")
+    import tempfile
+    from openpyxl import Workbook
+    from modules.registry_loader import WORKFLOW_COLUMNS, carregar_workflows
+    with tempfile.TemporaryDirectory() as tmp:
+        wb = Workbook()
+        wb.active.append(list(WORKFLOW_COLUMNS))
+        wb.save(os.path.join(tmp, "workflows.xlsx"))
+        try:
+            workflows, errors = carregar_workflows(os.path.join(tmp, "workflows.xlsx"))
+            if workflows or errors:
+                FAILED.append(f"empty workflows sheet: {workflows} {errors}")
+        except Exception as exc:
+            FAILED.append(f"empty workflows sheet raised {exc!r}")
+    print("  OK\n")
+
     iniciar_scheduler()
     server_thread = threading.Thread(
         target=lambda: app.run(host=config.HOST, port=config.PORT, debug=False, threaded=True, use_reloader=False),
@@ -113,6 +475,14 @@ def main():
     assert_key(body, "uptime_seconds", "health")
     assert_key(body, "running", "health")
     assert_key(body, "queued", "health")
+    assert_key(body, "slots", "health")
+    assert_key(body, "adaptive", "health")
+    assert_key(body, "deadlines", "health")
+    for k in ("armed", "timeouts", "sigkill_escalations"):
+        assert_key(body.get("deadlines") or {}, k, "health.deadlines")
+    for k in ("capacity", "in_use", "utilization", "invariant_violations"):
+        if k not in (body.get("slots") or {}):
+            FAILED.append(f"health: slots.{k} missing")
     print("  ", body)
     print("  OK\n")
 
@@ -126,6 +496,11 @@ def main():
     assert_key(body, "max_concurrent", "status")
     assert_key(body, "running_count", "status")
     assert_key(body, "queued_count", "status")
+    assert_key(body, "lanes", "status")
+    for lane in ("manual", "scheduled", "catchup"):
+        if lane not in (body.get("lanes") or {}):
+            FAILED.append(f"status: lanes missing '{lane}'")
+    assert_key(body, "recent_peaks", "status")
     if body.get("queued_processes"):
         q = body["queued_processes"][0]
         if "priority_timestamp" not in q:
@@ -157,6 +532,17 @@ def main():
     print(f"  áreas: {list(body.keys())}")
     print("  OK\n")
 
+    # --- GET /api/registry ---
+    print("=== GET /api/registry ===")
+    code, body = get("/api/registry")
+    assert_ok(code, "/api/registry")
+    assert_key(body, "version", "registry")
+    assert_key(body, "sheets", "registry")
+    for k in ["hits", "misses", "parses", "parse_seconds", "validation_errors"]:
+        assert_key(body.get("sheets", {}).get("registro"), k, "registry.sheets.registro")
+    print("  ", body.get("sheets", {}).get("registro"))
+    print("  OK\n")
+
     # --- GET /api/jobs ---
     print("=== GET /api/jobs ===")
     code, body = get("/api/jobs")
@@ -169,12 +555,24 @@ def main():
             assert_key(j, "id", "job"); assert_key(j, "name", "job"); assert_key(j, "trigger", "job")
     print("  OK\n")
 
+    # --- GET /api/schedule/skew ---
+    print("=== GET /api/schedule/skew ===")
+    code, body = get("/api/schedule/skew")
+    assert_ok(code, "/api/schedule/skew")
+    assert_key(body, "mode", "skew")
+    assert_key(body, "hours", "skew")
+    print("  mode:", body.get("mode"), "hours:", list(body.get("hours", {}).keys()))
+    print("  OK\n")
+
     # --- GET /api/workflows ---
     print("=== GET /api/workflows ===")
     code, body = get("/api/workflows")
     assert_ok(code, "/api/workflows")
     assert_key(body, "workflows", "workflows")
     assert_key(body, "state", "workflows")
+    for wf in body.get("workflows", []):
+        assert_key(wf, "depends_on", "workflows[]")
+        assert_key(wf, "max_parallel", "workflows[]")
     print(f"  workflows: {len(body.get('workflows', []))}  state.active: {body.get('state', {}).get('active')}")
     print("  OK\n")
 
@@ -198,10 +596,24 @@ def main():
     # --- POST /api/reload ---
     print("=== POST /api/reload ===")
     code, body = post("/api/reload")
-    assert_ok(code, "/api/reload")
+    if code != 202:
+        FAILED.append(f"Expected 202 got {code} /api/reload")
     assert_key(body, "status", "reload")
-    assert body.get("status") in ("success", "cooldown"), "reload status"
+    assert_key(body, "reload_id", "reload")
+    assert body.get("status") == "accepted", "reload status"
     print("  ", body)
+    reload_info = {}
+    for _ in range(50):
+        code, reload_info = get(f"/api/reload/{body.get('reload_id')}")
+        assert_ok(code, "/api/reload/<id>")
+        if reload_info.get("status") != "running":
+            break
+        time.sleep(0.1)
+    if reload_info.get("status") != "success":
+        FAILED.append(f"reload did not succeed: {reload_info}")
+    for phase in ["scan", "parse", "diff", "apply"]:
+        assert_key(reload_info.get("timings"), phase, "reload timings")
+    print("  ", reload_info.get("timings"), reload_info.get("result"))
     print("  OK\n")
 
     # --- POST /api/reload cooldown (deve retornar 429 ou success após 60s; testamos só 429 se chamar de novo logo)
@@ -228,6 +640,48 @@ def main():
     pid_to_kill = running[0]["pid"] if running else None
     print("  OK\n")
 
+    # --- GET /api/runs/<run_id>/log ---
+    print("=== GET /api/runs/<run_id>/log ===")
+    code, body = get("/api/runs/0123456789ab/log")
+    if code != 404:
+        FAILED.append(f"runs log: unknown run_id expected 404 got {code}")
+    if running and running[0].get("run_id"):
+        code, body = get(f"/api/runs/{running[0]['run_id']}/log?tail=20")
+        assert_ok(code, "/api/runs/<run_id>/log")
+        for k in ("text", "offset", "next_offset", "complete"):
+            assert_key(body, k, "runs log")
+        print("  ", {k: body.get(k) for k in ("run_id", "size", "complete")})
+    print("  OK\n")
+
+    # --- GET /api/history + /api/history/stats ---
+    print("=== GET /api/history ===")
+    code, body = get("/api/history?limit=5")
+    assert_ok(code, "/api/history")
+    for k in ("items", "next_cursor"):
+        assert_key(body, k, "history")
+    code, body = get("/api/history/stats?days=7")
+    assert_ok(code, "/api/history/stats")
+    if not isinstance(body, list):
+        FAILED.append("history stats: expected a list")
+    print("  OK\n")
+
+    # --- GET /api/retries ---
+    print("=== GET /api/retries ===")
+    code, body = get("/api/retries")
+    assert_ok(code, "/api/retries")
+    for k in ("pending", "fired"):
+        assert_key(body, k, "retries")
+    print("  OK\n")
+
+    # --- GET /api/dispatch ---
+    print("=== GET /api/dispatch ===")
+    code, body = get("/api/dispatch")
+    assert_ok(code, "/api/dispatch")
+    for k in ("policy", "observed", "queue", "replay"):
+        assert_key(body, k, "dispatch")
+    print("  ", {"policy": body.get("policy"), "replay": body.get("replay")})
+    print("  OK\n")
+
     # --- POST /api/kill/<pid> (se temos um processo rodando) ---
     if pid_to_kill:
         print("=== POST /api/kill/<pid> ===")